@@ -0,0 +1,54 @@
+"""Add monthly rollups
+
+Revision ID: 49362102b057
+Revises: 5d7e30c6a0ce
+Create Date: 2026-10-17 17:40:00.000000
+
+Totais mensais por usuário, mês, categoria e tipo (app.services.rollups):
+monthly_rollup para o bot e transactionrollup para a API. Depois de
+aplicar, preencha com:
+
+    python -m app.services.rollups rebuild chat
+    python -m app.services.rollups rebuild api
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '49362102b057'
+down_revision = '5d7e30c6a0ce'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    tables = set(sa.inspect(op.get_bind()).get_table_names())
+    if 'monthly_rollup' not in tables:
+        op.create_table('monthly_rollup',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('month', sa.Date(), nullable=False),
+        sa.Column('category', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('type', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('total', sa.Numeric(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('user_id', 'month', 'category', 'type')
+        )
+    if 'transactionrollup' not in tables:
+        op.create_table('transactionrollup',
+        sa.Column('owner_id', sa.Integer(), nullable=False),
+        sa.Column('month', sa.Date(), nullable=False),
+        sa.Column('category_id', sa.Integer(), nullable=False),
+        sa.Column('type', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('total', sa.Float(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['owner_id'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('owner_id', 'month', 'category_id', 'type')
+        )
+
+
+def downgrade():
+    op.drop_table('transactionrollup')
+    op.drop_table('monthly_rollup')
@@ -0,0 +1,45 @@
+"""Add balance ledger
+
+Revision ID: 5d7e30c6a0ce
+Revises: e41e61f2b695
+Create Date: 2026-10-17 17:05:00.000000
+
+Tabela balance: saldo materializado por usuário (app.services.ledger),
+preenchida a partir das transações existentes com um único
+INSERT ... SELECT agrupado.
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '5d7e30c6a0ce'
+down_revision = 'e41e61f2b695'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    tables = set(sa.inspect(op.get_bind()).get_table_names())
+    if 'balance' in tables:
+        return
+    op.create_table('balance',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('amount', sa.Numeric(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    if 'transactions' in tables:
+        op.execute(
+            "INSERT INTO balance (user_id, amount, updated_at) "
+            "SELECT user_id, "
+            "SUM(CASE WHEN type = 'income' THEN amount ELSE -amount END), "
+            "CURRENT_TIMESTAMP "
+            "FROM transactions GROUP BY user_id"
+        )
+
+
+def downgrade():
+    op.drop_table('balance')
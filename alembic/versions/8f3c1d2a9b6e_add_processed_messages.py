@@ -0,0 +1,36 @@
+"""Add processed messages
+
+Revision ID: 8f3c1d2a9b6e
+Revises: 49362102b057
+Create Date: 2026-10-17 19:10:00.000000
+
+Mensagens já recebidas pelo webhook (app.services.dedup), usadas com
+WEBHOOK_DEDUP_BACKEND=database para deduplicar reenvios entre workers.
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '8f3c1d2a9b6e'
+down_revision = '49362102b057'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    tables = set(sa.inspect(op.get_bind()).get_table_names())
+    if 'processedmessage' not in tables:
+        op.create_table('processedmessage',
+        sa.Column('key', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('response', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('key')
+        )
+        op.create_index(op.f('ix_processedmessage_created_at'), 'processedmessage', ['created_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_processedmessage_created_at'), table_name='processedmessage')
+    op.drop_table('processedmessage')
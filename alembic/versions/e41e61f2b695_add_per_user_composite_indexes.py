@@ -0,0 +1,71 @@
+"""Add per-user composite indexes
+
+Revision ID: e41e61f2b695
+Revises: e2412789c190
+Create Date: 2026-10-17 16:20:00.000000
+
+Índices compostos para as consultas quentes por usuário + data/status:
+
+- transaction (owner_id, date): analytics e exportação da API
+- transactions (user_id, date): extrato e orçamento do bot
+- bill (owner_id, is_paid, due_date): NotificationService.check_bills
+- reminder (user_id, is_active): get_reminders
+
+As tabelas foram criadas por create_all, então só recebem índice as que
+existem. No PostgreSQL os índices são criados com CONCURRENTLY para não
+bloquear escritas em tabelas grandes.
+"""
+from contextlib import nullcontext
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = 'e41e61f2b695'
+down_revision = 'e2412789c190'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('ix_transaction_owner_id_date', 'transaction', ['owner_id', 'date']),
+    ('ix_transactions_user_id_date', 'transactions', ['user_id', 'date']),
+    ('ix_bill_owner_id_is_paid_due_date', 'bill', ['owner_id', 'is_paid', 'due_date']),
+    ('ix_reminder_user_id_is_active', 'reminder', ['user_id', 'is_active']),
+]
+
+
+def existing_indexes():
+    inspector = sa.inspect(op.get_bind())
+    tables = set(inspector.get_table_names())
+    return {
+        table: {index['name'] for index in inspector.get_indexes(table)}
+        for _, table, _ in INDEXES
+        if table in tables
+    }
+
+
+def concurrent_block():
+    """(CONCURRENTLY?, bloco) — CREATE INDEX CONCURRENTLY não roda dentro de transação"""
+    if op.get_bind().dialect.name == 'postgresql':
+        return True, op.get_context().autocommit_block()
+    return False, nullcontext()
+
+
+def upgrade():
+    existing = existing_indexes()
+    concurrently, block = concurrent_block()
+    with block:
+        for name, table, columns in INDEXES:
+            if table in existing and name not in existing[table]:
+                op.create_index(name, table, columns, postgresql_concurrently=concurrently)
+
+
+def downgrade():
+    existing = existing_indexes()
+    concurrently, block = concurrent_block()
+    with block:
+        for name, table, _ in reversed(INDEXES):
+            if name in existing.get(table, ()):
+                op.drop_index(name, table_name=table, postgresql_concurrently=concurrently)
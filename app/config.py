@@ -12,6 +12,9 @@ def get_config(key: str, default=None):
 # Exporta como 'config' para manter compatibilidade
 config = get_config
 
+def config_bool(key: str, default: bool = False) -> bool:
+    return str(config(key, default=str(default))).strip().lower() in ("1", "true", "yes", "on")
+
 # Carrega configurações principais
 ENVIRONMENT = config("ENVIRONMENT", default="development")
 DATABASE_URL = config("DATABASE_URL", default="sqlite:///./test.db")
@@ -28,4 +31,78 @@ WEBHOOK_URL_DEV = config("WEBHOOK_URL_DEV")
 WEBHOOK_URL_PROD = config("WEBHOOK_URL_PROD")
 
 # Define URL do webhook baseado no ambiente
-WEBHOOK_URL = WEBHOOK_URL_PROD if ENVIRONMENT == "production" else WEBHOOK_URL_DEV 
\ No newline at end of file
+WEBHOOK_URL = WEBHOOK_URL_PROD if ENVIRONMENT == "production" else WEBHOOK_URL_DEV
+
+# Webhook: "inline" processa na própria requisição, "queue" responde 202 e
+# processa em workers
+WEBHOOK_MODE = config("WEBHOOK_MODE", default="inline")
+WEBHOOK_QUEUE_SIZE = int(config("WEBHOOK_QUEUE_SIZE", default="1000"))
+WEBHOOK_WORKERS = int(config("WEBHOOK_WORKERS", default="4"))
+
+# Cliente HTTP do servidor Node.js (conexões e timeouts em segundos)
+BRIDGE_MAX_CONNECTIONS = int(config("BRIDGE_MAX_CONNECTIONS", default="20"))
+BRIDGE_MAX_KEEPALIVE = int(config("BRIDGE_MAX_KEEPALIVE", default="10"))
+BRIDGE_KEEPALIVE_EXPIRY = float(config("BRIDGE_KEEPALIVE_EXPIRY", default="30"))
+BRIDGE_CONNECT_TIMEOUT = float(config("BRIDGE_CONNECT_TIMEOUT", default="5"))
+BRIDGE_SEND_TIMEOUT = float(config("BRIDGE_SEND_TIMEOUT", default="10"))
+BRIDGE_QR_TIMEOUT = float(config("BRIDGE_QR_TIMEOUT", default="5"))
+
+# Notificações: janela de agrupamento (s) e taxas de envio (mensagens/s)
+NOTIFY_DIGEST_WINDOW = float(config("NOTIFY_DIGEST_WINDOW", default="2"))
+NOTIFY_RECIPIENT_RATE = float(config("NOTIFY_RECIPIENT_RATE", default="0.2"))
+NOTIFY_GLOBAL_RATE = float(config("NOTIFY_GLOBAL_RATE", default="20"))
+# Máximo de mensagens aguardando resumo; acima disso são descartadas
+NOTIFY_MAX_PENDING = int(config("NOTIFY_MAX_PENDING", default="100000"))
+
+# Deduplicação do webhook: "memory", "database" (compartilhada) ou "off"
+WEBHOOK_DEDUP_BACKEND = config("WEBHOOK_DEDUP_BACKEND", default="memory")
+WEBHOOK_DEDUP_TTL = float(config("WEBHOOK_DEDUP_TTL", default="600"))
+WEBHOOK_DEDUP_MAXSIZE = int(config("WEBHOOK_DEDUP_MAXSIZE", default="10000"))
+
+# Logging: formato "text", "json" ou "logfmt"; LOG_ASYNC escreve em uma thread
+# separada; LOG_SAMPLING ex.: "app.routes.whatsapp=0.1"
+LOG_LEVEL = config("LOG_LEVEL", default="INFO")
+LOG_FORMAT = config("LOG_FORMAT", default="text")
+LOG_ASYNC = config_bool("LOG_ASYNC", default=False)
+LOG_SAMPLING = config("LOG_SAMPLING", default="")
+
+# Importação de transações (CSV/OFX): linhas por lote
+IMPORT_BATCH_SIZE = int(config("IMPORT_BATCH_SIZE", default="1000"))
+
+# Paginação por cursor: tamanho padrão e máximo da página
+PAGE_DEFAULT_SIZE = int(config("PAGE_DEFAULT_SIZE", default="50"))
+PAGE_MAX_SIZE = int(config("PAGE_MAX_SIZE", default="200"))
+
+# Réplica de leitura: após uma escrita, as leituras do mesmo usuário ficam no
+# banco principal por este intervalo (s)
+DB_REPLICA_STICKY_SECONDS = float(config("DB_REPLICA_STICKY_SECONDS", default="5"))
+
+# Perfil do engine: direct, session-pooler, transaction-pooler ou sqlite
+# (vazio: detectado pela URL; porta 6543 = pooler em modo transação)
+DB_ENGINE_PROFILE = config("DB_ENGINE_PROFILE", default="")
+
+# Métricas do pool: uso de conexão acima deste tempo (s) é registrado por rota/job
+POOL_LONG_HOLD_SECONDS = float(config("POOL_LONG_HOLD_SECONDS", default="2"))
+
+# Rotas /internal (diagnóstico): exigem o cabeçalho X-Internal-Token; vazio = desligadas (404)
+INTERNAL_API_TOKEN = config("INTERNAL_API_TOKEN", default="")
+
+# Cache das análises por usuário (itens em memória; 0 desliga)
+ANALYTICS_CACHE_SIZE = int(config("ANALYTICS_CACHE_SIZE", default="1000"))
+# Idade máxima (s) de um resultado em cache: prazo para ver escritas de outros workers (0 = sem limite)
+ANALYTICS_CACHE_TTL = float(config("ANALYTICS_CACHE_TTL", default="60"))
+
+# Imagens geradas (gráficos e QR codes): preset de tamanho "whatsapp",
+# "thumbnail" ou "desktop" e formato do QR code do PIX (png, png8 ou webp)
+IMAGE_PRESET = config("IMAGE_PRESET", default="whatsapp")
+QR_FORMAT = config("QR_FORMAT", default="png8")
+
+# Gráficos: backend "lite" (SVG/Pillow) ou "matplotlib", formato png, png8,
+# webp ou svg, processos do pool, timeout por gráfico (s), itens em cache e
+# gráficos por worker antes de substituí-lo (0: nunca)
+CHART_BACKEND = config("CHART_BACKEND", default="lite")
+CHART_FORMAT = config("CHART_FORMAT", default="png8")
+CHART_WORKERS = int(config("CHART_WORKERS", default="2"))
+CHART_TIMEOUT = float(config("CHART_TIMEOUT", default="10"))
+CHART_CACHE_SIZE = int(config("CHART_CACHE_SIZE", default="256"))
+CHART_MAX_TASKS_PER_CHILD = int(config("CHART_MAX_TASKS_PER_CHILD", default="500"))
@@ -1,11 +1,13 @@
-from typing import List
+from typing import Optional
 
 from fastapi.encoders import jsonable_encoder
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from app.crud.base import CRUDBase
 from app.db.models import Item
 from app.schemas.item import ItemCreate, ItemUpdate
+from app.services.pagination import Page, make_page, page_size, paginate
 
 
 class CRUDItem(CRUDBase[Item, ItemCreate, ItemUpdate]):
@@ -20,15 +22,14 @@ class CRUDItem(CRUDBase[Item, ItemCreate, ItemUpdate]):
         return db_obj
 
     def get_multi_by_owner(
-        self, db: Session, *, owner_id: int, skip: int = 0, limit: int = 100
-    ) -> List[Item]:
-        return (
-            db.query(self.model)
-            .filter(Item.owner_id == owner_id)
-            .offset(skip)
-            .limit(limit)
-            .all()
+        self, db: Session, *, owner_id: int, cursor: Optional[str] = None, limit: int = 100
+    ) -> Page[Item]:
+        columns = (Item.id,)
+        size = page_size(limit)
+        query = paginate(
+            select(self.model).where(Item.owner_id == owner_id),
+            columns, cursor, size, descending=False,
         )
-
+        return make_page(db.execute(query).scalars().all(), columns, size)
 
 item = CRUDItem(Item)
@@ -3,25 +3,70 @@ from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 import os
 from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+from app.db.profiles import create_profiled_engine
+from app.db.routing import ReadRouter
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./finbot.db")
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")
+DB_ECHO = os.getenv("DB_ECHO", "false").lower() in ("1", "true", "yes")
+
+
+def async_database_url(url: str) -> str:
+    """Converte URLs síncronas (postgresql://, sqlite://) para drivers assíncronos"""
+    if url.startswith("postgres://"):
+        url = "postgresql://" + url[len("postgres://"):]
+    if url.startswith("postgresql://") or url.startswith("postgresql+psycopg2://"):
+        url = "postgresql+asyncpg://" + url.split("://", 1)[1]
+        # asyncpg usa "ssl" no lugar de "sslmode"
+        url = url.replace("sslmode=", "ssl=")
+    elif url.startswith("sqlite://"):
+        url = "sqlite+aiosqlite://" + url[len("sqlite://"):]
+    return url
+
+
+engine = create_profiled_engine(async_database_url(DATABASE_URL), name="async", echo=DB_ECHO)
+
+# Fábrica única de sessões assíncronas
+async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
-engine = create_async_engine(DATABASE_URL, echo=True)
+# Réplica de leitura opcional (app.db.routing)
+replica_engine = (
+    create_profiled_engine(async_database_url(DATABASE_REPLICA_URL), name="async-replica", echo=DB_ECHO)
+    if DATABASE_REPLICA_URL else None
+)
+read_router = ReadRouter(
+    async_session,
+    sessionmaker(replica_engine, class_=AsyncSession, expire_on_commit=False) if replica_engine else None,
+)
 
 async def init_db():
+    """Cria as tabelas do esquema da API (as mesmas de app.db.session.initialize_db)"""
+    # Registra os modelos no metadata; sem isso o create_all não cria nada
+    import app.db.models  # noqa: F401
+
     async with engine.begin() as conn:
         await conn.run_sync(SQLModel.metadata.create_all)
 
 @asynccontextmanager
-async def get_session() -> AsyncSession:
+async def get_session() -> AsyncIterator[AsyncSession]:
     """Cria uma sessão assíncrona do banco de dados"""
-    async_session = sessionmaker(
-        engine, class_=AsyncSession, expire_on_commit=False
-    )
     async with async_session() as session:
         try:
             yield session
             await session.commit()
         except Exception:
             await session.rollback()
-            raise 
\ No newline at end of file
+            raise
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """Dependência do FastAPI: uma sessão assíncrona por requisição"""
+    async with async_session() as session:
+        yield session
+
+@asynccontextmanager
+async def get_read_session(user_id: Optional[int] = None) -> AsyncIterator[AsyncSession]:
+    """Sessão só de leitura: réplica, ou o principal se o usuário gravou há pouco"""
+    async with read_router.sessionmaker_for(user_id)() as session:
+        yield session
@@ -1,6 +1,7 @@
 from typing import Union, Optional, List, Annotated
-from datetime import datetime
+from datetime import date, datetime
 from pydantic import BaseModel, EmailStr
+from sqlalchemy import Index
 from sqlmodel import Field, Relationship, SQLModel
 
 
@@ -117,6 +118,9 @@ class Category(SQLModel, table=True):
 
 
 class Transaction(SQLModel, table=True):
+    # Consultas por usuário e período (analytics, exportação)
+    __table_args__ = (Index("ix_transaction_owner_id_date", "owner_id", "date"),)
+
     id: Optional[int] = Field(default=None, primary_key=True)
     amount: float
     type: str  # income, expense
@@ -132,6 +136,9 @@ class Transaction(SQLModel, table=True):
 
 
 class Bill(SQLModel, table=True):
+    # Contas pendentes por vencimento (NotificationService.check_bills)
+    __table_args__ = (Index("ix_bill_owner_id_is_paid_due_date", "owner_id", "is_paid", "due_date"),)
+
     id: Optional[int] = Field(default=None, primary_key=True)
     description: str
     amount: float
@@ -144,6 +151,16 @@ class Bill(SQLModel, table=True):
     category: Optional[Category] = Relationship()
 
 
+class TransactionRollup(SQLModel, table=True):
+    """Soma e contagem de transações por usuário, mês, categoria e tipo"""
+    owner_id: int = Field(foreign_key="user.id", primary_key=True)
+    month: date = Field(primary_key=True)  # primeiro dia do mês
+    category_id: int = Field(default=0, primary_key=True)  # 0: sem categoria
+    type: str = Field(primary_key=True)  # income, expense
+    total: float = 0.0
+    count: int = 0
+
+
 class Goal(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     name: str
@@ -154,5 +171,12 @@ class Goal(SQLModel, table=True):
     owner: "User" = Relationship(back_populates="goals")
 
 
+class ProcessedMessage(SQLModel, table=True):
+    """Mensagens já recebidas pelo webhook (deduplicação entre workers)"""
+    key: str = Field(primary_key=True)
+    response: Optional[str] = None  # JSON da resposta enviada
+    created_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+
+
 # SQLModel lida com as referências circulares automaticamente
 SQLModel.update_forward_refs()
@@ -0,0 +1,209 @@
+"""
+    Métricas dos pools de conexão.
+
+Para cada engine: histograma do tempo de espera no checkout, tempo com a
+conexão em uso, tempo de vida das conexões, timeouts e os contadores do
+pool (em uso, overflow). Conexões presas por mais de POOL_LONG_HOLD_SECONDS
+são atribuídas a quem as segurava: a rota HTTP (HolderMiddleware, pelo
+modelo da rota, ex. "GET /goals/{goal_id}") ou o job (holding("job:...")).
+
+Exposto em GET /internal/pool (app.routes.internal).
+"""
+import functools
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Sequence
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from app.config import POOL_LONG_HOLD_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Nome (str) ou RouteHolder; convertido com str() no checkout
+current_holder: ContextVar[Any] = ContextVar("db_pool_holder", default="desconhecido")
+
+WAIT_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000, 5000, 30000)
+HOLD_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000, 5000, 30000)
+LIFETIME_BUCKETS_S = (1, 10, 60, 300, 1800, 3600)
+
+# Métricas por nome do engine ("sync", "async", "async-replica"...)
+registry: Dict[str, "PoolMetrics"] = {}
+
+
+@contextmanager
+def holding(name: str):
+    """Atribui as conexões usadas no bloco a um job ou tarefa"""
+    token = current_holder.set(name)
+    try:
+        yield
+    finally:
+        current_holder.reset(token)
+
+
+def held_by(name: str):
+    """Decorator de holding() para jobs assíncronos"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with holding(name):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class RouteHolder:
+    """Nome da rota da requisição, resolvido depois do roteamento.
+
+    Usa o modelo da rota ("/goals/{goal_id}") e não o caminho, para que
+    long_holds tenha uma chave por rota e não uma por id.
+    """
+
+    __slots__ = ("scope",)
+
+    def __init__(self, scope):
+        self.scope = scope
+
+    def __str__(self) -> str:
+        route = self.scope.get("route")
+        return f"{self.scope['method']} {getattr(route, 'path', None) or '<sem rota>'}"
+
+
+class HolderMiddleware:
+    """Middleware ASGI: conexões usadas na requisição ficam em nome da rota"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        with holding(RouteHolder(scope)):
+            await self.app(scope, receive, send)
+
+
+class Histogram:
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        index = next((i for i, bound in enumerate(self.bounds) if value <= bound), len(self.bounds))
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def snapshot(self) -> Dict:
+        labels = [f"<={b:g}" for b in self.bounds] + ["+inf"]
+        return {
+            "count": self.count,
+            "avg": round(self.sum / self.count, 3) if self.count else 0.0,
+            "max": round(self.max, 3),
+            "buckets": dict(zip(labels, self.counts)),
+        }
+
+
+class PoolMetrics:
+    def __init__(self, name: str, long_hold: float = POOL_LONG_HOLD_SECONDS, clock: Callable[[], float] = time.perf_counter):
+        self.name = name
+        self.long_hold = long_hold
+        self.clock = clock
+        self.wait_ms = Histogram(WAIT_BUCKETS_MS)
+        self.hold_ms = Histogram(HOLD_BUCKETS_MS)
+        self.lifetime_s = Histogram(LIFETIME_BUCKETS_S)
+        self.timeouts = 0
+        self.long_holds = Counter()
+        self._held: Dict[int, tuple] = {}
+        self.pool = None
+
+    def _wrap_pool(self, pool):
+        """Mede a espera em _do_get (não há evento antes do checkout)"""
+        do_get = pool._do_get
+
+        def timed_do_get():
+            started = self.clock()
+            try:
+                return do_get()
+            except PoolTimeoutError:
+                self.timeouts += 1
+                logger.warning("⏳ Timeout no pool %s (%s)", self.name, current_holder.get())
+                raise
+            finally:
+                self.wait_ms.observe((self.clock() - started) * 1000)
+
+        pool._do_get = timed_do_get
+        self.pool = pool
+
+    def install(self, engine):
+        sync_engine = getattr(engine, "sync_engine", engine)
+        self._wrap_pool(sync_engine.pool)
+
+        @event.listens_for(sync_engine, "engine_disposed")
+        def _disposed(conn):
+            # dispose() recria o pool
+            self._wrap_pool(sync_engine.pool)
+
+        @event.listens_for(sync_engine, "connect")
+        def _connect(dbapi_connection, record):
+            record.info["connected_at"] = self.clock()
+
+        @event.listens_for(sync_engine, "close")
+        def _close(dbapi_connection, record):
+            connected_at = record.info.pop("connected_at", None)
+            if connected_at is not None:
+                self.lifetime_s.observe(self.clock() - connected_at)
+
+        @event.listens_for(sync_engine, "checkout")
+        def _checkout(dbapi_connection, record, proxy):
+            self._held[id(record)] = (str(current_holder.get()), self.clock())
+
+        @event.listens_for(sync_engine, "checkin")
+        def _checkin(dbapi_connection, record):
+            held = self._held.pop(id(record), None)
+            if held is None:
+                return
+            holder, started = held
+            seconds = self.clock() - started
+            self.hold_ms.observe(seconds * 1000)
+            if seconds > self.long_hold:
+                self.long_holds[holder] += 1
+                logger.warning("🐢 Conexão do pool %s presa por %.1fs: %s", self.name, seconds, holder)
+
+        registry[self.name] = self
+        return self
+
+    def held(self, limit: int = 10) -> List[Dict]:
+        """Conexões em uso agora, das mais antigas para as mais novas"""
+        now = self.clock()
+        rows = sorted(self._held.copy().values(), key=lambda held: held[1])[:limit]
+        return [{"holder": holder, "seconds": round(now - started, 3)} for holder, started in rows]
+
+    def snapshot(self) -> Dict:
+        pool = self.pool
+        gauges = {
+            gauge: getattr(pool, gauge)()
+            for gauge in ("size", "checkedout", "checkedin", "overflow")
+            if hasattr(pool, gauge)
+        }
+        return {
+            "pool": type(pool).__name__,
+            **gauges,
+            "timeouts": self.timeouts,
+            "wait_ms": self.wait_ms.snapshot(),
+            "hold_ms": self.hold_ms.snapshot(),
+            "lifetime_s": self.lifetime_s.snapshot(),
+            "long_holds": dict(self.long_holds.most_common(10)),
+            "held": self.held(),
+        }
+
+
+def snapshot() -> Dict[str, Dict]:
+    return {name: metrics.snapshot() for name, metrics in registry.items()}
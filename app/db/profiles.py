@@ -0,0 +1,165 @@
+"""
+    Perfis de engine por tipo de conexão com o Postgres.
+
+- direct: conexão direta ao banco (porta 5432 do host do banco).
+- session-pooler: pooler em modo sessão (ex.: Supavisor na porta 5432).
+- transaction-pooler: pooler em modo transação (Supavisor/pgbouncer, porta
+  6543). A conexão do servidor muda a cada transação, então prepared
+  statements nomeados do asyncpg quebram: o cache fica desligado.
+
+Nenhum perfil usa pool_pre_ping (um SELECT 1 a cada checkout). A checagem
+de conexão só roda quando a conexão ficou parada no pool por mais de
+liveness_idle segundos; se falhar, o pool descarta a conexão e abre outra.
+
+O perfil é detectado pela URL ou forçado com DB_ENGINE_PROFILE.
+"""
+import logging
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+from urllib.parse import urlsplit
+from uuid import uuid4
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import DisconnectionError
+
+from app.config import DB_ENGINE_PROFILE
+from app.db.pool_metrics import PoolMetrics
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class EngineProfile:
+    name: str
+    pool_size: int
+    max_overflow: int
+    pool_recycle: int  # segundos; -1 desliga
+    liveness_idle: Optional[float]  # segundos parada no pool antes de checar; None desliga
+    prepared_statements: bool  # cache de prepared statements no servidor (asyncpg)
+
+
+PROFILES: Dict[str, EngineProfile] = {
+    "direct": EngineProfile("direct", pool_size=5, max_overflow=10, pool_recycle=1800, liveness_idle=300, prepared_statements=True),
+    # O pooler limita conexões por cliente: pool menor, e ele fecha as ociosas antes
+    "session-pooler": EngineProfile("session-pooler", pool_size=5, max_overflow=5, pool_recycle=600, liveness_idle=60, prepared_statements=True),
+    # Conexões com o pooler são baratas para o banco: pool maior, sem prepared statements
+    "transaction-pooler": EngineProfile("transaction-pooler", pool_size=10, max_overflow=20, pool_recycle=600, liveness_idle=30, prepared_statements=False),
+    # SQLite local: pool padrão, sem rede
+    "sqlite": EngineProfile("sqlite", pool_size=0, max_overflow=0, pool_recycle=-1, liveness_idle=None, prepared_statements=True),
+}
+
+# Parâmetros de conexão do psycopg2 (TCP keepalive)
+PSYCOPG2_CONNECT_ARGS = {
+    "connect_timeout": 30,
+    "keepalives": 1,
+    "keepalives_idle": 30,
+    "keepalives_interval": 10,
+    "keepalives_count": 5,
+    "application_name": "pixzinho_bot",
+}
+
+
+def detect_profile(url: str) -> str:
+    """Perfil pela URL: porta 6543 = pooler em modo transação"""
+    if url.startswith("sqlite"):
+        return "sqlite"
+    parts = urlsplit(url)
+    if parts.port in (6543, 6432):
+        return "transaction-pooler"
+    if "pooler" in (parts.hostname or ""):
+        return "session-pooler"
+    return "direct"
+
+
+def get_profile(url: str, name: Optional[str] = None) -> EngineProfile:
+    if url.startswith("sqlite"):
+        return PROFILES["sqlite"]
+    name = name or DB_ENGINE_PROFILE or detect_profile(url)
+    if name not in PROFILES:
+        raise ValueError(f"Perfil de engine desconhecido: {name}")
+    return PROFILES[name]
+
+
+def engine_options(url: str, profile: EngineProfile) -> Dict:
+    """Argumentos de create_engine/create_async_engine para o perfil"""
+    if profile.name == "sqlite":
+        if url.startswith("sqlite+aiosqlite"):
+            return {}
+        return {"connect_args": {"check_same_thread": False}}
+
+    options = {
+        "pool_size": profile.pool_size,
+        "max_overflow": profile.max_overflow,
+        "pool_timeout": 30,
+        "pool_recycle": profile.pool_recycle,
+        "pool_pre_ping": False,
+    }
+    if "+asyncpg" in url:
+        connect_args = {"timeout": 30, "server_settings": {"application_name": "pixzinho_bot"}}
+        if not profile.prepared_statements:
+            connect_args.update(
+                statement_cache_size=0,
+                prepared_statement_cache_size=0,
+                # Nomes únicos: o servidor por trás do pooler pode já ter um com o mesmo nome
+                prepared_statement_name_func=lambda: f"__asyncpg_{uuid4()}__",
+            )
+        options["connect_args"] = connect_args
+    else:
+        options["connect_args"] = dict(PSYCOPG2_CONNECT_ARGS)
+    return options
+
+
+class LivenessCheck:
+    """Checa a conexão no checkout só se ela ficou parada mais que idle segundos"""
+
+    def __init__(self, idle: float, clock: Callable[[], float] = time.monotonic):
+        self.idle = idle
+        self.clock = clock
+        self.stats = Counter()
+
+    def install(self, engine):
+        sync_engine = getattr(engine, "sync_engine", engine)
+        dialect = sync_engine.dialect
+
+        @event.listens_for(sync_engine, "checkin")
+        def _checkin(dbapi_connection, record):
+            record.info["idle_since"] = self.clock()
+
+        @event.listens_for(sync_engine, "checkout")
+        def _checkout(dbapi_connection, record, proxy):
+            self.stats["checkouts"] += 1
+            idle_since = record.info.get("idle_since")
+            if idle_since is None or self.clock() - idle_since < self.idle:
+                return
+            self.stats["pings"] += 1
+            try:
+                alive = dialect.do_ping(dbapi_connection)
+            except Exception:
+                alive = False
+            if not alive:
+                self.stats["stale"] += 1
+                # O pool descarta esta conexão e tenta outra
+                raise DisconnectionError("Conexão inativa descartada")
+
+        sync_engine.liveness = self
+        return self
+
+
+def create_profiled_engine(url: str, profile: Optional[str] = None, name: Optional[str] = None, **kwargs):
+    """Cria o engine (síncrono ou asyncio, pela URL) com as opções do perfil;
+    com name, as métricas do pool ficam em app.db.pool_metrics.registry"""
+    selected = get_profile(url, profile)
+    options = {**engine_options(url, selected), **kwargs}
+    if "+asyncpg" in url or "+aiosqlite" in url:
+        from sqlalchemy.ext.asyncio import create_async_engine
+        engine = create_async_engine(url, **options)
+    else:
+        engine = create_engine(url, **options)
+    if selected.liveness_idle is not None:
+        LivenessCheck(selected.liveness_idle).install(engine)
+    if name:
+        PoolMetrics(name).install(engine)
+    logger.info("Engine com perfil %s", selected.name)
+    return engine
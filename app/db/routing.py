@@ -0,0 +1,102 @@
+"""
+    Roteamento de leituras para a réplica.
+
+Leituras de relatórios, exportações, listagens e varreduras do agendador
+podem ir para uma réplica de leitura (DATABASE_REPLICA_URL), tirando carga
+do banco principal. Escritas continuam sempre no principal.
+
+Para o usuário ver o que acabou de gravar (read-your-writes), cada commit
+marca os usuários afetados; durante DB_REPLICA_STICKY_SECONDS as leituras
+desses usuários ficam no principal. Os usuários são identificados pelo
+owner_id/user_id dos objetos gravados, ou marcados com note_write() quando
+a escrita é um INSERT/UPDATE direto.
+
+A marcação é por processo: com vários workers, o intervalo deve cobrir o
+atraso de replicação.
+"""
+import time
+from collections import Counter
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.config import DB_REPLICA_STICKY_SECONDS
+
+WRITES_KEY = "written_users"
+MAX_TRACKED_USERS = 10000
+
+
+class RecentWrites:
+    """Usuários com escrita recente (lidos do principal até o prazo)"""
+
+    def __init__(self, sticky_seconds: float = DB_REPLICA_STICKY_SECONDS, clock: Callable[[], float] = time.monotonic):
+        self.sticky_seconds = sticky_seconds
+        self.clock = clock
+        self._until: Dict[int, float] = {}
+
+    def mark(self, user_id: int):
+        now = self.clock()
+        if len(self._until) >= MAX_TRACKED_USERS:
+            self._until = {u: t for u, t in self._until.items() if t > now}
+        self._until[user_id] = now + self.sticky_seconds
+
+    def is_recent(self, user_id: Optional[int]) -> bool:
+        until = self._until.get(user_id)
+        return until is not None and until > self.clock()
+
+
+recent_writes = RecentWrites()
+
+
+def note_write(session, user_id: int):
+    """Marca uma escrita feita sem objetos do ORM (vale no commit)"""
+    info = session.sync_session.info if hasattr(session, "sync_session") else session.info
+    info.setdefault(WRITES_KEY, set()).add(user_id)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_writes(session, flush_context):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        user_id = getattr(obj, "owner_id", None) or getattr(obj, "user_id", None)
+        if isinstance(user_id, int):
+            session.info.setdefault(WRITES_KEY, set()).add(user_id)
+
+
+# Chamados com o id de cada usuário afetado após o commit (ex.: versão do cache)
+write_listeners: List[Callable[[int], None]] = []
+
+
+def on_user_write(listener: Callable[[int], None]):
+    write_listeners.append(listener)
+    return listener
+
+
+@event.listens_for(Session, "after_commit")
+def _mark_writes(session):
+    for user_id in session.info.pop(WRITES_KEY, ()):
+        recent_writes.mark(user_id)
+        for listener in write_listeners:
+            listener(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_writes(session):
+    session.info.pop(WRITES_KEY, None)
+
+
+class ReadRouter:
+    """Escolhe a fábrica de sessões de leitura: réplica ou principal"""
+
+    def __init__(self, primary, replica=None, writes: RecentWrites = recent_writes):
+        self.primary = primary
+        self.replica = replica
+        self.writes = writes
+        self.stats = Counter()
+
+    def sessionmaker_for(self, user_id: Optional[int] = None):
+        if self.replica is None or self.writes.is_recent(user_id):
+            self.stats["primary"] += 1
+            return self.primary
+        self.stats["replica"] += 1
+        return self.replica
@@ -2,15 +2,22 @@
     Esse código é responsável a criar e gerenciar
 o banco de dados utilizando sqlalchemy.
 
+O engine só é criado no primeiro uso e a inicialização do banco
+(create_all) é explícita, feita nos hooks de inicialização da aplicação.
+Importar este módulo não conecta ao banco.
+
 author: github.com/gustavosett
 """
 
 from contextlib import contextmanager
-from sqlalchemy import create_engine
+from functools import lru_cache
+from typing import Optional
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker, Session
 from sqlmodel import SQLModel
 from decouple import config
-import urllib.parse
+from app.db.profiles import create_profiled_engine
+from app.db.routing import ReadRouter
 import logging
 from sqlalchemy.sql import text
 import time
@@ -28,75 +35,103 @@ def log_environment():
     logger.info(f"PORT: {os.getenv('PORT', 'não definido')}")
     logger.info("="*50)
 
-# No início do arquivo, após os imports
-log_environment()
-logger.info("URL original do banco: %s", config('DATABASE_URL'))
-
-# Ajusta a URL do banco para usar SSL
-DATABASE_URL = config('DATABASE_URL')
-
-# Log da URL (mascarada)
-masked_url = DATABASE_URL.replace(DATABASE_URL.split('@')[0], '***:***')
-logger.info("URL do banco (mascarada): %s", masked_url)
-
-# Cria engine com configurações para pooler
-engine = create_engine(
-    DATABASE_URL,
-    pool_size=5,
-    max_overflow=10,
-    pool_timeout=30,
-    pool_pre_ping=True,
-    connect_args={
-        "connect_timeout": 30,
-        "keepalives": 1,
-        "keepalives_idle": 30,
-        "keepalives_interval": 10,
-        "keepalives_count": 5,
-        "application_name": "pixzinho_bot"
-    }
-)
-
-# Cria sessão
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def mask_url(url: str) -> str:
+    return url.replace(url.split('@')[0], '***:***') if '@' in url else url
+
+def create_db_engine(database_url: str, name: Optional[str] = None) -> Engine:
+    """Engine com o perfil da URL (direct, session-pooler, transaction-pooler)"""
+    return create_profiled_engine(database_url, name=name)
+
+@lru_cache(maxsize=None)
+def get_engine() -> Engine:
+    """Cria o engine no primeiro uso"""
+    database_url = config('DATABASE_URL')
+    logger.info("URL do banco (mascarada): %s", mask_url(database_url))
+    return create_db_engine(database_url, name="sync")
+
+@lru_cache(maxsize=None)
+def get_replica_engine() -> Optional[Engine]:
+    """Engine da réplica de leitura (DATABASE_REPLICA_URL), se configurada"""
+    replica_url = config('DATABASE_REPLICA_URL', default='')
+    if not replica_url:
+        return None
+    logger.info("URL da réplica (mascarada): %s", mask_url(replica_url))
+    return create_db_engine(replica_url, name="sync-replica")
+
+@lru_cache(maxsize=None)
+def get_sessionmaker() -> sessionmaker:
+    return sessionmaker(autocommit=False, autoflush=False, bind=get_engine())
+
+@lru_cache(maxsize=None)
+def get_read_router() -> ReadRouter:
+    replica = get_replica_engine()
+    return ReadRouter(
+        get_sessionmaker(),
+        sessionmaker(autocommit=False, autoflush=False, bind=replica) if replica else None,
+    )
+
+def __getattr__(name):
+    # Compatibilidade com "from app.db.session import engine, SessionLocal"
+    if name == "engine":
+        return get_engine()
+    if name == "SessionLocal":
+        return get_sessionmaker()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def get_session():
-    return Session(engine)
+    return Session(get_engine())
+
+def wait_for_db(timeout: float = 30, interval: float = 0.5):
+    """Espera o banco aceitar conexões (no lugar de um sleep fixo)"""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            with get_engine().connect() as conn:
+                conn.execute(text("SELECT 1"))
+            return
+        except Exception as e:
+            if time.monotonic() >= deadline:
+                raise
+            logger.warning(f"Banco indisponível, tentando novamente: {e}")
+            time.sleep(interval)
 
 def initialize_db():
     """Inicializa o banco de dados"""
     try:
+        log_environment()
+
         # Importa todos os modelos
         from app.db.models import User, Account, Category, Transaction, Bill, Goal
-        
+
+        engine = get_engine()
+
         # Cria todas as tabelas
         SQLModel.metadata.create_all(engine)
-        
+
         # Testa a conexão
         with engine.connect() as conn:
             conn.execute(text("SELECT 1"))
             logger.info("Conexão com banco estabelecida com sucesso")
-            
-            # Lista tabelas criadas
-            result = conn.execute(text("""
-                SELECT table_name 
-                FROM information_schema.tables 
-                WHERE table_schema = 'public'
-            """))
-            tables = [row[0] for row in result]
-            logger.info(f"Tabelas existentes: {tables}")
-            
+
+            if engine.dialect.name == "postgresql":
+                # Lista tabelas criadas
+                result = conn.execute(text("""
+                    SELECT table_name
+                    FROM information_schema.tables
+                    WHERE table_schema = 'public'
+                """))
+                tables = [row[0] for row in result]
+                logger.info(f"Tabelas existentes: {tables}")
+
         logger.info("Banco de dados inicializado com sucesso!")
-        
+
     except Exception as e:
         logger.error(f"Erro ao inicializar banco: {str(e)}")
         raise e
 
-# Inicializa o banco
-initialize_db()
-
 def get_db():
     """Retorna uma sessão do banco"""
-    db = SessionLocal()
+    db = get_sessionmaker()()
     try:
         yield db
     finally:
@@ -109,4 +144,13 @@ def get_db_context():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+@contextmanager
+def get_read_context(user_id: Optional[int] = None):
+    """Sessão só de leitura: réplica, ou o principal se o usuário gravou há pouco"""
+    db = get_read_router().sessionmaker_for(user_id)()
+    try:
+        yield db
+    finally:
+        db.close()
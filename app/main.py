@@ -2,36 +2,73 @@
     Esse código é o módulo principal do projeto, responsável por iniciar
 todas funcionalidades do sistema.
 
+A importação não tem efeitos colaterais: logging, banco de dados e
+clientes externos são inicializados no lifespan. /ready responde 503 até a
+inicialização terminar.
 """
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import RedirectResponse
+from fastapi.responses import JSONResponse, RedirectResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 import logging
 import os
 from app.database import init_db
+from app.config import WEBHOOK_MODE, LOG_LEVEL, LOG_FORMAT, LOG_ASYNC, LOG_SAMPLING, QR_FORMAT
+from app.services.images import check_raster_format
+from app.services.logs import setup_logging
+from app.db.pool_metrics import HolderMiddleware
 
-# Configura logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
 # Configura diretórios
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 TEMPLATES_DIR = os.path.join(BASE_DIR, "templates")
+STATIC_DIR = os.path.join(BASE_DIR, "static")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.ready = False
+    setup_logging(
+        level=LOG_LEVEL,
+        fmt=LOG_FORMAT,
+        use_queue=LOG_ASYNC,
+        sampling=LOG_SAMPLING,
+    )
+    try:
+        logger.info("🚀 Iniciando aplicação...")
+        logger.info(f"📁 Templates dir: {TEMPLATES_DIR}")
+        # Formato inválido (ex.: svg) falha na partida, não no primeiro PIX
+        check_raster_format(QR_FORMAT)
+        await init_db()
+        logger.info("✅ Banco de dados inicializado")
+        await whatsapp_service.startup()
+        if WEBHOOK_MODE == "queue":
+            await webhook_queue.start()
+    except Exception as e:
+        logger.error(f"❌ Erro na inicialização: {e}")
+        logger.exception(e)
+        raise
 
-# Cria diretório de templates se não existir
-os.makedirs(TEMPLATES_DIR, exist_ok=True)
+    app.state.ready = True
+    logger.info("🚀 Aplicação iniciada")
+    try:
+        yield
+    finally:
+        app.state.ready = False
+        await webhook_queue.stop()
+        await whatsapp_service.shutdown()
+        await chart_renderer.shutdown()
 
 # Cria aplicação FastAPI
 app = FastAPI(
     title="Bot WhatsApp",
     description="API para bot de WhatsApp com gestão financeira",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
+app.state.ready = False
 
 # Configuração CORS mais permissiva
 app.add_middleware(
@@ -42,9 +79,13 @@ app.add_middleware(
     allow_headers=["*"]
 )
 
+# Conexões do banco atribuídas à rota (métricas em /internal/pool)
+app.add_middleware(HolderMiddleware)
+
 # Configura templates
 templates = Jinja2Templates(directory=TEMPLATES_DIR)
-app.mount("/static", StaticFiles(directory=os.path.join(BASE_DIR, "static")), name="static")
+if os.path.isdir(STATIC_DIR):
+    app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
 
 # Rota raiz redirecionando para docs
 @app.get("/")
@@ -61,31 +102,26 @@ async def status():
     }
 
 # Importa e registra as rotas
-from app.routes.whatsapp import router as whatsapp_router
+from app.routes.whatsapp import router as whatsapp_router, webhook_queue
+from app.services.whatsapp import whatsapp_service
+from app.services.charts import chart_renderer
 logger.info("🔄 Registrando rotas WhatsApp")
 app.include_router(whatsapp_router, prefix="/whatsapp", tags=["whatsapp"])
 
+from app.routes.internal import router as internal_router
+app.include_router(internal_router)
+
 @app.get("/health")
 async def health():
     logger.info("💓 Verificação de saúde")
     return {"status": "healthy"}
 
-# Eventos
-@app.on_event("startup")
-async def startup():
-    try:
-        logger.info("🚀 Iniciando aplicação...")
-        logger.info(f"📁 Templates dir: {TEMPLATES_DIR}")
-        await init_db()
-        logger.info("✅ Banco de dados inicializado")
-    except Exception as e:
-        logger.error(f"❌ Erro na inicialização: {e}")
-        logger.exception(e)
-        raise
-
-# Log de inicialização
-logger.info("🚀 Aplicação iniciada")
-logger.info(f"📁 Diretório de templates: {TEMPLATES_DIR}")
+@app.get("/ready")
+async def ready():
+    """Pronto para receber tráfego (banco e serviços inicializados)"""
+    if not app.state.ready:
+        return JSONResponse(status_code=503, content={"status": "starting"})
+    return {"status": "ready"}
 
 if __name__ == "__main__":
     import uvicorn
@@ -2,5 +2,8 @@ from .user import User
 from .transaction import Transaction
 from .goal import Goal
 from .reminder import Reminder
+from .balance import Balance
+from .budget import Budget
+from .rollup import MonthlyRollup
 
-__all__ = ["User", "Transaction", "Goal", "Reminder"] 
\ No newline at end of file
+__all__ = ["User", "Transaction", "Goal", "Reminder", "Balance", "Budget", "MonthlyRollup"] 
\ No newline at end of file
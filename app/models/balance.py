@@ -0,0 +1,9 @@
+from sqlmodel import SQLModel, Field
+from datetime import datetime
+from decimal import Decimal
+
+class Balance(SQLModel, table=True):
+    """Saldo mantido por usuário (atualizado junto com cada transação)"""
+    user_id: int = Field(foreign_key="user.id", primary_key=True)
+    amount: Decimal = Field(default=Decimal(0))
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
@@ -1,9 +1,13 @@
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field
 from typing import Optional
 from datetime import datetime
 from decimal import Decimal
 
 class Reminder(SQLModel, table=True):
+    # Lembretes ativos do usuário (get_reminders)
+    __table_args__ = (Index("ix_reminder_user_id_is_active", "user_id", "is_active"),)
+
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="user.id")
     description: str
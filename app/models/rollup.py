@@ -0,0 +1,14 @@
+from sqlmodel import SQLModel, Field
+from datetime import date
+from decimal import Decimal
+
+class MonthlyRollup(SQLModel, table=True):
+    """Soma e contagem de transações por usuário, mês, categoria e tipo"""
+    __tablename__ = "monthly_rollup"
+
+    user_id: int = Field(foreign_key="user.id", primary_key=True)
+    month: date = Field(primary_key=True)  # primeiro dia do mês
+    category: str = Field(primary_key=True)
+    type: str = Field(primary_key=True)  # "income" ou "expense"
+    total: Decimal = Field(default=Decimal(0))
+    count: int = Field(default=0)
@@ -1,3 +1,4 @@
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field
 from typing import Optional
 from datetime import datetime
@@ -5,6 +6,8 @@ from decimal import Decimal
 
 class Transaction(SQLModel, table=True):
     __tablename__ = "transactions"
+    # Extrato e orçamento: por usuário, ordenado/filtrado por data
+    __table_args__ = (Index("ix_transactions_user_id_date", "user_id", "date"),)
     
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="user.id")
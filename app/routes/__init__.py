@@ -1,14 +1,12 @@
 """
 Esse código adiciona todos routers para dentro de uma lista para que possa
 ser utilizado no main.py
-"""
-from fastapi import APIRouter
-from app.services.utils import LOGGER
 
+Os routers de auth, users e finance não estão registrados e são importados
+direto do submódulo quando necessário (app.routes.finance etc.), sem pesar
+na inicialização.
+"""
 from .whatsapp import router as whatsapp_router
-from .auth import router as auth_router
-from .users import router as user_router
-from .finance import router as finance_router
 
 # Lista de routers para registrar
 routers = [
@@ -3,9 +3,10 @@ from typing import Any
 
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlmodel import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
 
-from app.db.session import get_db
+from app.database import get_async_db
 from app.db.models import User, Token
 from app.services.security import (
     create_access_token,
@@ -17,14 +18,15 @@ from app.services.config import ACCESS_TOKEN_EXPIRE_MINUTES
 router = APIRouter(tags=["auth"])
 
 @router.post("/login", response_model=Token)
-def login(
-    db: Session = Depends(get_db),
+async def login(
+    db: AsyncSession = Depends(get_async_db),
     form_data: OAuth2PasswordRequestForm = Depends()
 ) -> Any:
     """
     Login OAuth2 com username e password.
     """
-    user = db.query(User).filter(User.email == form_data.username).first()
+    result = await db.execute(select(User).where(User.email == form_data.username))
+    user = result.scalars().first()
     if not user or not verify_password(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=400, detail="Email ou senha incorretos"
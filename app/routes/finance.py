@@ -1,68 +1,124 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session, select
-from typing import List
+from fastapi import APIRouter, Depends, File, HTTPException, Request, UploadFile
+from fastapi.responses import Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import raiseload, selectinload
+from sqlmodel import select
+from typing import AsyncIterator, List, Optional
 from datetime import datetime, timedelta
+import csv
+import io
 
-from app.db.session import get_db
+from app.config import CHART_FORMAT
+from app.database import get_async_db, get_read_session
 from app.db.models import (
-    User, 
-    Account, 
+    User,
+    Account,
     AccountBase,
-    Transaction, 
+    Transaction,
     TransactionBase,
-    Bill, 
+    Bill,
     BillBase,
     Category,
     CategoryBase,
     Goal
 )
 from app.services.security import get_current_user
+from app.services.charts import ChartService
+from app.services.images import MEDIA_TYPES, etag, etag_matches
+from app.services.rollups import api_rollup
+from app.services.importer import FORMATS, TransactionImporter
+from app.services.pagination import NEXT_CURSOR_HEADER, InvalidCursor, make_page, page_size, paginate
 
 router = APIRouter(prefix="/finance", tags=["finance"])
 
+async def get_read_db(current_user: User = Depends(get_current_user)) -> AsyncIterator[AsyncSession]:
+    """Sessão de leitura (réplica, salvo escrita recente do usuário)"""
+    async with get_read_session(current_user.id) as session:
+        yield session
+
+async def fetch_page(db: AsyncSession, query, columns, cursor: Optional[str], limit: Optional[int], response: Response, descending: bool = True):
+    """Executa a listagem paginada; o cursor da próxima página vai no cabeçalho X-Next-Cursor"""
+    size = page_size(limit)
+    try:
+        query = paginate(query, columns, cursor, size, descending)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    result = await db.execute(query)
+    page = make_page(result.scalars().all(), columns, size)
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    return page.items
+
 # Rotas de Contas
 @router.post("/accounts/")
-def create_account(
+async def create_account(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
     account: AccountBase
 ):
     """Criar nova conta"""
     db_account = Account(**account.dict(), owner_id=current_user.id)
     db.add(db_account)
-    db.commit()
-    db.refresh(db_account)
+    await db.commit()
+    await db.refresh(db_account)
     return db_account
 
 @router.get("/accounts/", response_model=List[Account])
-def get_accounts(
-    db: Session = Depends(get_db),
+async def get_accounts(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Listar todas as contas do usuário"""
-    return db.query(Account).filter(Account.owner_id == current_user.id).all()
+    """Listar as contas do usuário (paginado)"""
+    query = (
+        select(Account)
+        .where(Account.owner_id == current_user.id)
+        .options(raiseload("*"))
+    )
+    return await fetch_page(db, query, (Account.id,), cursor, limit, response, descending=False)
 
 # Rotas de Transações
+@router.get("/transactions/", response_model=List[Transaction])
+async def get_transactions(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Listar transações, das mais recentes para as mais antigas (paginado)"""
+    query = (
+        select(Transaction)
+        .where(Transaction.owner_id == current_user.id)
+        .options(raiseload("*"))
+    )
+    return await fetch_page(db, query, (Transaction.date, Transaction.id), cursor, limit, response)
+
 @router.post("/transactions/")
-def create_transaction(
+async def create_transaction(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
     transaction: TransactionBase
 ):
     """Criar nova transação"""
     # Verifica se a conta existe e pertence ao usuário
-    account = db.query(Account).filter(
-        Account.id == transaction.account_id,
-        Account.owner_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(Account).where(
+            Account.id == transaction.account_id,
+            Account.owner_id == current_user.id
+        )
+    )
+    account = result.scalars().first()
     if not account:
         raise HTTPException(status_code=404, detail="Conta não encontrada")
 
     # Verifica se a categoria existe (se fornecida)
     if transaction.category_id:
-        category = db.query(Category).filter(Category.id == transaction.category_id).first()
+        category = await db.get(Category, transaction.category_id)
         if not category:
             raise HTTPException(status_code=404, detail="Categoria não encontrada")
 
@@ -71,78 +127,153 @@ def create_transaction(
         **transaction.dict(),
         owner_id=current_user.id
     )
-    
+
     # Atualiza o saldo da conta
     if transaction.type == "income":
         account.balance += transaction.amount
     else:
         account.balance -= transaction.amount
-    
+
     db.add(db_transaction)
-    db.commit()
-    db.refresh(db_transaction)
-    
+    await api_rollup().apply_async(db, db_transaction)
+    await db.commit()
+    await db.refresh(db_transaction)
+
     return db_transaction
 
 # Rotas de Contas a Pagar
 @router.post("/bills/")
-def create_bill(
+async def create_bill(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
     bill: BillBase
 ):
     """Criar nova conta a pagar"""
     db_bill = Bill(**bill.dict(), owner_id=current_user.id)
     db.add(db_bill)
-    db.commit()
-    db.refresh(db_bill)
+    await db.commit()
+    await db.refresh(db_bill)
     return db_bill
 
 @router.get("/bills/pending")
-def get_pending_bills(
-    db: Session = Depends(get_db),
+async def get_pending_bills(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Listar contas a pagar pendentes"""
-    return db.query(Bill).filter(
-        Bill.owner_id == current_user.id,
-        Bill.is_paid == False
-    ).all()
+    """Listar contas a pagar pendentes, por vencimento (paginado)"""
+    query = (
+        select(Bill)
+        .where(
+            Bill.owner_id == current_user.id,
+            Bill.is_paid == False
+        )
+        .options(raiseload("*"))
+    )
+    return await fetch_page(db, query, (Bill.due_date, Bill.id), cursor, limit, response, descending=False)
+
+def create_csv(transactions: List[Transaction], delimiter: str = ",", encoding: str = "utf-8") -> Response:
+    """Monta o CSV de transações (categoria já carregada)"""
+    output = io.StringIO()
+    writer = csv.writer(output, delimiter=delimiter)
+    writer.writerow(["id", "data", "tipo", "descricao", "valor", "conta", "categoria"])
+    for t in transactions:
+        writer.writerow([
+            t.id,
+            t.date.isoformat(),
+            t.type,
+            t.description,
+            f"{t.amount:.2f}",
+            t.account_id,
+            t.category.name if t.category else "",
+        ])
+    return Response(
+        content=output.getvalue().encode(encoding),
+        media_type="text/csv",
+        headers={"Content-Disposition": "attachment; filename=transacoes.csv"},
+    )
+
+def image_response(request: Request, data: bytes, fmt: str) -> Response:
+    """Imagem com ETag pelo conteúdo; If-None-Match igual responde 304"""
+    tag = etag(data)
+    headers = {"ETag": tag, "Cache-Control": "private, max-age=0, must-revalidate"}
+    if etag_matches(request.headers.get("if-none-match", ""), tag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=data, media_type=MEDIA_TYPES[fmt], headers=headers)
+
+def create_excel(transactions: List[Transaction]) -> Response:
+    """CSV no formato que o Excel em pt-BR abre direto (';' e BOM)"""
+    return create_csv(transactions, delimiter=";", encoding="utf-8-sig")
 
 @router.get("/export/transactions")
 async def export_transactions(
     start_date: datetime,
     end_date: datetime,
     format: str = "csv",
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Exporta transações em CSV ou Excel"""
-    transactions = db.query(Transaction).join(Account).filter(
-        Account.owner_id == current_user.id,
-        Transaction.date.between(start_date, end_date)
-    ).all()
-    
+    result = await db.execute(
+        select(Transaction)
+        .where(
+            Transaction.owner_id == current_user.id,
+            Transaction.date.between(start_date, end_date)
+        )
+        .options(selectinload(Transaction.category), raiseload("*"))
+    )
+    transactions = result.scalars().all()
+
     if format == "csv":
         return create_csv(transactions)
     elif format == "excel":
         return create_excel(transactions)
+    raise HTTPException(status_code=400, detail="Formato não suportado")
+
+@router.post("/import/transactions")
+async def import_transactions(
+    account_id: int,
+    format: str = "csv",
+    file: UploadFile = File(...),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Importa transações de um arquivo CSV ou OFX para a conta"""
+    if format not in FORMATS:
+        raise HTTPException(status_code=400, detail="Formato não suportado")
+    result = await db.execute(
+        select(Account.id).where(
+            Account.id == account_id,
+            Account.owner_id == current_user.id
+        )
+    )
+    if result.first() is None:
+        raise HTTPException(status_code=404, detail="Conta não encontrada")
+
+    importer = TransactionImporter(db, current_user.id, account_id)
+    try:
+        return await importer.run(file.file, format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 # Rotas de Categorias
 @router.post("/categories/")
-def create_category(
+async def create_category(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
     category: CategoryBase
 ):
     """Criar nova categoria"""
     # Verifica se já existe
-    existing = db.query(Category).filter(Category.name == category.name).first()
+    result = await db.execute(select(Category).where(Category.name == category.name))
+    existing = result.scalars().first()
     if existing:
         return existing
-        
+
     # Cria nova categoria
     db_category = Category(
         name=category.name,
@@ -151,35 +282,36 @@ def create_category(
         description=category.description
     )
     db.add(db_category)
-    db.commit()
-    db.refresh(db_category)
+    await db.commit()
+    await db.refresh(db_category)
     return db_category
 
 @router.get("/categories/", response_model=List[Category])
-def get_categories(
-    db: Session = Depends(get_db),
+async def get_categories(
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Listar todas as categorias"""
-    return db.query(Category).all()
+    result = await db.execute(select(Category).options(raiseload("*")))
+    return result.scalars().all()
 
 @router.get("/categories/{category_id}", response_model=Category)
-def get_category(
+async def get_category(
     category_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Obter categoria por ID"""
-    category = db.query(Category).filter(Category.id == category_id).first()
+    category = await db.get(Category, category_id)
     if not category:
         raise HTTPException(status_code=404, detail="Categoria não encontrada")
     return category
 
 # Rotas de Metas
 @router.post("/goals/")
-def create_goal(
+async def create_goal(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
     goal: Goal
 ):
@@ -192,49 +324,71 @@ def create_goal(
         owner_id=current_user.id
     )
     db.add(db_goal)
-    db.commit()
-    db.refresh(db_goal)
+    await db.commit()
+    await db.refresh(db_goal)
     return db_goal
 
 @router.get("/goals/", response_model=List[Goal])
-def get_goals(
-    db: Session = Depends(get_db),
+async def get_goals(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Listar todas as metas do usuário"""
-    return db.query(Goal).filter(Goal.owner_id == current_user.id).all()
+    """Listar as metas do usuário (paginado)"""
+    query = (
+        select(Goal)
+        .where(Goal.owner_id == current_user.id)
+        .options(raiseload("*"))
+    )
+    return await fetch_page(db, query, (Goal.id,), cursor, limit, response, descending=False)
+
+async def get_user_goal(db: AsyncSession, goal_id: int, user: User) -> Goal:
+    result = await db.execute(
+        select(Goal).where(
+            Goal.id == goal_id,
+            Goal.owner_id == user.id
+        )
+    )
+    goal = result.scalars().first()
+    if not goal:
+        raise HTTPException(status_code=404, detail="Meta não encontrada")
+    return goal
 
 @router.get("/goals/{goal_id}", response_model=Goal)
-def get_goal(
+async def get_goal(
     goal_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Obter meta por ID"""
-    goal = db.query(Goal).filter(
-        Goal.id == goal_id,
-        Goal.owner_id == current_user.id
-    ).first()
-    if not goal:
-        raise HTTPException(status_code=404, detail="Meta não encontrada")
-    return goal
+    return await get_user_goal(db, goal_id, current_user)
+
+@router.get("/goals/{goal_id}/chart")
+async def get_goal_chart(
+    goal_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Gráfico de progresso da meta (imagem, com ETag)"""
+    goal = await get_user_goal(db, goal_id, current_user)
+    if goal.target_amount <= 0:
+        raise HTTPException(status_code=400, detail="Meta sem valor alvo")
+    data = await ChartService.render_savings_progress(goal.target_amount, goal.current_amount)
+    return image_response(request, data, CHART_FORMAT)
 
 @router.put("/goals/{goal_id}/update-amount")
-def update_goal_amount(
+async def update_goal_amount(
     goal_id: int,
     amount: float,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Atualizar valor atual da meta"""
-    goal = db.query(Goal).filter(
-        Goal.id == goal_id,
-        Goal.owner_id == current_user.id
-    ).first()
-    if not goal:
-        raise HTTPException(status_code=404, detail="Meta não encontrada")
-        
+    goal = await get_user_goal(db, goal_id, current_user)
     goal.current_amount = amount
-    db.commit()
-    db.refresh(goal)
-    return goal 
\ No newline at end of file
+    await db.commit()
+    await db.refresh(goal)
+    return goal
@@ -0,0 +1,38 @@
+"""
+    Rotas internas de diagnóstico.
+
+Exigem o cabeçalho X-Internal-Token com o valor de INTERNAL_API_TOKEN. Sem
+token configurado, respondem 404, como se não existissem.
+"""
+import hmac
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+
+from app.config import INTERNAL_API_TOKEN
+from app.db import pool_metrics
+from app.services.analytics_cache import analytics_cache
+from app.services.charts import chart_renderer
+
+def require_internal_token(x_internal_token: Optional[str] = Header(default=None)):
+    if not INTERNAL_API_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not hmac.compare_digest(x_internal_token or "", INTERNAL_API_TOKEN):
+        raise HTTPException(status_code=403, detail="Acesso negado")
+
+router = APIRouter(prefix="/internal", tags=["internal"], dependencies=[Depends(require_internal_token)])
+
+@router.get("/pool")
+async def pool_status():
+    """Métricas dos pools de conexão (espera, uso, timeouts, conexões presas)"""
+    return pool_metrics.snapshot()
+
+@router.get("/cache")
+async def cache_status():
+    """Taxa de acerto e ocupação do cache de análises"""
+    return analytics_cache.stats()
+
+@router.get("/charts")
+async def charts_status():
+    """Pool de gráficos: renderizações, timeouts e cache"""
+    return chart_renderer.stats()
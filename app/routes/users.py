@@ -1,19 +1,21 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
 
-from app.db.session import get_db
+from app.database import get_async_db
 from app.db.models import User, UserCreate, UserOut
 from app.services.security import get_password_hash, get_current_user
 
 router = APIRouter(prefix="/users", tags=["users"])
 
 @router.post("/", response_model=UserOut)
-def create_user(*, db: Session = Depends(get_db), user_in: UserCreate):
+async def create_user(*, db: AsyncSession = Depends(get_async_db), user_in: UserCreate):
     """
     Criar novo usuário.
     """
     # Verifica se já existe usuário com este email
-    user = db.query(User).filter(User.email == user_in.email).first()
+    result = await db.execute(select(User).where(User.email == user_in.email))
+    user = result.scalars().first()
     if user:
         raise HTTPException(
             status_code=400,
@@ -28,13 +30,12 @@ def create_user(*, db: Session = Depends(get_db), user_in: UserCreate):
         is_active=True,
     )
     db.add(db_obj)
-    db.commit()
-    db.refresh(db_obj)
+    await db.commit()
+    await db.refresh(db_obj)
     return db_obj
 
 @router.get("/me", response_model=UserOut)
-def read_user_me(
-    db: Session = Depends(get_db),
+async def read_user_me(
     current_user: User = Depends(get_current_user),
 ):
     """
@@ -1,19 +1,45 @@
 from fastapi import APIRouter, Depends, HTTPException, Request
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse
 from fastapi.templating import Jinja2Templates
-from sqlmodel import Session
 from typing import Dict, Optional
 from pydantic import BaseModel
 import logging
 import os
 
-from app.db.session import get_db
+from app.routes.internal import require_internal_token
 from app.services.whatsapp import whatsapp_service, WhatsAppService
-from app.config import WHATSAPP_NUMBER
+from app.services.webhook_queue import WebhookQueue
+from app.services.dedup import PENDING, create_deduplicator
+from app.config import (
+    WHATSAPP_NUMBER,
+    WEBHOOK_MODE,
+    WEBHOOK_QUEUE_SIZE,
+    WEBHOOK_WORKERS,
+    WEBHOOK_DEDUP_BACKEND,
+    WEBHOOK_DEDUP_TTL,
+    WEBHOOK_DEDUP_MAXSIZE,
+)
 
 router = APIRouter(tags=["whatsapp"])
 logger = logging.getLogger(__name__)
-whatsapp_service = WhatsAppService()
+
+
+async def handle_queued_message(message: Dict):
+    """Processa uma mensagem retirada da fila e envia a resposta"""
+    response = await whatsapp_service.process_message(message["text"], message["from"])
+    if response:
+        await whatsapp_service.send_message(message["from"], response)
+
+
+webhook_queue = WebhookQueue(
+    handle_queued_message,
+    maxsize=WEBHOOK_QUEUE_SIZE,
+    workers=WEBHOOK_WORKERS,
+)
+
+webhook_dedup = create_deduplicator(
+    WEBHOOK_DEDUP_BACKEND, WEBHOOK_DEDUP_MAXSIZE, WEBHOOK_DEDUP_TTL
+)
 
 # Configura templates
 templates = Jinja2Templates(directory=os.path.join(os.path.dirname(os.path.dirname(__file__)), "templates"))
@@ -28,40 +54,72 @@ class WebhookRequest(BaseModel):
 @router.post("/webhook")  # Rota para receber mensagens do WhatsApp
 async def webhook(request: WebhookRequest):
     try:
-        logger.info("\n📨 Webhook recebido:")
-        logger.info(f"Mensagem: {request.message}")
-        
         # Extrai dados
         text = request.message.get("text", "")
         from_number = request.message.get("from", "")
-        
-        logger.info(f"De: {from_number}")
-        logger.info(f"Texto: {text}")
+
+        logger.info("📨 Webhook recebido", extra={"from_number": from_number})
+        logger.debug("Mensagem: %s", request.message)
         
         if not text or not from_number:
             logger.error("❌ Mensagem inválida - campos faltando")
             raise HTTPException(status_code=400, detail="Mensagem inválida")
-            
-        # Processa a mensagem
-        response = whatsapp_service.process_message(text)
-        
-        logger.info("\n✅ Mensagem processada:")
-        logger.info(f"Resposta: {response}")
-        
+
+        # Reenvios do servidor Node.js recebem a resposta já calculada
+        dedup_key, cached = await webhook_dedup.claim(request.message)
+        if cached is PENDING:
+            return JSONResponse(status_code=202, content={"status": "processing"})
+        if cached is not None:
+            logger.info("♻️ Mensagem repetida, usando resposta anterior")
+            return JSONResponse(status_code=cached.status_code, content=cached.body)
+
+        try:
+            # Modo fila: responde imediatamente e processa nos workers
+            if WEBHOOK_MODE == "queue":
+                if not webhook_queue.submit({"text": text, "from": from_number}):
+                    await webhook_dedup.release(dedup_key)
+                    return JSONResponse(
+                        status_code=503,
+                        content={"status": "busy"},
+                        headers={"Retry-After": "1"},
+                    )
+                body = {"status": "queued"}
+                await webhook_dedup.complete(dedup_key, body, status_code=202)
+                return JSONResponse(status_code=202, content=body)
+
+            # Processa a mensagem
+            response = await whatsapp_service.process_message(text, from_number)
+        except Exception:
+            await webhook_dedup.release(dedup_key)
+            raise
+
+        logger.debug("✅ Resposta: %s", response)
+
         # Retorna resposta
-        return {"message": response} if response else {"status": "success"}
+        body = {"message": response} if response else {"status": "success"}
+        await webhook_dedup.complete(dedup_key, body)
+        return body
         
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error("\n❌ Erro no webhook:")
-        logger.error(f"Erro: {str(e)}")
-        logger.exception(e)
+        logger.exception("❌ Erro no webhook: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/webhook/stats", dependencies=[Depends(require_internal_token)])
+async def webhook_stats():
+    """Métricas da fila do webhook (rota interna: exige X-Internal-Token)"""
+    return {
+        "mode": WEBHOOK_MODE,
+        **webhook_queue.stats(),
+        "dedup": webhook_dedup.stats(),
+    }
+
 @router.get("/qr")
 async def get_qr():
     """Obter QR code para conexão do WhatsApp"""
     try:
-        qr = whatsapp_service.get_qr_code()
+        qr = await whatsapp_service.get_qr_code()
         if qr:
             return {
                 "status": "success",
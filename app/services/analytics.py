@@ -1,28 +1,58 @@
-from datetime import datetime, timedelta
+from datetime import datetime, time
 from collections import defaultdict
-from typing import Dict, List
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Sequence
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from app.db.models import User, Account, Transaction, Category, Bill
+from sqlalchemy import and_, func, select
+from app.db.models import User, Account, Transaction, TransactionRollup, Category, Bill
+from app.services.rollups import month_of
+from app.services.buckets import STREAM_CHUNK, bucket_start, bucket_totals, check_unit, series, shift
+from app.services.analytics_cache import cached
+
+UNCATEGORIZED = "Sem categoria"
+
+
+@dataclass
+class MonthlyInsights:
+    user_id: int
+    whatsapp: Optional[str]
+    summary: Dict
+    insights: List[str]
+
 
 class FinancialAnalytics:
     @staticmethod
+    @cached("monthly_summary", skip=1)
     async def monthly_summary(user: User, db: Session) -> Dict:
-        """Gera resumo mensal de gastos e receitas"""
+        """Gera resumo mensal de gastos e receitas (uma consulta)"""
         month_start = datetime.now().replace(day=1, hour=0, minute=0)
         
-        transactions = db.query(Transaction).join(Account).filter(
-            Account.owner_id == user.id,
-            Transaction.date >= month_start
+        # Totais do mês agrupados por categoria e tipo, já com o nome da categoria
+        rows = db.query(
+            Category.name,
+            TransactionRollup.type,
+            func.sum(TransactionRollup.total).label('total')
+        ).outerjoin(
+            Category, Category.id == TransactionRollup.category_id
+        ).filter(
+            TransactionRollup.owner_id == user.id,
+            TransactionRollup.month == month_of(month_start)
+        ).group_by(
+            Category.name,
+            TransactionRollup.type
         ).all()
         
-        total_income = sum(t.amount for t in transactions if t.type == "income")
-        total_expense = sum(t.amount for t in transactions if t.type == "expense")
+        return FinancialAnalytics.summarize(month_start, rows)
+
+    @staticmethod
+    def summarize(month_start: datetime, rows) -> Dict:
+        """Resumo a partir das linhas (categoria, tipo, total)"""
+        total_income = sum(float(total) for _, type_, total in rows if type_ == "income")
+        total_expense = sum(float(total) for _, type_, total in rows if type_ == "expense")
         
         by_category = defaultdict(float)
-        for t in transactions:
-            category_name = t.category.name if t.category else "Sem categoria"
-            by_category[category_name] += t.amount
+        for category_name, _, total in rows:
+            by_category[category_name or UNCATEGORIZED] += float(total)
         
         # Calcula percentuais por categoria
         category_percentages = {}
@@ -42,47 +72,53 @@ class FinancialAnalytics:
         }
 
     @staticmethod
-    async def spending_trends(user: User, db: Session, months: int = 6) -> List[Dict]:
-        """Analisa tendências de gastos nos últimos meses"""
-        start_date = datetime.now() - timedelta(days=30 * months)
-        
-        # Busca transações agrupadas por mês
-        monthly_transactions = db.query(
-            func.date_trunc('month', Transaction.date).label('month'),
-            Transaction.type,
-            func.sum(Transaction.amount).label('total')
-        ).join(Account).filter(
-            Account.owner_id == user.id,
-            Transaction.date >= start_date
-        ).group_by(
-            func.date_trunc('month', Transaction.date),
-            Transaction.type
-        ).all()
+    @cached("spending_trends", skip=1)
+    async def spending_trends(
+        user: User,
+        db: Session,
+        months: int = 6,
+        unit: str = "month",
+        periods: Optional[int] = None,
+        strategy: str = "auto"
+    ) -> List[Dict]:
+        """Totais por período (day, week, month ou year) nos últimos
+        `periods` períodos do calendário (padrão: `months`)"""
+        check_unit(unit)
+        periods = periods or months
+        first = shift(bucket_start(datetime.now(), unit), unit, -(periods - 1))
         
-        # Organiza os dados por mês
-        trends = []
-        for month, type_, total in monthly_transactions:
-            trends.append({
-                "month": month.strftime("%B/%Y"),
-                "type": type_,
-                "total": float(total)
-            })
+        if unit in ("month", "year"):
+            # Mês e ano saem dos totais mensais
+            totals = bucket_totals(
+                db, TransactionRollup.month, TransactionRollup.type, TransactionRollup.total,
+                [TransactionRollup.owner_id == user.id, TransactionRollup.month >= first],
+                unit, strategy
+            )
+        else:
+            totals = bucket_totals(
+                db, Transaction.date, Transaction.type, Transaction.amount,
+                [Transaction.owner_id == user.id, Transaction.date >= datetime.combine(first, time.min)],
+                unit, strategy
+            )
         
-        return trends
+        return series(totals, unit)
 
     @staticmethod
+    @cached("budget_analysis", skip=1)
     async def budget_analysis(user: User, db: Session) -> Dict:
         """Analisa o orçamento atual vs. gastos reais"""
         month_start = datetime.now().replace(day=1, hour=0, minute=0)
         
-        # Busca gastos reais
+        # Busca gastos reais (totais mensais)
         actual_expenses = db.query(
             Category.name,
-            func.sum(Transaction.amount).label('total')
-        ).join(Transaction).join(Account).filter(
-            Account.owner_id == user.id,
-            Transaction.date >= month_start,
-            Transaction.type == "expense"
+            func.sum(TransactionRollup.total).label('total')
+        ).join(
+            Category, Category.id == TransactionRollup.category_id
+        ).filter(
+            TransactionRollup.owner_id == user.id,
+            TransactionRollup.month == month_of(month_start),
+            TransactionRollup.type == "expense"
         ).group_by(Category.name).all()
         
         # Aqui você implementaria a comparação com o orçamento planejado
@@ -93,12 +129,19 @@ class FinancialAnalytics:
         }
 
     @staticmethod
-    async def generate_insights(user: User, db: Session) -> List[str]:
-        """Gera insights personalizados baseados nos dados financeiros"""
-        insights = []
-        
+    @cached("generate_insights", skip=1)
+    async def generate_insights(user: User, db: Session, summary: Optional[Dict] = None) -> List[str]:
+        """Gera insights personalizados baseados nos dados financeiros
+        (reaproveita o resumo do mês, se já calculado)"""
         # Análise do mês atual
-        summary = await FinancialAnalytics.monthly_summary(user, db)
+        if summary is None:
+            summary = await FinancialAnalytics.monthly_summary(user, db)
+        return FinancialAnalytics.insights_for(summary)
+
+    @staticmethod
+    def insights_for(summary: Dict) -> List[str]:
+        """Insights a partir de um resumo mensal"""
+        insights = []
         
         # Verifica taxa de poupança
         if summary["savings_rate"] < 10:
@@ -116,4 +159,91 @@ class FinancialAnalytics:
             insights.append("🚨 Seu saldo está negativo este mês. "
                           "Urgent: revise seus gastos.")
         
-        return insights 
\ No newline at end of file
+        return insights
+
+    @staticmethod
+    def batch_insights(db: Session, month_start: Optional[datetime] = None, chunk: int = STREAM_CHUNK) -> Iterator[MonthlyInsights]:
+        """Resumo e insights do mês de todos os usuários ativos.
+
+        Uma única consulta agrupada (usuário, categoria, tipo), lida em
+        blocos; os totais de cada bloco são calculados com NumPy."""
+        month_start = month_start or datetime.now().replace(day=1, hour=0, minute=0)
+        query = select(
+            User.id,
+            User.whatsapp,
+            Category.name,
+            TransactionRollup.type,
+            func.sum(TransactionRollup.total)
+        ).select_from(User).outerjoin(
+            TransactionRollup, and_(
+                TransactionRollup.owner_id == User.id,
+                TransactionRollup.month == month_of(month_start)
+            )
+        ).outerjoin(
+            Category, Category.id == TransactionRollup.category_id
+        ).where(
+            User.is_active == True
+        ).group_by(
+            User.id, User.whatsapp, Category.name, TransactionRollup.type
+        ).order_by(User.id)
+        
+        # As linhas do último usuário de um bloco podem continuar no próximo
+        pending: List = []
+        for partition in db.execute(query.execution_options(yield_per=chunk)).partitions():
+            rows = pending + list(partition)
+            split = len(rows)
+            while split and rows[split - 1][0] == rows[-1][0]:
+                split -= 1
+            pending = rows[split:]
+            yield from FinancialAnalytics.summarize_many(month_start, rows[:split])
+        yield from FinancialAnalytics.summarize_many(month_start, pending)
+
+    @staticmethod
+    def summarize_many(month_start: datetime, rows: Sequence) -> Iterator[MonthlyInsights]:
+        """Como summarize + insights_for, para linhas
+        (usuário, whatsapp, categoria, tipo, total) ordenadas por usuário"""
+        if not rows:
+            return
+        import numpy as np
+        
+        user_ids, user_index = np.unique(np.array([row[0] for row in rows]), return_inverse=True)
+        count = len(user_ids)
+        types = np.array([row[3] or "" for row in rows], dtype=str)
+        amounts = np.array([float(row[4] or 0) for row in rows])
+        
+        income = np.bincount(user_index, weights=np.where(types == "income", amounts, 0), minlength=count)
+        expense = np.bincount(user_index, weights=np.where(types == "expense", amounts, 0), minlength=count)
+        balance = income - expense
+        total = income + expense
+        savings_rate = np.divide(balance, income, out=np.zeros(count), where=income > 0) * 100
+        
+        # Totais por (usuário, categoria), somando os tipos
+        has_data = np.array([row[3] is not None for row in rows])
+        names, name_index = np.unique(np.array([row[2] or UNCATEGORIZED for row in rows], dtype=str), return_inverse=True)
+        pairs, pair_index = np.unique(
+            np.stack([user_index[has_data], name_index[has_data]], axis=1), axis=0, return_inverse=True
+        )
+        by_pair = np.bincount(pair_index.ravel(), weights=amounts[has_data], minlength=len(pairs))
+        pair_total = total[pairs[:, 0]]
+        percentages = np.divide(by_pair, pair_total, out=np.zeros(len(pairs)), where=pair_total > 0) * 100
+        
+        by_category: List[Dict] = [{} for _ in range(count)]
+        category_percentages: List[Dict] = [{} for _ in range(count)]
+        for (user, name), amount, percentage in zip(pairs, by_pair, percentages):
+            by_category[user][str(names[name])] = float(amount)
+            if total[user] > 0:
+                category_percentages[user][str(names[name])] = float(percentage)
+        
+        whatsapp = {row[0]: row[1] for row in rows}
+        period = month_start.strftime('%B/%Y')
+        for i, user_id in enumerate(user_ids.tolist()):
+            summary = {
+                "period": period,
+                "total_income": float(income[i]),
+                "total_expense": float(expense[i]),
+                "balance": float(balance[i]),
+                "by_category": by_category[i],
+                "category_percentages": category_percentages[i],
+                "savings_rate": float(savings_rate[i])
+            }
+            yield MonthlyInsights(user_id, whatsapp[user_id], summary, FinancialAnalytics.insights_for(summary))
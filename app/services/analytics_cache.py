@@ -0,0 +1,46 @@
+"""
+    Cache dos resultados de análises e orçamentos.
+
+A chave é (usuário, versão dos dados, função, dia, argumentos). Todo commit
+que grava dados de um usuário incrementa a versão dele (app.db.routing), então
+no mesmo processo um resultado em cache nunca é mais antigo que a última
+escrita.
+
+As versões são por processo: com vários workers, cada um tem seu cache e
+só vê as escritas feitas nele mesmo. Escritas de outro worker aparecem
+quando a entrada expira (ANALYTICS_CACHE_TTL).
+
+Métricas em GET /internal/cache.
+"""
+import functools
+from datetime import date
+from typing import Callable
+
+from app.config import ANALYTICS_CACHE_SIZE, ANALYTICS_CACHE_TTL
+from app.db.routing import on_user_write
+from app.services.cache import VersionedCache
+
+analytics_cache = VersionedCache(maxsize=ANALYTICS_CACHE_SIZE, ttl=ANALYTICS_CACHE_TTL or None)
+
+on_user_write(analytics_cache.versions.bump)
+
+
+def cached(name: str, user_id: Callable = lambda user: user.id, skip: int = 0):
+    """Decorator para funções async (sujeito, *args, **kwargs).
+
+    user_id extrai o id do primeiro argumento; os `skip` argumentos seguintes
+    (a sessão do banco) ficam fora da chave. Argumentos não hasheáveis
+    desviam do cache.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(subject, *args, **kwargs):
+            parts = (name, date.today(), args[skip:], tuple(sorted(kwargs.items())))
+            key = analytics_cache.key(user_id(subject), *parts)
+            try:
+                hash(key)
+            except TypeError:
+                return await func(subject, *args, **kwargs)
+            return await analytics_cache.get_or_load(key, lambda: func(subject, *args, **kwargs))
+        return wrapper
+    return decorator
@@ -1,21 +1,16 @@
-from fastapi import HTTPException
-from app.models import User
-from app.database import get_session
-from sqlmodel import select
+from typing import Optional
 
-async def authenticate_user(phone: str) -> User:
-    """Autentica ou registra um usuário pelo número do WhatsApp"""
-    async with get_session() as session:
-        # Busca usuário
-        query = select(User).where(User.phone == phone)
-        result = await session.execute(query)
-        user = result.scalar_one_or_none()
-        
-        if not user:
-            # Registra novo usuário
-            user = User(phone=phone, name=f"User_{phone[-4:]}")
-            session.add(user)
-            await session.commit()
-            await session.refresh(user)
-            
-        return user 
\ No newline at end of file
+from app.services.identity import Identity, identity_resolver, normalize_phone
+
+async def authenticate_user(phone: str) -> Optional[Identity]:
+    """Identifica o usuário pelo número do WhatsApp (User.whatsapp).
+
+    Devolve só o id e o número canônico; quem precisar do usuário completo
+    carrega na própria sessão. None se o número não está cadastrado.
+    """
+    user_id = await identity_resolver.resolve(phone, register=False)
+    return Identity(user_id, normalize_phone(phone)) if user_id is not None else None
+
+async def resolve_user_id(phone: str) -> Optional[int]:
+    """Id do usuário pelo número do WhatsApp (sem consultar o banco se já conhecido)"""
+    return await identity_resolver.resolve(phone, register=False)
@@ -0,0 +1,146 @@
+"""
+    Agregação por período (dia, semana, mês, ano).
+
+Os limites são os do calendário: semana começando na segunda-feira, mês e
+ano no primeiro dia. No Postgres e no SQLite o agrupamento é feito no banco
+(date_trunc / date()); em outros bancos as linhas são lidas em blocos e
+agrupadas com NumPy. Em todos os casos a consulta é uma só.
+"""
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, select
+
+UNITS = ("day", "week", "month", "year")
+SQL_DIALECTS = ("postgresql", "sqlite")
+STREAM_CHUNK = 10000
+
+# Modificadores de date() do SQLite (semana: segunda-feira anterior ou o próprio dia)
+SQLITE_MODIFIERS = {
+    "day": (),
+    "week": ("weekday 0", "-6 days"),
+    "month": ("start of month",),
+    "year": ("start of year",),
+}
+
+LABELS = {
+    "day": "%d/%m/%Y",
+    "week": "semana de %d/%m/%Y",
+    "month": "%B/%Y",
+    "year": "%Y",
+}
+
+Totals = Dict[Tuple[date, str], float]
+
+
+def check_unit(unit: str):
+    if unit not in UNITS:
+        raise ValueError(f"Período inválido: {unit} (use {', '.join(UNITS)})")
+
+
+def bucket_start(value, unit: str) -> date:
+    """Início do período que contém value"""
+    check_unit(unit)
+    day = value.date() if isinstance(value, datetime) else value
+    if unit == "day":
+        return day
+    if unit == "week":
+        return day - timedelta(days=day.weekday())
+    if unit == "month":
+        return day.replace(day=1)
+    return day.replace(month=1, day=1)
+
+
+def shift(start: date, unit: str, periods: int) -> date:
+    """Início do período deslocado em periods (negativo: para trás)"""
+    if unit == "day":
+        return start + timedelta(days=periods)
+    if unit == "week":
+        return start + timedelta(weeks=periods)
+    if unit == "month":
+        months = start.year * 12 + start.month - 1 + periods
+        return date(months // 12, months % 12 + 1, 1)
+    return date(start.year + periods, 1, 1)
+
+
+def bucket_expr(column, unit: str, dialect: str):
+    """Expressão SQL do início do período"""
+    check_unit(unit)
+    if dialect == "postgresql":
+        return func.date_trunc(unit, column)
+    if dialect == "sqlite":
+        return func.date(column, *SQLITE_MODIFIERS[unit])
+    raise ValueError(f"Dialeto sem agrupamento por período: {dialect}")
+
+
+def as_date(value) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, str):
+        return date.fromisoformat(value[:10])
+    return value
+
+
+def numpy_totals(rows: Iterable[Tuple], unit: str, chunk: int = STREAM_CHUNK) -> Totals:
+    """Agrupa (data, tipo, valor) em blocos com NumPy, sem carregar tudo"""
+    import numpy as np
+
+    check_unit(unit)
+    totals: Totals = defaultdict(float)
+    rows = iter(rows)
+    while True:
+        block = [row for _, row in zip(range(chunk), rows)]
+        if not block:
+            return dict(totals)
+        when, types, amounts = zip(*block)
+        days = np.array([as_date(w) for w in when], dtype="datetime64[D]")
+        if unit == "week":
+            # 1970-01-01 foi quinta-feira: volta até a segunda-feira
+            starts = days - (days.astype(np.int64) + 3) % 7
+        elif unit == "month":
+            starts = days.astype("datetime64[M]").astype("datetime64[D]")
+        elif unit == "year":
+            starts = days.astype("datetime64[Y]").astype("datetime64[D]")
+        else:
+            starts = days
+        type_codes, type_index = np.unique(np.array(types, dtype=str), return_inverse=True)
+        pairs = np.stack([starts.astype(np.int64), type_index.astype(np.int64)], axis=1)
+        unique, inverse = np.unique(pairs, axis=0, return_inverse=True)
+        sums = np.bincount(inverse.ravel(), weights=np.asarray(amounts, dtype=float))
+        for (start, type_code), total in zip(unique, sums):
+            key = (date(1970, 1, 1) + timedelta(days=int(start)), str(type_codes[type_code]))
+            totals[key] += float(total)
+
+
+def bucket_totals(db, date_column, type_column, amount_column, filters: List, unit: str, strategy: str = "auto") -> Totals:
+    """Totais por (início do período, tipo) numa única consulta (sessão síncrona)"""
+    dialect = db.bind.dialect.name
+    if strategy == "auto":
+        strategy = "sql" if dialect in SQL_DIALECTS else "numpy"
+
+    if strategy == "sql":
+        bucket = bucket_expr(date_column, unit, dialect).label("bucket")
+        query = (
+            select(bucket, type_column, func.sum(amount_column))
+            .where(*filters)
+            .group_by(bucket, type_column)
+        )
+        return {(as_date(start), type_): float(total) for start, type_, total in db.execute(query)}
+
+    query = select(date_column, type_column, amount_column).where(*filters)
+    rows = db.execute(query.execution_options(yield_per=STREAM_CHUNK))
+    return numpy_totals(rows, unit)
+
+
+def label(start: date, unit: str) -> str:
+    return start.strftime(LABELS[unit])
+
+
+def series(totals: Totals, unit: str, first: Optional[date] = None) -> List[Dict]:
+    """Lista ordenada por período e tipo"""
+    return [
+        {"start": start.isoformat(), "period": label(start, unit), "type": type_, "total": total}
+        for (start, type_), total in sorted(totals.items())
+        if first is None or start >= first
+    ]
@@ -1,9 +1,11 @@
-from app.models import Budget, Transaction
-from app.database import get_session
+from app.models import Budget, MonthlyRollup
+from app.database import get_read_session, get_session
 from sqlmodel import select
 from decimal import Decimal
 from typing import List, Dict
 from datetime import datetime, timedelta
+from app.services.rollups import month_of
+from app.services.analytics_cache import cached
 
 async def set_budget(
     user_id: int,
@@ -29,26 +31,20 @@ async def get_budgets(user_id: int) -> List[Budget]:
         result = await session.execute(query)
         return result.scalars().all()
 
+@cached("budget_status", user_id=lambda user_id: user_id)
 async def get_budget_status(user_id: int) -> Dict:
-    async with get_session() as session:
+    async with get_read_session(user_id) as session:
         # Busca orçamentos
         budgets = await get_budgets(user_id)
         
-        # Calcula gastos do mês atual
-        start_date = datetime.now().replace(day=1)
-        query = select(Transaction).where(
-            Transaction.user_id == user_id,
-            Transaction.type == "expense",
-            Transaction.date >= start_date
+        # Gastos do mês atual por categoria (totais mensais)
+        query = select(MonthlyRollup.category, MonthlyRollup.total).where(
+            MonthlyRollup.user_id == user_id,
+            MonthlyRollup.type == "expense",
+            MonthlyRollup.month == month_of(datetime.now())
         )
         result = await session.execute(query)
-        transactions = result.scalars().all()
-        
-        # Agrupa gastos por categoria
-        expenses = {}
-        for t in transactions:
-            if t.category:
-                expenses[t.category] = expenses.get(t.category, Decimal(0)) + t.amount
+        expenses = {category: total for category, total in result}
         
         # Compara com limites
         status = {}
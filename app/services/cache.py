@@ -0,0 +1,140 @@
+"""
+    Estruturas de cache em memória compartilhadas pelos serviços.
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """Dicionário com expiração e limite de itens (remove o menos usado)"""
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 600, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: str, default=None):
+        item = self._data.get(key)
+        if item is None:
+            return default
+        expires, value = item
+        if expires < self._clock():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any):
+        self._data[key] = (self._clock() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: str, default=None):
+        item = self._data.pop(key, None)
+        return default if item is None else item[1]
+
+
+class DataVersions:
+    """Versão dos dados de cada usuário; cada escrita incrementa"""
+
+    def __init__(self):
+        self._versions: Dict[int, int] = {}
+
+    def get(self, user_id: int) -> int:
+        return self._versions.get(user_id, 0)
+
+    def bump(self, user_id: int):
+        self._versions[user_id] = self._versions.get(user_id, 0) + 1
+
+
+class VersionedCache:
+    """Cache LRU com chave (usuário, versão dos dados, ...).
+
+    Uma escrita muda a versão do usuário, então as entradas antigas nunca são
+    lidas de novo e saem pelo LRU. As versões só enxergam escritas do próprio
+    processo; ttl (segundos) limita por quanto tempo uma entrada pode ignorar
+    escritas feitas em outro worker (None = sem limite). Requisições iguais e
+    simultâneas esperam a mesma carga (single-flight).
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1000,
+        versions: Optional[DataVersions] = None,
+        ttl: Optional[float] = None,
+        clock=time.monotonic,
+    ):
+        self.maxsize = maxsize
+        self.versions = versions or DataVersions()
+        self.ttl = ttl
+        self._clock = clock
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._loading: Dict[Hashable, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expired = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def key(self, user_id: int, *parts) -> Tuple:
+        return (user_id, self.versions.get(user_id), *parts)
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]):
+        if self.maxsize <= 0:
+            return await loader()
+        item = self._data.get(key)
+        if item is not None:
+            expires, value = item
+            if expires >= self._clock():
+                self.hits += 1
+                self._data.move_to_end(key)
+                return value
+            del self._data[key]
+            self.expired += 1
+        pending = self._loading.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            return await asyncio.shield(pending)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._loading[key] = future
+        try:
+            value = await loader()
+        except BaseException as e:
+            future.set_exception(e)
+            # Ninguém esperando: evita "exception was never retrieved"
+            future.exception()
+            raise
+        finally:
+            self._loading.pop(key, None)
+        future.set_result(value)
+        expires = self._clock() + self.ttl if self.ttl is not None else float("inf")
+        self._data[key] = (expires, value)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+        return value
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "expired": self.expired,
+            "hit_rate": round((self.hits + self.coalesced) / lookups, 3) if lookups else 0.0,
+        }
@@ -1,54 +1,217 @@
-import matplotlib.pyplot as plt
-import io
-import base64
+"""
+    Gráficos das análises financeiras.
+
+O desenho fica em um backend escolhido por CHART_BACKEND: "lite"
+(app.services.charts_lite: SVG direto ou PNG pelo Pillow, sem matplotlib)
+ou "matplotlib" (app.services.charts_matplotlib). CHART_FORMAT escolhe png,
+png8, webp ou svg e IMAGE_PRESET o tamanho (app.services.images). O backend
+só é importado no primeiro desenho.
+
+Em código async, use ChartService.render_* (ou chart_renderer.render): o
+desenho roda em um pool de processos, com timeout por gráfico e cache pelo
+hash dos dados, e o event loop nunca bloqueia. Eles devolvem os bytes da
+imagem; os métodos síncronos generate_* desenham no próprio processo e
+devolvem base64, só para respostas JSON.
+
+Métricas em GET /internal/charts.
+"""
+import asyncio
+import hashlib
+import importlib
+import json
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Optional
+
+from app.config import (
+    CHART_BACKEND,
+    CHART_CACHE_SIZE,
+    CHART_FORMAT,
+    CHART_MAX_TASKS_PER_CHILD,
+    CHART_TIMEOUT,
+    CHART_WORKERS,
+    IMAGE_PRESET,
+)
+from app.services.cache import VersionedCache
+from app.services.images import to_base64
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = {
+    'lite': 'app.services.charts_lite',
+    'matplotlib': 'app.services.charts_matplotlib',
+}
+
+
+def load_backend(name: str):
+    """Módulo com draw_expense_pie, draw_monthly_comparison, draw_savings_progress e warm_up.
+
+    As funções draw_* recebem os dados, o formato e o preset e devolvem bytes.
+    """
+    try:
+        return importlib.import_module(BACKENDS[name])
+    except KeyError:
+        raise ValueError(f"Backend de gráficos desconhecido: {name}") from None
+
+
+class ChartRenderer:
+    """Pool de processos para desenhar gráficos fora do event loop.
+
+    O pool é criado na primeira renderização. Cada worker é substituído após
+    max_tasks_per_child gráficos, o que limita o crescimento de memória de
+    caches internos do backend. Gráficos iguais (mesma função e mesmos
+    dados) saem do cache; pedidos simultâneos iguais desenham uma vez só.
+
+    Um timeout descarta o pool inteiro: o worker preso é encerrado (não há
+    como cancelar um desenho em andamento) e o próximo pedido cria outro.
+    Desenhos em andamento no mesmo pool falham junto.
+    """
+
+    def __init__(
+        self,
+        backend: str = 'lite',
+        workers: int = 2,
+        timeout: float = 10,
+        cache_size: int = 256,
+        max_tasks_per_child: Optional[int] = 500,
+    ):
+        self.backend_name = backend
+        self._backend = None
+        self.workers = workers
+        self.timeout = timeout
+        self.max_tasks_per_child = max_tasks_per_child or None
+        self.cache = VersionedCache(maxsize=cache_size)
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+        # Contadores
+        self.rendered = 0
+        self.timeouts = 0
+        self.failed = 0
+        self.recycled = 0
+        self.render_seconds = 0.0
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            self._backend = load_backend(self.backend_name)
+        return self._backend
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=self.backend.warm_up,
+                max_tasks_per_child=self.max_tasks_per_child,
+            )
+        return self._executor
+
+    @staticmethod
+    def key(draw: Callable, *args) -> str:
+        """Hash da função e dos dados (a ordem dos dicionários importa)"""
+        raw = json.dumps([draw.__module__, draw.__qualname__, args], default=str, separators=(',', ':'))
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    async def run(self, func: Callable, *args, timeout: Optional[float] = None):
+        """Executa func(*args) em um worker, sem cache"""
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        future = loop.run_in_executor(self.executor, func, *args)
+        try:
+            result = await asyncio.wait_for(future, timeout or self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            logger.warning("⏱️ Gráfico %s excedeu %.1fs", getattr(func, "__name__", func), timeout or self.timeout)
+            self._recycle()
+            raise
+        except Exception:
+            self.failed += 1
+            raise
+        self.rendered += 1
+        self.render_seconds += time.perf_counter() - started
+        return result
+
+    async def render(self, draw: Callable, *args, timeout: Optional[float] = None) -> bytes:
+        """Desenha com cache pelo hash dos dados"""
+        return await self.cache.get_or_load(
+            self.key(draw, *args), lambda: self.run(draw, *args, timeout=timeout)
+        )
+
+    def _recycle(self):
+        """Descarta o pool atual e encerra os workers; o próximo uso cria outro"""
+        executor, self._executor = self._executor, None
+        if executor is None:
+            return
+        processes = list((executor._processes or {}).values())
+        executor.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        self.recycled += 1
+
+    async def shutdown(self):
+        """Encerra os workers (pedidos ainda na fila são cancelados)"""
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            await asyncio.to_thread(executor.shutdown, wait=True, cancel_futures=True)
+
+    def stats(self) -> Dict:
+        return {
+            "backend": self.backend_name,
+            "workers": self.workers,
+            "running": self._executor is not None,
+            "rendered": self.rendered,
+            "timeouts": self.timeouts,
+            "failed": self.failed,
+            "recycled": self.recycled,
+            "avg_render_ms": round(self.render_seconds / self.rendered * 1000, 1) if self.rendered else 0.0,
+            "cache": self.cache.stats(),
+        }
+
+
+chart_renderer = ChartRenderer(
+    backend=CHART_BACKEND,
+    workers=CHART_WORKERS,
+    timeout=CHART_TIMEOUT,
+    cache_size=CHART_CACHE_SIZE,
+    max_tasks_per_child=CHART_MAX_TASKS_PER_CHILD,
+)
+
 
 class ChartService:
     @staticmethod
     def generate_expense_pie_chart(categories: dict) -> str:
         """Gera gráfico de pizza de despesas por categoria"""
-        plt.figure(figsize=(10, 8))
-        plt.pie(
-            categories.values(),
-            labels=categories.keys(),
-            autopct='%1.1f%%',
-            colors=['#FF9999', '#66B2FF', '#99FF99', '#FFCC99', '#FF99CC', '#99CCFF']
-        )
-        plt.title('Despesas por Categoria')
-        
-        # Salva o gráfico em bytes
-        img_bytes = io.BytesIO()
-        plt.savefig(img_bytes, format='png')
-        img_bytes.seek(0)
-        
-        # Converte para base64
-        return base64.b64encode(img_bytes.read()).decode()
+        draw = chart_renderer.backend.draw_expense_pie
+        return to_base64(draw(categories, CHART_FORMAT, IMAGE_PRESET))
 
     @staticmethod
     def generate_monthly_comparison_chart(months: list, values: list) -> str:
         """Gera gráfico de barras comparando meses"""
-        plt.figure(figsize=(12, 6))
-        plt.bar(months, values, color='#66B2FF')
-        plt.title('Comparação Mensal de Gastos')
-        plt.xlabel('Mês')
-        plt.ylabel('Valor (R$)')
-        
-        img_bytes = io.BytesIO()
-        plt.savefig(img_bytes, format='png')
-        img_bytes.seek(0)
-        
-        return base64.b64encode(img_bytes.read()).decode()
+        draw = chart_renderer.backend.draw_monthly_comparison
+        return to_base64(draw(months, values, CHART_FORMAT, IMAGE_PRESET))
 
     @staticmethod
     def generate_savings_progress_chart(target: float, current: float) -> str:
         """Gera gráfico de progresso da meta de economia"""
-        plt.figure(figsize=(8, 3))
-        plt.barh(['Progresso'], [current], color='#99FF99')
-        plt.barh(['Progresso'], [target-current], left=[current], color='#FFCCCC')
-        plt.xlim(0, target)
-        plt.title(f'Progresso da Meta: {(current/target)*100:.1f}%')
-        
-        img_bytes = io.BytesIO()
-        plt.savefig(img_bytes, format='png')
-        img_bytes.seek(0)
-        
-        return base64.b64encode(img_bytes.read()).decode() 
\ No newline at end of file
+        draw = chart_renderer.backend.draw_savings_progress
+        return to_base64(draw(target, current, CHART_FORMAT, IMAGE_PRESET))
+
+    @staticmethod
+    async def render_expense_pie(categories: dict) -> bytes:
+        """Pizza de despesas desenhada no pool de processos"""
+        draw = chart_renderer.backend.draw_expense_pie
+        return await chart_renderer.render(draw, dict(categories), CHART_FORMAT, IMAGE_PRESET)
+
+    @staticmethod
+    async def render_monthly_comparison(months: list, values: list) -> bytes:
+        """Comparação mensal desenhada no pool de processos"""
+        draw = chart_renderer.backend.draw_monthly_comparison
+        return await chart_renderer.render(draw, list(months), list(values), CHART_FORMAT, IMAGE_PRESET)
+
+    @staticmethod
+    async def render_savings_progress(target: float, current: float) -> bytes:
+        """Progresso da meta desenhado no pool de processos"""
+        draw = chart_renderer.backend.draw_savings_progress
+        return await chart_renderer.render(draw, target, current, CHART_FORMAT, IMAGE_PRESET)
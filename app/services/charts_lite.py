@@ -0,0 +1,205 @@
+"""
+    Backend leve dos gráficos (CHART_BACKEND=lite), sem matplotlib.
+
+Os três gráficos do bot são simples: fatias, barras e texto. Aqui eles são
+desenhados direto como SVG (texto puro) ou pelo Pillow (png, png8, webp),
+com as mesmas funções e assinaturas de app.services.charts_matplotlib. O
+Pillow só é importado na primeira imagem rasterizada.
+
+O desenho usa coordenadas fixas por gráfico; o preset (app.services.images)
+só muda a escala da saída.
+"""
+import functools
+import math
+from typing import List, Optional, Tuple
+from xml.sax.saxutils import escape
+
+from app.services import images
+
+COLORS = ['#FF9999', '#66B2FF', '#99FF99', '#FFCC99', '#FF99CC', '#99CCFF']
+TEXT = '#222222'
+GRID = '#DDDDDD'
+FONT = 'DejaVu Sans, Arial, sans-serif'
+
+
+@functools.lru_cache(maxsize=None)
+def _font(size: int):
+    from PIL import ImageFont
+
+    try:
+        return ImageFont.truetype('DejaVuSans.ttf', size)
+    except OSError:
+        pass
+    try:
+        return ImageFont.load_default(size)
+    except TypeError:
+        # Pillow < 10.1: fonte bitmap de tamanho fixo
+        return ImageFont.load_default()
+
+
+class RasterCanvas:
+    """Primitivas de desenho sobre uma imagem do Pillow"""
+
+    def __init__(self, width: int, height: int, fmt: str = 'png', scale: float = 1.0):
+        from PIL import Image, ImageDraw
+
+        self.width, self.height = width, height
+        self.fmt, self.scale = fmt, scale
+        self.image = Image.new('RGB', (round(width * scale), round(height * scale)), 'white')
+        self.draw = ImageDraw.Draw(self.image)
+
+    def _xy(self, *values: float) -> Tuple[float, ...]:
+        return tuple(value * self.scale for value in values)
+
+    def rect(self, x0: float, y0: float, x1: float, y1: float, fill: str):
+        if x1 > x0 and y1 > y0:
+            self.draw.rectangle(self._xy(x0, y0, x1, y1), fill=fill)
+
+    def line(self, x0: float, y0: float, x1: float, y1: float, color: str):
+        self.draw.line(self._xy(x0, y0, x1, y1), fill=color)
+
+    def wedge(self, cx: float, cy: float, r: float, start: float, end: float, fill: str):
+        """Fatia em graus, sentido horário a partir das 3 horas"""
+        self.draw.pieslice(self._xy(cx - r, cy - r, cx + r, cy + r), start, end, fill=fill, outline='white')
+
+    def text(self, x: float, y: float, value: str, size: int, anchor: str = 'middle'):
+        font = _font(max(8, round(size * self.scale)))
+        x, y = self._xy(x, y)
+        left, top, right, bottom = font.getbbox(value)
+        width = right - left
+        if anchor == 'middle':
+            x -= width / 2
+        elif anchor == 'end':
+            x -= width
+        self.draw.text((x - left, y - (bottom + top) / 2), value, fill=TEXT, font=font)
+
+    def save(self) -> bytes:
+        return images.encode(self.image, self.fmt)
+
+
+class SvgCanvas:
+    """Mesmas primitivas de RasterCanvas, gerando elementos SVG"""
+
+    def __init__(self, width: int, height: int, fmt: str = 'svg', scale: float = 1.0):
+        self.width, self.height = width, height
+        self.parts: List[str] = [
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="{round(width * scale)}" '
+            f'height="{round(height * scale)}" '
+            f'viewBox="0 0 {width} {height}" font-family="{FONT}">',
+            f'<rect width="{width}" height="{height}" fill="white"/>',
+        ]
+
+    def rect(self, x0: float, y0: float, x1: float, y1: float, fill: str):
+        if x1 > x0 and y1 > y0:
+            self.parts.append(
+                f'<rect x="{x0:.1f}" y="{y0:.1f}" width="{x1 - x0:.1f}" height="{y1 - y0:.1f}" fill="{fill}"/>'
+            )
+
+    def line(self, x0: float, y0: float, x1: float, y1: float, color: str):
+        self.parts.append(f'<line x1="{x0:.1f}" y1="{y0:.1f}" x2="{x1:.1f}" y2="{y1:.1f}" stroke="{color}"/>')
+
+    def wedge(self, cx: float, cy: float, r: float, start: float, end: float, fill: str):
+        if end - start >= 360:
+            self.parts.append(f'<circle cx="{cx:.1f}" cy="{cy:.1f}" r="{r:.1f}" fill="{fill}"/>')
+            return
+        x0, y0 = _point(cx, cy, r, start)
+        x1, y1 = _point(cx, cy, r, end)
+        large = 1 if end - start > 180 else 0
+        self.parts.append(
+            f'<path d="M{cx:.1f},{cy:.1f} L{x0:.1f},{y0:.1f} A{r:.1f},{r:.1f} 0 {large} 1 {x1:.1f},{y1:.1f} Z" '
+            f'fill="{fill}" stroke="white"/>'
+        )
+
+    def text(self, x: float, y: float, value: str, size: int, anchor: str = 'middle'):
+        self.parts.append(
+            f'<text x="{x:.1f}" y="{y:.1f}" font-size="{size}" text-anchor="{anchor}" '
+            f'dominant-baseline="central" fill="{TEXT}">{escape(value)}</text>'
+        )
+
+    def save(self) -> bytes:
+        return ''.join(self.parts + ['</svg>']).encode()
+
+
+def _canvas(fmt: str, preset: Optional[str], width: int, height: int):
+    canvas = SvgCanvas if images.check_format(fmt) == 'svg' else RasterCanvas
+    return canvas(width, height, fmt, images.scale(width, preset))
+
+
+def _point(cx: float, cy: float, r: float, angle: float) -> Tuple[float, float]:
+    radians = math.radians(angle)
+    return cx + r * math.cos(radians), cy + r * math.sin(radians)
+
+
+def _money(value: float) -> str:
+    return f"{value:,.0f}".replace(',', '.')
+
+
+def draw_expense_pie(categories: dict, fmt: str = 'png', preset: Optional[str] = None) -> bytes:
+    """Gráfico de pizza de despesas por categoria"""
+    canvas = _canvas(fmt, preset, 1000, 800)
+    canvas.text(500, 40, 'Despesas por Categoria', 28)
+    slices = [(str(name), float(value)) for name, value in categories.items() if value and value > 0]
+    total = sum(value for _, value in slices)
+    if not total:
+        canvas.text(500, 400, 'Sem despesas', 22)
+        return canvas.save()
+
+    cx, cy, r = 500, 430, 300
+    angle = -90.0
+    for i, (name, value) in enumerate(slices):
+        sweep = value / total * 360
+        canvas.wedge(cx, cy, r, angle, angle + sweep, COLORS[i % len(COLORS)])
+        middle = angle + sweep / 2
+        canvas.text(*_point(cx, cy, r * 0.6, middle), f"{value / total * 100:.1f}%", 18)
+        x, y = _point(cx, cy, r * 1.12, middle)
+        canvas.text(x, y, name, 20, 'start' if x > cx + 1 else 'end' if x < cx - 1 else 'middle')
+        angle += sweep
+    return canvas.save()
+
+
+def draw_monthly_comparison(months: list, values: list, fmt: str = 'png', preset: Optional[str] = None) -> bytes:
+    """Gráfico de barras comparando meses"""
+    canvas = _canvas(fmt, preset, 1200, 600)
+    canvas.text(600, 36, 'Comparação Mensal de Gastos', 26)
+    left, top, right, bottom = 110, 80, 1160, 520
+    values = [float(value) for value in values]
+    low = min([0.0] + values)
+    high = max([0.0] + values) * 1.1 or 1.0
+
+    def y(value: float) -> float:
+        return bottom - (value - low) / (high - low) * (bottom - top)
+
+    for step in range(6):
+        tick = low + (high - low) * step / 5
+        canvas.line(left, y(tick), right, y(tick), GRID)
+        canvas.text(left - 10, y(tick), _money(tick), 16, 'end')
+
+    slot = (right - left) / max(len(values), 1)
+    for i, (month, value) in enumerate(zip(months, values)):
+        x0 = left + slot * i + slot * 0.1
+        x1 = left + slot * (i + 1) - slot * 0.1
+        canvas.rect(x0, min(y(value), y(0)), x1, max(y(value), y(0)), '#66B2FF')
+        canvas.text((x0 + x1) / 2, bottom + 20, str(month), 16)
+    canvas.line(left, y(0), right, y(0), TEXT)
+    canvas.text((left + right) / 2, 575, 'Mês', 18)
+    canvas.text(left, top - 22, 'Valor (R$)', 16, 'end')
+    return canvas.save()
+
+
+def draw_savings_progress(target: float, current: float, fmt: str = 'png', preset: Optional[str] = None) -> bytes:
+    """Barra de progresso da meta de economia"""
+    canvas = _canvas(fmt, preset, 800, 300)
+    canvas.text(400, 40, f'Progresso da Meta: {(current / target) * 100:.1f}%', 24)
+    left, right, top, bottom = 140, 760, 110, 200
+    done = left + (right - left) * min(max(current / target, 0.0), 1.0)
+    canvas.rect(left, top, done, bottom, '#99FF99')
+    canvas.rect(done, top, right, bottom, '#FFCCCC')
+    canvas.text(left - 12, (top + bottom) / 2, 'Progresso', 18, 'end')
+    canvas.text(left, bottom + 25, '0', 16)
+    canvas.text(right, bottom + 25, _money(target), 16)
+    return canvas.save()
+
+
+def warm_up():
+    """Inicializador dos workers: carrega Pillow e a fonte"""
+    draw_savings_progress(1, 1)
@@ -0,0 +1,78 @@
+"""
+    Backend matplotlib dos gráficos (CHART_BACKEND=matplotlib).
+
+Desenha com objetos Figure explícitos e o canvas Agg, sem o estado global do
+pyplot: cada figura é descartada ao fim da chamada. Mesmas funções e
+assinaturas de app.services.charts_lite; png8 e webp saem do buffer RGBA do
+canvas, codificados pelo Pillow.
+"""
+import io
+from typing import Optional
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from app.services import images
+
+COLORS = ['#FF9999', '#66B2FF', '#99FF99', '#FFCC99', '#FF99CC', '#99CCFF']
+
+
+DPI = 100
+
+
+def _figure(figsize, fmt: str, preset: Optional[str]) -> Figure:
+    images.check_format(fmt)
+    figure = Figure(figsize=figsize, dpi=DPI * images.scale(figsize[0] * DPI, preset))
+    FigureCanvasAgg(figure)
+    return figure
+
+
+def _save(figure: Figure, fmt: str) -> bytes:
+    if fmt in ('png', 'svg'):
+        buffer = io.BytesIO()
+        figure.savefig(buffer, format=fmt, dpi='figure')
+        data = buffer.getvalue()
+    else:
+        from PIL import Image
+
+        figure.canvas.draw()
+        rgba = figure.canvas.buffer_rgba()
+        data = images.encode(Image.frombuffer('RGBA', figure.canvas.get_width_height(), rgba), fmt)
+    figure.clear()
+    return data
+
+
+def draw_expense_pie(categories: dict, fmt: str = 'png', preset: Optional[str] = None) -> bytes:
+    """Gráfico de pizza de despesas por categoria"""
+    figure = _figure((10, 8), fmt, preset)
+    ax = figure.subplots()
+    ax.pie(list(categories.values()), labels=list(categories.keys()), autopct='%1.1f%%', colors=COLORS)
+    ax.set_title('Despesas por Categoria')
+    return _save(figure, fmt)
+
+
+def draw_monthly_comparison(months: list, values: list, fmt: str = 'png', preset: Optional[str] = None) -> bytes:
+    """Gráfico de barras comparando meses"""
+    figure = _figure((12, 6), fmt, preset)
+    ax = figure.subplots()
+    ax.bar(months, values, color='#66B2FF')
+    ax.set_title('Comparação Mensal de Gastos')
+    ax.set_xlabel('Mês')
+    ax.set_ylabel('Valor (R$)')
+    return _save(figure, fmt)
+
+
+def draw_savings_progress(target: float, current: float, fmt: str = 'png', preset: Optional[str] = None) -> bytes:
+    """Barra de progresso da meta de economia"""
+    figure = _figure((8, 3), fmt, preset)
+    ax = figure.subplots()
+    ax.barh(['Progresso'], [current], color='#99FF99')
+    ax.barh(['Progresso'], [target - current], left=[current], color='#FFCCCC')
+    ax.set_xlim(0, target)
+    ax.set_title(f'Progresso da Meta: {(current / target) * 100:.1f}%')
+    return _save(figure, fmt)
+
+
+def warm_up():
+    """Inicializador dos workers: carrega o backend Agg uma vez"""
+    draw_savings_progress(1, 1)
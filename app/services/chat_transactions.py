@@ -0,0 +1,101 @@
+"""
+    Transações dos comandos do chat no esquema da API (app.db.models).
+
+O bot grava e lê as mesmas tabelas das rotas /finance: o usuário é o dono
+do número (User.whatsapp) e as transações ficam em Transaction.owner_id.
+Lançamentos do chat vão para a primeira conta do usuário (criada como
+"Carteira" se ele ainda não tiver nenhuma) e para a categoria de mesmo nome,
+se existir.
+"""
+import logging
+from decimal import Decimal
+from typing import Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import raiseload
+from sqlmodel import select
+
+from app.database import get_read_session, get_session
+from app.db.models import Account, Category, Transaction
+from app.db.routing import note_write
+from app.services.pagination import Page, make_page, page_size, paginate
+from app.services.rollups import api_rollup
+
+logger = logging.getLogger(__name__)
+
+STATEMENT_COLUMNS = (Transaction.date, Transaction.id)
+
+DEFAULT_ACCOUNT = "Carteira"
+
+
+async def record_transaction(
+    user_id: int,
+    amount: Decimal,
+    description: str,
+    type: str,
+    category: Optional[str] = None,
+) -> Transaction:
+    """Grava uma transação do chat (/despesa, /receita) e atualiza o saldo da conta"""
+    try:
+        async with get_session() as session:
+            result = await session.execute(
+                select(Account).where(Account.owner_id == user_id).order_by(Account.id).limit(1)
+            )
+            account = result.scalars().first()
+            if account is None:
+                account = Account(name=DEFAULT_ACCOUNT, owner_id=user_id)
+                session.add(account)
+                await session.flush()
+
+            category_id = None
+            if category:
+                result = await session.execute(
+                    select(Category.id)
+                    .where(func.lower(Category.name) == category.lower())
+                    .order_by(Category.id)
+                    .limit(1)
+                )
+                category_id = result.scalar_one_or_none()
+
+            transaction = Transaction(
+                amount=float(amount),
+                type=type,
+                description=description,
+                owner_id=user_id,
+                account_id=account.id,
+                category_id=category_id,
+            )
+            # Saldo e totais mensais na mesma transação do banco (como em /finance)
+            if type == "income":
+                account.balance += transaction.amount
+            else:
+                account.balance -= transaction.amount
+            session.add(transaction)
+            await api_rollup().apply_async(session, transaction)
+            note_write(session, user_id)
+            await session.commit()
+            await session.refresh(transaction)
+            return transaction
+
+    except Exception as e:
+        logger.error(f"Erro ao adicionar transação: {e}")
+        raise
+
+
+async def get_statement(user_id: int, cursor: Optional[str] = None, limit: int = 10) -> Page[Transaction]:
+    """Página do extrato (/extrato), das mais recentes para as mais antigas"""
+    try:
+        async with get_read_session(user_id) as session:
+            size = page_size(limit)
+            query = paginate(
+                select(Transaction)
+                .where(Transaction.owner_id == user_id)
+                .options(raiseload("*")),
+                STATEMENT_COLUMNS, cursor, size,
+            )
+            result = await session.execute(query)
+            return make_page(result.scalars().all(), STATEMENT_COLUMNS, size)
+
+    except Exception as e:
+        logger.error(f"Erro ao buscar transações: {e}")
+        raise
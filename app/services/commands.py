@@ -0,0 +1,174 @@
+"""
+    Roteador de comandos do bot.
+
+Cada comando é registrado uma única vez em um dicionário indexado pelo
+primeiro token da mensagem, de forma que o custo de despacho não cresce com
+a quantidade de comandos. Comandos com argumentos possuem uma gramática
+(regex pré-compilada) que converte o texto em um objeto tipado entregue ao
+handler.
+"""
+import re
+import logging
+from dataclasses import dataclass, field, replace
+from decimal import Decimal, InvalidOperation
+from typing import Awaitable, Callable, Dict, Iterable, Optional, Pattern, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ParsedCommand:
+    """Comando reconhecido, com o texto dos argumentos ainda cru"""
+    name: str
+    args: str
+    # Número do remetente; None fora do webhook. O id do usuário é resolvido
+    # só pelos handlers que precisam dele
+    sender: Optional[str] = field(default=None, kw_only=True)
+
+
+@dataclass(frozen=True)
+class TransactionCommand(ParsedCommand):
+    """Argumentos de /despesa e /receita já convertidos"""
+    amount: Decimal
+    description: str
+    category: str
+
+
+class CommandSyntaxError(ValueError):
+    """Argumentos não batem com a gramática do comando"""
+    def __init__(self, usage: str):
+        super().__init__(usage)
+        self.usage = usage
+
+
+Parser = Callable[[str, str], ParsedCommand]
+# Handlers async (que consultam o banco) são aguardados por process_message
+Handler = Callable[[ParsedCommand], Union[str, Awaitable[str]]]
+
+
+@dataclass(frozen=True)
+class Command:
+    name: str
+    handler: Handler
+    parser: Optional[Parser] = None
+    usage: Optional[str] = None
+
+
+# Milhar com ponto: "1.500", "1.234.567", "1.234,56"
+THOUSANDS_PATTERN = r"\d{1,3}(?:\.\d{3})+(?:,\d{1,2})?"
+THOUSANDS = re.compile(THOUSANDS_PATTERN)
+
+# Aceita também "50", "50.5" e "50,50"
+AMOUNT_PATTERN = rf"{THOUSANDS_PATTERN}|\d+(?:[.,]\d{{1,2}})?"
+
+TRANSACTION_GRAMMAR = re.compile(
+    rf"^(?P<amount>{AMOUNT_PATTERN})"
+    r"\s+(?P<description>[^#]+?)"
+    r"(?:\s*#(?P<category>\S+))?\s*$"
+)
+
+DEFAULT_CATEGORY = "outros"
+
+
+def parse_amount(value: str) -> Decimal:
+    """Converte valores no formato brasileiro ou decimal simples.
+
+    Pontos seguidos de grupos de três dígitos são de milhar ("1.500" é mil e
+    quinhentos); fora disso, ponto ou vírgula separam os centavos.
+    """
+    if THOUSANDS.fullmatch(value):
+        value = value.replace(".", "")
+    value = value.replace(",", ".")
+    try:
+        return Decimal(value)
+    except InvalidOperation:
+        raise ValueError(f"Valor inválido: {value}")
+
+
+def transaction_parser(usage: str) -> Parser:
+    """Cria o parser de /despesa e /receita a partir da gramática compilada"""
+    def parse(name: str, args: str) -> TransactionCommand:
+        match = TRANSACTION_GRAMMAR.match(args)
+        if not match:
+            raise CommandSyntaxError(usage)
+        return TransactionCommand(
+            name=name,
+            args=args,
+            amount=parse_amount(match.group("amount")),
+            description=match.group("description"),
+            category=(match.group("category") or DEFAULT_CATEGORY).lower(),
+        )
+    return parse
+
+
+class CommandRegistry:
+    """Tabela de comandos indexada pelo primeiro token da mensagem"""
+
+    def __init__(self):
+        self._commands: Dict[str, Command] = {}
+
+    def __len__(self) -> int:
+        return len(self._commands)
+
+    def __contains__(self, name: str) -> bool:
+        return name.lower() in self._commands
+
+    def register(
+        self,
+        name: str,
+        handler: Handler,
+        aliases: Iterable[str] = (),
+        parser: Optional[Parser] = None,
+        usage: Optional[str] = None,
+    ) -> Command:
+        """Registra um comando e seus apelidos"""
+        command = Command(name=name, handler=handler, parser=parser, usage=usage)
+        for key in (name, *aliases):
+            key = key.lower()
+            if key in self._commands:
+                raise ValueError(f"Comando já registrado: {key}")
+            self._commands[key] = command
+        return command
+
+    def command(
+        self,
+        name: str,
+        aliases: Iterable[str] = (),
+        parser: Optional[Parser] = None,
+        usage: Optional[str] = None,
+    ):
+        """Versão decorador de register()"""
+        def decorator(handler: Handler) -> Handler:
+            self.register(name, handler, aliases=aliases, parser=parser, usage=usage)
+            return handler
+        return decorator
+
+    def parse(self, text: str, sender: Optional[str] = None) -> Optional[Tuple[Command, ParsedCommand]]:
+        """Identifica o comando e converte os argumentos, sem executá-lo"""
+        # Qualquer espaço separa o comando ("/despesa\n50", tabulação etc.)
+        parts = text.split(maxsplit=1)
+        if not parts:
+            return None
+        command = self._commands.get(parts[0].lower())
+        if command is None:
+            return None
+
+        args = parts[1].strip() if len(parts) > 1 else ""
+        if command.parser is None:
+            return command, ParsedCommand(name=command.name, args=args, sender=sender)
+        parsed = command.parser(command.name, args)
+        return command, parsed if sender is None else replace(parsed, sender=sender)
+
+    def dispatch(self, text: str, sender: Optional[str] = None) -> Optional[str]:
+        """Executa o comando correspondente; None se não houver comando"""
+        try:
+            parsed = self.parse(text, sender)
+        except CommandSyntaxError as e:
+            return f"❌ Formato inválido. Use:\n{e.usage}"
+        except ValueError as e:
+            return f"❌ {e}"
+
+        if parsed is None:
+            return None
+        command, args = parsed
+        return command.handler(args)
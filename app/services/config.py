@@ -1,14 +1,17 @@
 from decouple import config
-import termcolor
 import os
 
 
 # Caminho do arquivo .env
 ENV_PATH = ".env"
 
-# Verifica se o arquivo .env existe
-if not os.path.exists(ENV_PATH):
-    with open(ENV_PATH, "w") as env_file:
+def create_default_env(path: str = ENV_PATH) -> bool:
+    """Cria o .env com valores padrão se ele não existir (uso manual, não na importação)"""
+    if os.path.exists(path):
+        return False
+    import termcolor
+
+    with open(path, "w") as env_file:
         # Escreve as variáveis padrões no arquivo
         env_file.write("IP=127.0.0.1\n")
         env_file.write("PORT=8000\n")
@@ -23,6 +26,7 @@ if not os.path.exists(ENV_PATH):
         attrs=["bold"]
         )
     )
+    return True
 
 # Carrega as variáveis com valores padrão caso não existam
 IP = config("IP", default="127.0.0.1")
@@ -32,3 +36,6 @@ JWT_SECRET_KEY = config("JWT_SECRET_KEY", default="sua_chave_secreta_aqui")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(config("ACCESS_TOKEN_EXPIRE_MINUTES", default="30"))
 WHATSAPP_NUMBER = config("WHATSAPP_NUMBER", default="5511953238980")
 FORCE_DB_INIT = config("FORCE_DB_INIT", default=False, cast=bool)
+
+if __name__ == "__main__":
+    create_default_env()
@@ -0,0 +1,187 @@
+"""
+    Deduplicação de mensagens do webhook.
+
+O servidor Node.js reenvia a mesma mensagem quando não recebe resposta a
+tempo. Cada mensagem recebe uma chave (id do WhatsApp ou hash de remetente,
+horário e texto); a primeira entrega é processada e a resposta (corpo e
+status HTTP) guardada, as repetições recebem a mesma resposta sem executar
+o comando de novo.
+
+Há dois backends: memória (TTL + LRU, por processo) e banco de dados
+(tabela processedmessage, compartilhada entre workers).
+"""
+import hashlib
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+from sqlalchemy import delete, update
+from sqlalchemy.exc import IntegrityError
+
+from app.services.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Resposta ainda não disponível (primeira entrega em processamento)
+PENDING = object()
+
+
+class CachedResponse(NamedTuple):
+    body: Dict
+    status_code: int = 200
+
+    @classmethod
+    def load(cls, stored: Any) -> "CachedResponse":
+        # Entradas gravadas antes do status HTTP guardam só o corpo
+        if isinstance(stored, dict) and set(stored) == {"body", "status_code"}:
+            return cls(stored["body"], stored["status_code"])
+        return cls(stored)
+
+
+def message_key(message: Dict) -> Optional[str]:
+    """Chave de deduplicação; None quando não há como identificar a entrega"""
+    message_id = message.get("id")
+    if message_id:
+        if isinstance(message_id, dict):
+            message_id = message_id.get("_serialized") or json.dumps(message_id, sort_keys=True)
+        return f"id:{message_id}"
+
+    timestamp = message.get("timestamp") or message.get("t")
+    if timestamp is None:
+        return None
+    raw = f"{message.get('from', '')}|{timestamp}|{message.get('text', '')}"
+    return "hash:" + hashlib.sha256(raw.encode()).hexdigest()
+
+
+class MemoryDedupStore:
+    def __init__(self, maxsize: int = 10000, ttl: float = 600):
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    async def claim(self, key: str) -> Tuple[bool, Any]:
+        """(True, None) para a primeira entrega; (False, resposta) para repetições"""
+        cached = self.cache.get(key)
+        if cached is not None:
+            return False, cached
+        self.cache.set(key, PENDING)
+        return True, None
+
+    async def complete(self, key: str, response: Dict):
+        self.cache.set(key, response)
+
+    async def release(self, key: str):
+        """Libera a chave para que uma nova entrega seja processada (após erro)"""
+        self.cache.pop(key)
+
+
+# INSERT inicial + uma nova tentativa quando a chave some no meio da corrida
+CLAIM_ATTEMPTS = 2
+
+
+class DatabaseDedupStore:
+    """Backend compartilhado entre workers usando a chave primária como trava"""
+
+    def __init__(self, ttl: float = 600, purge_every: int = 1000):
+        self.ttl = ttl
+        self.purge_every = purge_every
+        self._claims = 0
+
+    async def claim(self, key: str) -> Tuple[bool, Any]:
+        from app.database import get_session
+        from app.db.models import ProcessedMessage
+
+        self._claims += 1
+        if self._claims % self.purge_every == 0:
+            await self.purge_expired()
+
+        for _ in range(CLAIM_ATTEMPTS):
+            try:
+                async with get_session() as session:
+                    session.add(ProcessedMessage(key=key))
+                return True, None
+            except IntegrityError:
+                async with get_session() as session:
+                    row = await session.get(ProcessedMessage, key)
+            # Linha liberada (ou expirada) entre o INSERT e a leitura: tenta de novo
+            if row is None:
+                continue
+            if row.created_at < datetime.utcnow() - timedelta(seconds=self.ttl):
+                await self.release(key)
+                continue
+            return False, json.loads(row.response) if row.response else PENDING
+        # Perdeu a corrida de novo: outro worker está com a mensagem
+        return False, PENDING
+
+    async def complete(self, key: str, response: Dict):
+        from app.database import get_session
+        from app.db.models import ProcessedMessage
+
+        async with get_session() as session:
+            await session.execute(
+                update(ProcessedMessage)
+                .where(ProcessedMessage.key == key)
+                .values(response=json.dumps(response))
+            )
+
+    async def release(self, key: str):
+        from app.database import get_session
+        from app.db.models import ProcessedMessage
+
+        async with get_session() as session:
+            await session.execute(delete(ProcessedMessage).where(ProcessedMessage.key == key))
+
+    async def purge_expired(self):
+        from app.database import get_session
+        from app.db.models import ProcessedMessage
+
+        limit = datetime.utcnow() - timedelta(seconds=self.ttl)
+        async with get_session() as session:
+            await session.execute(
+                delete(ProcessedMessage).where(ProcessedMessage.created_at < limit)
+            )
+
+
+class WebhookDeduplicator:
+    def __init__(self, store):
+        self.store = store
+        self.hits = 0
+        self.misses = 0
+
+    async def claim(self, message: Dict) -> Tuple[Optional[str], Any]:
+        """Retorna (chave, None) se a mensagem deve ser processada, ou
+        (chave, CachedResponse/PENDING) se for repetição. Sem chave, nunca
+        deduplica."""
+        if self.store is None:
+            return None, None
+        key = message_key(message)
+        if key is None:
+            return None, None
+        is_new, cached = await self.store.claim(key)
+        if is_new:
+            self.misses += 1
+            return key, None
+        self.hits += 1
+        return key, cached if cached is PENDING else CachedResponse.load(cached)
+
+    async def complete(self, key: Optional[str], response: Dict, status_code: int = 200):
+        if key is not None:
+            await self.store.complete(key, {"body": response, "status_code": status_code})
+
+    async def release(self, key: Optional[str]):
+        if key is not None:
+            await self.store.release(key)
+
+    def stats(self) -> Dict:
+        return {
+            "backend": type(self.store).__name__ if self.store else None,
+            "duplicates": self.hits,
+            "unique": self.misses,
+        }
+
+
+def create_deduplicator(backend: str, maxsize: int, ttl: float) -> WebhookDeduplicator:
+    if backend == "off":
+        return WebhookDeduplicator(None)
+    if backend == "database":
+        return WebhookDeduplicator(DatabaseDedupStore(ttl=ttl))
+    return WebhookDeduplicator(MemoryDedupStore(maxsize=maxsize, ttl=ttl))
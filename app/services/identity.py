@@ -0,0 +1,196 @@
+"""
+    Resolução de identidade: número do WhatsApp -> id do usuário.
+
+Os números são normalizados para uma forma canônica (somente dígitos, com
+DDI 55), a mesma usada no envio de mensagens. Usuários conhecidos ficam em
+cache, então o caminho quente não consulta o banco.
+
+Por padrão a busca é no esquema da API (app.db.models.User.whatsapp). Esse
+usuário exige email e senha, então lá não há cadastro automático: número
+desconhecido resolve para None. Tabelas de identidade próprias (com
+new_user) registram usuários novos com um único upsert (INSERT ... ON
+CONFLICT ... RETURNING), sem corrida no índice único quando chegam
+mensagens simultâneas.
+
+Usuários cadastrados antes da forma canônica podem ter o número salvo como
+chegou ("5511...@c.us", sem DDI etc.). Na primeira mensagem, o número é
+procurado também nessas formas e a linha encontrada passa para a forma
+canônica, em vez de um novo usuário ser registrado.
+"""
+import logging
+import re
+from datetime import datetime
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from sqlalchemy import update
+from sqlmodel import select
+
+from app.services.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+NON_DIGITS = re.compile(r"\D")
+
+# Sem usuário (cache negativo)
+MISSING = -1
+
+
+def normalize_phone(raw: str) -> str:
+    """Forma canônica do número: 55 + DDD + número, só dígitos"""
+    digits = NON_DIGITS.sub("", raw.split("@", 1)[0])
+    # DDD + número têm até 11 dígitos; acima disso o DDI já está presente
+    if len(digits) <= 11:
+        digits = "55" + digits
+    return digits
+
+
+def legacy_phones(raw: str, phone: str) -> List[str]:
+    """Formas em que o número pode ter sido salvo antes da normalização"""
+    forms = [raw.strip(), f"{phone}@c.us", f"+{phone}", phone[2:]]
+    return [form for form in dict.fromkeys(forms) if form and form != phone]
+
+
+def default_name(phone: str) -> str:
+    return f"User_{phone[-4:]}"
+
+
+def new_phone_user(phone: str) -> Dict:
+    """Colunas de um usuário novo em tabelas de identidade do bot (phone, name...)"""
+    return {"name": default_name(phone), "created_at": datetime.utcnow(), "is_active": True}
+
+
+class Identity(NamedTuple):
+    """Identidade leve do remetente (sem carregar o usuário do banco)"""
+    id: int
+    phone: str
+
+
+class IdentityResolver:
+    def __init__(
+        self,
+        session_factory=None,
+        model=None,
+        column: str = "whatsapp",
+        new_user: Optional[Callable[[str], Dict]] = None,
+        ttl: float = 3600,
+        negative_ttl: float = 60,
+        maxsize: int = 100000,
+    ):
+        self._session_factory = session_factory
+        self._model = model
+        self.column = column
+        # new_user(phone) -> demais colunas de um usuário novo; sem ele não há cadastro
+        self.new_user = new_user
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.negative = TTLCache(maxsize=maxsize, ttl=negative_ttl)
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def model(self):
+        if self._model is None:
+            from app.db.models import User
+            self._model = User
+        return self._model
+
+    @property
+    def phone_column(self):
+        return getattr(self.model, self.column)
+
+    def _session(self):
+        if self._session_factory is None:
+            from app.database import get_session
+            self._session_factory = get_session
+        return self._session_factory()
+
+    async def resolve(self, phone: str, register: bool = True) -> Optional[int]:
+        """Id do usuário dono do número, ou None.
+
+        Com register=True e new_user configurado, registra o usuário novo.
+        """
+        raw, phone = phone, normalize_phone(phone)
+        user_id = self.cache.get(phone)
+        if user_id is not None:
+            self.hits += 1
+            return user_id
+        register = register and self.new_user is not None
+        if not register and self.negative.get(phone) == MISSING:
+            self.hits += 1
+            return None
+
+        self.misses += 1
+        async with self._session() as session:
+            user_id = await self._lookup(session, raw, phone)
+            if user_id is None and register:
+                user_id = await self._upsert(session, phone)
+        if user_id is None:
+            self.negative.set(phone, MISSING)
+            return None
+
+        self.negative.pop(phone)
+        self.cache.set(phone, user_id)
+        return user_id
+
+    def invalidate(self, phone: str):
+        phone = normalize_phone(phone)
+        self.cache.pop(phone)
+        self.negative.pop(phone)
+
+    async def _lookup(self, session, raw: str, phone: str) -> Optional[int]:
+        """Busca pela forma canônica e pelas formas antigas do número"""
+        User, column = self.model, self.phone_column
+        result = await session.execute(
+            select(User.id, column)
+            .where(column.in_([phone, *legacy_phones(raw, phone)]))
+            .order_by(User.id)
+        )
+        rows = result.all()
+        for user_id, stored in rows:
+            if stored == phone:
+                return user_id
+        if not rows:
+            return None
+
+        user_id, stored = rows[0]
+        logger.info("📇 Número de usuário migrado para a forma canônica", extra={"user_id": user_id})
+        await session.execute(update(User).where(User.id == user_id).values({self.column: phone}))
+        return user_id
+
+    async def _upsert(self, session, phone: str) -> int:
+        User, column = self.model, self.phone_column
+        values = {**self.new_user(phone), self.column: phone}
+        dialect = session.bind.dialect.name
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        elif dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            return await self._insert_or_select(session, values)
+
+        stmt = insert(User).values(**values)
+        # DO UPDATE sem efeito faz o RETURNING devolver também a linha existente
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[column],
+            set_={self.column: stmt.excluded[self.column]},
+        ).returning(User.id)
+        result = await session.execute(stmt)
+        return result.scalar_one()
+
+    async def _insert_or_select(self, session, values) -> int:
+        """Fallback para bancos sem ON CONFLICT"""
+        User = self.model
+        result = await session.execute(select(User.id).where(self.phone_column == values[self.column]))
+        user_id = result.scalar_one_or_none()
+        if user_id is None:
+            user = User(**values)
+            session.add(user)
+            await session.flush()
+            user_id = user.id
+        return user_id
+
+    def stats(self):
+        return {"cached": len(self.cache), "hits": self.hits, "misses": self.misses}
+
+
+# Instância global
+identity_resolver = IdentityResolver()
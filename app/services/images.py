@@ -0,0 +1,104 @@
+"""
+    Saída das imagens geradas (gráficos e QR codes do PIX).
+
+As imagens circulam como bytes; base64 só na borda JSON (to_base64), porque
+ele aumenta o payload em ~33% e cria cópias extras. Por HTTP, a rota envia
+os bytes com ETag pelo hash do conteúdo (etag, etag_matches).
+
+Formatos: "png" (cores reais), "png8" (paleta quantizada, ideal para as
+cores chapadas dos gráficos), "webp" (sem perdas) e "svg" (só gráficos do
+backend lite; o QR code do PIX aceita só os rasterizados, verificados na
+partida por check_raster_format). Presets de tamanho limitam a largura: "whatsapp" ocupa a
+tela do celular sem sobra, já que o WhatsApp recomprime imagens maiores.
+"""
+import base64
+import hashlib
+import io
+from typing import Optional
+
+# Largura máxima (px) por preset; None mantém o tamanho de desenho
+PRESETS = {
+    "whatsapp": 800,
+    "thumbnail": 400,
+    "desktop": None,
+}
+
+MEDIA_TYPES = {
+    "png": "image/png",
+    "png8": "image/png",
+    "webp": "image/webp",
+    "svg": "image/svg+xml",
+}
+
+# Formatos que encode() gera a partir de uma imagem do Pillow
+RASTER_FORMATS = ("png", "png8", "webp")
+
+PALETTE_COLORS = 64
+
+
+def check_format(fmt: str) -> str:
+    if fmt not in MEDIA_TYPES:
+        raise ValueError(f"Formato de imagem não suportado: {fmt}")
+    return fmt
+
+
+def check_raster_format(fmt: str) -> str:
+    if fmt not in RASTER_FORMATS:
+        raise ValueError(f"Formato de imagem não suportado: {fmt} (use {', '.join(RASTER_FORMATS)})")
+    return fmt
+
+
+def scale(width: int, preset: Optional[str]) -> float:
+    """Fator para caber na largura do preset (nunca amplia)"""
+    if preset is None:
+        return 1.0
+    try:
+        limit = PRESETS[preset]
+    except KeyError:
+        raise ValueError(f"Preset de imagem desconhecido: {preset}") from None
+    return min(1.0, limit / width) if limit else 1.0
+
+
+def encode(image, fmt: str) -> bytes:
+    """Codifica uma imagem do Pillow em png, png8 ou webp"""
+    buffer = io.BytesIO()
+    if fmt == "png":
+        image.save(buffer, format="PNG")
+    elif fmt == "png8" and image.mode in ("1", "L", "P"):
+        # Já tem poucas cores (QR code): só compacta
+        image.save(buffer, format="PNG", optimize=True)
+    elif fmt == "png8":
+        from PIL import Image
+
+        # optimize=True reduziria ~25% a mais, mas dobra o tempo de codificação
+        image = image.convert("RGB").quantize(PALETTE_COLORS, method=Image.Quantize.FASTOCTREE)
+        image.save(buffer, format="PNG")
+    elif fmt == "webp":
+        image.save(buffer, format="WEBP", lossless=True, quality=50, method=1)
+    else:
+        raise ValueError(f"Formato de imagem não suportado: {fmt}")
+    return buffer.getvalue()
+
+
+def etag(data: bytes) -> str:
+    """ETag forte pelo hash do conteúdo"""
+    return '"' + hashlib.blake2b(data, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: str, tag: str) -> bool:
+    """Se o cabeçalho If-None-Match (lista, "*" ou tags W/) inclui a tag"""
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        # Comparação fraca, como manda a RFC 9110 para If-None-Match
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == tag:
+            return True
+    return False
+
+
+def to_base64(data: bytes) -> str:
+    """Só para respostas JSON"""
+    return base64.b64encode(data).decode()
@@ -0,0 +1,328 @@
+"""
+    Importação em massa de transações (CSV e OFX).
+
+O arquivo é lido linha a linha, sem carregar tudo na memória. Cada linha é
+validada e as válidas são inseridas em lotes grandes: INSERT multi-linha
+no Postgres e executemany no SQLite. Saldo da conta e totais mensais são
+atualizados uma vez por lote, na mesma transação do banco.
+
+Linhas inválidas não interrompem a importação: entram no relatório com o
+número da linha e o motivo.
+"""
+import asyncio
+import csv
+import io
+import logging
+import re
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import insert, update
+from sqlmodel import select
+
+from app.config import IMPORT_BATCH_SIZE
+from app.db.routing import note_write
+from app.services.rollups import api_rollup
+
+logger = logging.getLogger(__name__)
+
+MAX_REPORTED_ERRORS = 100
+# Limite de parâmetros por comando no protocolo do Postgres
+POSTGRES_MAX_PARAMS = 32767
+
+FORMATS = ("csv", "ofx")
+
+# Cabeçalhos aceitos no CSV (pt e en) -> campo
+CSV_HEADERS = {
+    "data": "date", "date": "date",
+    "descricao": "description", "descrição": "description", "description": "description",
+    "historico": "description", "histórico": "description", "memo": "description",
+    "valor": "amount", "amount": "amount",
+    "tipo": "type", "type": "type",
+    "categoria": "category", "category": "category",
+}
+
+TYPES = {
+    "income": "income", "receita": "income", "credit": "income", "credito": "income", "crédito": "income",
+    "expense": "expense", "despesa": "expense", "debit": "expense", "debito": "expense", "débito": "expense",
+}
+
+DATE_FORMATS = ("%Y-%m-%d", "%d/%m/%Y", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d %H:%M:%S", "%Y%m%d%H%M%S", "%Y%m%d")
+
+# Dígitos com '.' ou ',' (milhar e decimal), sem expoente nem "Infinity"/"NaN"
+AMOUNT = re.compile(r"[+-]?[\d.,]*\d")
+
+OFX_TAG = re.compile(r"<(/?)(\w+)>([^<\r\n]*)")
+
+Record = Tuple[int, Dict[str, str]]
+
+
+@dataclass(frozen=True)
+class RowError:
+    line: int
+    message: str
+
+
+@dataclass
+class ImportReport:
+    rows: int = 0
+    inserted: int = 0
+    batches: int = 0
+    error_count: int = 0
+    errors: List[RowError] = field(default_factory=list)
+    elapsed: float = 0.0
+    rows_per_sec: float = 0.0
+
+    def error(self, line: int, message: str):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(RowError(line, message))
+
+
+def parse_date(value: str) -> datetime:
+    value = value.strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    raise ValueError(f"Data inválida: {value}")
+
+
+def decimal_separator(value: str) -> Optional[str]:
+    """Separador decimal que o próprio valor revela; None se não há como saber.
+
+    Com '.' e ',' o último é o decimal; um separador repetido é de milhar.
+    Um único separador é decimal, salvo quando seguido de três dígitos
+    ("1.500" pode ser mil e quinhentos ou um e meio).
+    """
+    dots, commas = value.count("."), value.count(",")
+    if dots and commas:
+        return "." if value.rfind(".") > value.rfind(",") else ","
+    if dots > 1 or commas > 1:
+        return "," if dots else "."
+    if dots or commas:
+        separator = "." if dots else ","
+        if len(value) - value.index(separator) - 1 != 3:
+            return separator
+    return None
+
+
+def parse_amount(value: str, decimal: Optional[str] = None) -> Decimal:
+    """Valor de extrato em qualquer convenção ("1.234,56", "1,234.56", "-25.50").
+
+    decimal é o separador decimal do arquivo, quando já conhecido; sem ele,
+    um valor como "1.500" é recusado como ambíguo.
+    """
+    value = value.replace("R$", "").replace(" ", "")
+    if not AMOUNT.fullmatch(value):
+        raise ValueError(f"Valor inválido: {value}")
+    separator = decimal_separator(value)
+    if separator is None and ("." in value or "," in value):
+        if decimal is None:
+            raise ValueError(f"Valor ambíguo: {value} (separador de milhar ou decimal?)")
+        separator = decimal
+    if separator and separator in value:
+        integer, _, fraction = value.rpartition(separator)
+        value = integer.replace(".", "").replace(",", "") + "." + fraction
+    else:
+        value = value.replace(".", "").replace(",", "")
+    try:
+        amount = Decimal(value)
+    except InvalidOperation:
+        raise ValueError(f"Valor inválido: {value}") from None
+    if not amount.is_finite():
+        raise ValueError(f"Valor inválido: {value}")
+    return amount
+
+
+class AmountConvention:
+    """Separador decimal de um arquivo, inferido uma vez.
+
+    Vem do formato ('.' no OFX) ou do primeiro valor que não deixa dúvida
+    ("25,50", "1.234,56"); a partir dele "1.500" deixa de ser ambíguo.
+    """
+
+    def __init__(self, decimal: Optional[str] = None):
+        self.decimal = decimal
+
+    def parse(self, value: str) -> Decimal:
+        if self.decimal is None:
+            self.decimal = decimal_separator(value.replace("R$", "").replace(" ", ""))
+        return parse_amount(value, self.decimal)
+
+
+def csv_records(stream) -> Iterator[Record]:
+    """Linhas do CSV com os cabeçalhos normalizados (',' ou ';')"""
+    header_line = stream.readline()
+    delimiter = ";" if header_line.count(";") > header_line.count(",") else ","
+    header = next(csv.reader([header_line], delimiter=delimiter), [])
+    fields = [CSV_HEADERS.get(name.strip().lower()) for name in header]
+    if "date" not in fields or "amount" not in fields:
+        raise ValueError("CSV precisa das colunas data e valor")
+
+    reader = csv.reader(stream, delimiter=delimiter)
+    for values in reader:
+        if not any(v.strip() for v in values):
+            continue
+        # line_num conta a partir da segunda linha do arquivo
+        yield reader.line_num + 1, {f: v for f, v in zip(fields, values) if f}
+
+
+def ofx_records(stream) -> Iterator[Record]:
+    """Blocos <STMTTRN> do OFX (SGML ou XML)"""
+    record: Optional[Dict[str, str]] = None
+    start = 0
+    for number, line in enumerate(stream, 1):
+        for closing, tag, value in OFX_TAG.findall(line):
+            tag = tag.upper()
+            if tag == "STMTTRN":
+                if closing and record is not None:
+                    yield start, record
+                    record = None
+                elif not closing:
+                    record, start = {}, number
+            elif record is not None and not closing and value.strip():
+                record[tag] = value.strip()
+
+
+def ofx_fields(record: Dict[str, str]) -> Dict[str, str]:
+    return {
+        "date": record.get("DTPOSTED", "")[:14].split("[")[0],
+        "amount": record.get("TRNAMT", ""),
+        "description": record.get("MEMO") or record.get("NAME", ""),
+    }
+
+
+def parse_record(fields: Dict[str, str], categories: Dict[str, int], amounts: AmountConvention) -> Dict:
+    """Valida uma linha e devolve (data, descrição, valor, tipo, categoria)"""
+    raw = (fields.get("amount") or "").strip()
+    if not raw:
+        raise ValueError("Valor ausente")
+    amount = amounts.parse(raw)
+
+    type_ = (fields.get("type") or "").strip().lower()
+    if type_:
+        if type_ not in TYPES:
+            raise ValueError(f"Tipo inválido: {type_}")
+        type_ = TYPES[type_]
+    else:
+        type_ = "expense" if amount < 0 else "income"
+    amount = abs(amount)
+    if amount == 0:
+        raise ValueError("Valor zerado")
+
+    category = (fields.get("category") or "").strip().lower()
+    return {
+        "date": parse_date(fields.get("date") or ""),
+        "description": (fields.get("description") or "").strip(),
+        "amount": float(amount),
+        "type": type_,
+        "category_id": categories.get(category),
+    }
+
+
+class TransactionImporter:
+    """Importa transações de um arquivo para uma conta (app.db.models)"""
+
+    def __init__(self, session, owner_id: int, account_id: int, batch_size: int = IMPORT_BATCH_SIZE):
+        self.session = session
+        self.owner_id = owner_id
+        self.account_id = account_id
+        self.batch_size = batch_size
+        self.dialect = session.bind.dialect.name
+
+    async def categories(self) -> Dict[str, int]:
+        from app.db.models import Category
+        result = await self.session.execute(select(Category.name, Category.id))
+        return {name.lower(): id for name, id in result}
+
+    def records(self, stream, format: str) -> Iterator[Record]:
+        if format == "ofx":
+            return ((line, ofx_fields(record)) for line, record in ofx_records(stream))
+        return csv_records(stream)
+
+    def next_batch(
+        self,
+        records: Iterator[Record],
+        categories: Dict[str, int],
+        amounts: AmountConvention,
+        report: ImportReport,
+    ) -> Tuple[List[Dict], bool]:
+        """Lê e valida o próximo lote (roda em thread: a leitura do arquivo bloqueia)"""
+        rows = []
+        count = 0
+        for line, fields in islice(records, self.batch_size):
+            count += 1
+            try:
+                row = parse_record(fields, categories, amounts)
+            except ValueError as e:
+                report.error(line, str(e))
+                continue
+            except ArithmeticError:
+                # Ex.: operações com Decimal; a linha é descartada sem abortar o lote
+                report.error(line, "Valor inválido")
+                continue
+            row.update(owner_id=self.owner_id, account_id=self.account_id)
+            rows.append(row)
+        report.rows += count
+        return rows, count == self.batch_size
+
+    async def insert_batch(self, rows: List[Dict]):
+        from app.db.models import Account, Transaction
+
+        if self.dialect == "postgresql":
+            # INSERT ... VALUES (...), (...): um comando por bloco de linhas
+            chunk = POSTGRES_MAX_PARAMS // len(rows[0])
+            for i in range(0, len(rows), chunk):
+                await self.session.execute(insert(Transaction).values(rows[i:i + chunk]))
+        else:
+            await self.session.execute(insert(Transaction), rows)
+
+        delta = sum(r["amount"] if r["type"] == "income" else -r["amount"] for r in rows)
+        await self.session.execute(
+            update(Account).where(Account.id == self.account_id).values(balance=Account.balance + delta)
+        )
+
+        rollup = api_rollup()
+        totals = rollup.aggregate(
+            (self.owner_id, r["date"], r["category_id"], r["type"], r["amount"]) for r in rows
+        )
+        await self.session.execute(rollup.upsert(self.dialect, totals))
+        note_write(self.session, self.owner_id)
+        await self.session.commit()
+
+    async def run(self, binary_stream, format: str = "csv") -> ImportReport:
+        """Importa o arquivo (binário); cada lote é confirmado separadamente"""
+        if format not in FORMATS:
+            raise ValueError(f"Formato não suportado: {format}")
+
+        report = ImportReport()
+        started = time.perf_counter()
+        categories = await self.categories()
+        # OFX usa sempre '.'; no CSV a convenção vem dos próprios valores
+        amounts = AmountConvention("." if format == "ofx" else None)
+        stream = io.TextIOWrapper(binary_stream, encoding="utf-8-sig", errors="replace", newline="")
+        try:
+            records = self.records(stream, format)
+            more = True
+            while more:
+                rows, more = await asyncio.to_thread(self.next_batch, records, categories, amounts, report)
+                if rows:
+                    await self.insert_batch(rows)
+                    report.inserted += len(rows)
+                    report.batches += 1
+        finally:
+            stream.detach()
+
+        report.elapsed = round(time.perf_counter() - started, 3)
+        report.rows_per_sec = round(report.rows / report.elapsed, 1) if report.elapsed else 0.0
+        logger.info(
+            "📥 Importação: %d linhas, %d inseridas, %d erros em %.2fs (%.0f linhas/s)",
+            report.rows, report.inserted, report.error_count, report.elapsed, report.rows_per_sec,
+        )
+        return report
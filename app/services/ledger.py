@@ -0,0 +1,202 @@
+"""
+    Saldo materializado por usuário.
+
+A tabela balance guarda o saldo de cada usuário e é atualizada na mesma
+transação do banco que insere ou exclui a transação financeira, então
+/saldo vira uma leitura por chave primária. O saldo é a soma das receitas
+menos a soma das despesas.
+
+Usuários com histórico anterior ao ledger recebem a linha na primeira
+escrita ou leitura (calculada com um único SUM). A reconciliação compara o
+saldo guardado com o recalculado e corrige divergências; roda em segundo
+plano pelo scheduler.
+"""
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+from typing import List, Optional
+
+from sqlalchemy import case, func, update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select
+
+logger = logging.getLogger(__name__)
+
+ZERO = Decimal("0.00")
+CENTS = Decimal("0.01")
+
+
+@dataclass(frozen=True)
+class Drift:
+    user_id: int
+    stored: Optional[Decimal]  # None: usuário sem linha no ledger
+    actual: Decimal
+
+
+def money(value) -> Decimal:
+    """Valor em centavos (o SQLite devolve somas de Numeric como float)"""
+    return Decimal(str(value)).quantize(CENTS)
+
+
+def signed_amount(type: str, amount) -> Decimal:
+    """Efeito da transação no saldo: receita soma, despesa subtrai"""
+    amount = Decimal(str(amount))
+    return amount if type == "income" else -amount
+
+
+class BalanceLedger:
+    def __init__(self, session_factory=None, transaction_model=None, balance_model=None):
+        self._session_factory = session_factory
+        self._transaction_model = transaction_model
+        self._balance_model = balance_model
+        self.reads = 0
+        self.seeds = 0
+
+    @property
+    def transaction_model(self):
+        if self._transaction_model is None:
+            from app.models import Transaction
+            self._transaction_model = Transaction
+        return self._transaction_model
+
+    @property
+    def balance_model(self):
+        if self._balance_model is None:
+            from app.models import Balance
+            self._balance_model = Balance
+        return self._balance_model
+
+    def _session(self):
+        if self._session_factory is None:
+            from app.database import get_session
+            self._session_factory = get_session
+        return self._session_factory()
+
+    def _signed_sum(self):
+        Transaction = self.transaction_model
+        signed = case((Transaction.type == "income", Transaction.amount), else_=-Transaction.amount)
+        return func.coalesce(func.sum(signed), 0)
+
+    async def compute(self, session, user_id: int) -> Decimal:
+        """Saldo recalculado a partir das transações (um SUM no banco)"""
+        Transaction = self.transaction_model
+        result = await session.execute(
+            select(self._signed_sum()).where(Transaction.user_id == user_id)
+        )
+        return money(result.scalar_one())
+
+    async def apply(self, session, user_id: int, delta: Decimal):
+        """Soma delta ao saldo dentro da transação do chamador.
+
+        A transação financeira já deve ter sido adicionada à sessão: se o
+        usuário ainda não tem linha, ela é criada com o saldo recalculado
+        (que já inclui a transação nova)."""
+        Balance = self.balance_model
+        result = await session.execute(
+            update(Balance)
+            .where(Balance.user_id == user_id)
+            .values(amount=Balance.amount + delta, updated_at=datetime.utcnow())
+        )
+        if result.rowcount:
+            return
+
+        await session.flush()
+        if not await self._seed(session, user_id, await self.compute(session, user_id)):
+            # Outra requisição criou a linha antes (já com o seu próprio delta)
+            await session.execute(
+                update(Balance)
+                .where(Balance.user_id == user_id)
+                .values(amount=Balance.amount + delta, updated_at=datetime.utcnow())
+            )
+
+    async def _seed(self, session, user_id: int, amount: Decimal) -> bool:
+        """Cria a linha do usuário; False se ela já existir"""
+        Balance = self.balance_model
+        values = {"user_id": user_id, "amount": amount, "updated_at": datetime.utcnow()}
+        dialect = session.bind.dialect.name
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        elif dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            try:
+                async with session.begin_nested():
+                    session.add(Balance(**values))
+                self.seeds += 1
+                return True
+            except IntegrityError:
+                return False
+
+        stmt = insert(Balance).values(**values).on_conflict_do_nothing(index_elements=[Balance.user_id])
+        result = await session.execute(stmt)
+        if result.rowcount:
+            self.seeds += 1
+        return bool(result.rowcount)
+
+    async def balance(self, user_id: int) -> Decimal:
+        """Saldo do usuário: leitura por chave primária"""
+        self.reads += 1
+        async with self._session() as session:
+            row = await session.get(self.balance_model, user_id)
+            if row is not None:
+                return money(row.amount)
+
+            # Histórico anterior ao ledger: calcula uma vez e guarda
+            amount = await self.compute(session, user_id)
+            if not await self._seed(session, user_id, amount):
+                row = await session.get(self.balance_model, user_id, populate_existing=True)
+                amount = row.amount
+            return money(amount)
+
+    async def reconcile(self, repair: bool = True) -> List[Drift]:
+        """Compara o saldo guardado com o recalculado de todos os usuários"""
+        Transaction = self.transaction_model
+        Balance = self.balance_model
+        async with self._session() as session:
+            result = await session.execute(
+                select(Transaction.user_id, self._signed_sum()).group_by(Transaction.user_id)
+            )
+            actual = {user_id: money(total) for user_id, total in result}
+            result = await session.execute(select(Balance.user_id, Balance.amount))
+            stored = {user_id: money(amount) for user_id, amount in result}
+
+            drifts = [
+                Drift(user_id, stored.get(user_id), actual.get(user_id, ZERO))
+                for user_id in sorted(actual.keys() | stored.keys())
+                if stored.get(user_id) != actual.get(user_id, ZERO)
+            ]
+            # Usuário sem transações e sem linha não é divergência
+            drifts = [d for d in drifts if not (d.stored is None and d.actual == ZERO)]
+
+            if drifts:
+                logger.warning("⚠️ Saldo divergente em %d usuário(s)", len(drifts))
+            if repair:
+                for drift in drifts:
+                    await self._repair(session, drift.user_id)
+            return drifts
+
+    async def _repair(self, session, user_id: int):
+        """Recalcula com a linha travada: escritas concorrentes esperam e
+        aplicam o delta depois, sobre o valor corrigido"""
+        Balance = self.balance_model
+        result = await session.execute(
+            select(Balance.user_id).where(Balance.user_id == user_id).with_for_update()
+        )
+        exists = result.scalar_one_or_none() is not None
+        amount = await self.compute(session, user_id)
+        if not exists:
+            await self._seed(session, user_id, amount)
+            return
+        await session.execute(
+            update(Balance)
+            .where(Balance.user_id == user_id)
+            .values(amount=amount, updated_at=datetime.utcnow())
+        )
+
+    def stats(self):
+        return {"reads": self.reads, "seeds": self.seeds}
+
+
+# Instância global
+balance_ledger = BalanceLedger()
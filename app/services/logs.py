@@ -0,0 +1,171 @@
+"""
+    Configuração de logging da aplicação.
+
+Formatos "text" (padrão atual), "json" e "logfmt". Com LOG_ASYNC os
+registros vão para uma fila e são formatados e escritos por uma thread em
+segundo plano, então o event loop nunca bloqueia em I/O de log nem paga a
+formatação da mensagem. LOG_SAMPLING define, por logger, a fração dos
+registros INFO/DEBUG que são mantidos (avisos e erros nunca são
+descartados), ex.: "app.routes.whatsapp=0.1,app.services.whatsapp=0.05".
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+TEXT_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+
+# Atributos padrão do LogRecord (o resto vem de extra=...)
+RESERVED_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+def record_fields(record: logging.LogRecord) -> Dict:
+    fields = {
+        "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+        "level": record.levelname.lower(),
+        "logger": record.name,
+        "msg": record.getMessage(),
+    }
+    for key, value in vars(record).items():
+        if key not in RESERVED_ATTRS and not key.startswith("_"):
+            fields[key] = value
+    return fields
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        fields = record_fields(record)
+        if record.exc_info:
+            fields["exc"] = self.formatException(record.exc_info)
+        return json.dumps(fields, ensure_ascii=False, default=str)
+
+
+class LogfmtFormatter(logging.Formatter):
+    @staticmethod
+    def _value(value) -> str:
+        value = str(value)
+        if not value or any(c in value for c in ' ="\n'):
+            value = '"' + value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        return value
+
+    def format(self, record: logging.LogRecord) -> str:
+        fields = record_fields(record)
+        if record.exc_info:
+            fields["exc"] = self.formatException(record.exc_info)
+        return " ".join(f"{key}={self._value(value)}" for key, value in fields.items())
+
+
+class SamplingFilter(logging.Filter):
+    """Mantém só uma fração dos registros abaixo de WARNING por logger"""
+
+    def __init__(self, rates: Dict[str, float], rng=random.random):
+        super().__init__()
+        self.rates = rates
+        self._rng = rng
+        self._cache: Dict[str, float] = {}
+
+    def rate_for(self, name: str) -> float:
+        rate = self._cache.get(name)
+        if rate is None:
+            # Regra do logger mais específico (app.routes vale para app.routes.whatsapp)
+            rate = 1.0
+            prefix = name
+            while prefix:
+                if prefix in self.rates:
+                    rate = self.rates[prefix]
+                    break
+                prefix = prefix.rpartition(".")[0]
+            self._cache[name] = rate
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rate_for(record.name)
+        return rate >= 1.0 or self._rng() < rate
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler que não formata na thread de origem e descarta se a fila encher"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # A formatação fica para a thread do QueueListener
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def parse_sampling(spec: str) -> Dict[str, float]:
+    rates = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, rate = item.partition("=")
+        rates[name.strip()] = float(rate)
+    return rates
+
+
+def build_formatter(fmt: str) -> logging.Formatter:
+    if fmt == "json":
+        return JsonFormatter()
+    if fmt == "logfmt":
+        return LogfmtFormatter()
+    return logging.Formatter(TEXT_FORMAT)
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def setup_logging(
+    level: str = "INFO",
+    fmt: str = "text",
+    use_queue: bool = False,
+    sampling: str = "",
+    queue_size: int = 10000,
+    stream=None,
+) -> logging.Logger:
+    """Configura o logger raiz; pode ser chamada de novo (substitui a anterior)"""
+    global _listener
+    shutdown_logging()
+
+    handler = logging.StreamHandler(stream or sys.stderr)
+    handler.setFormatter(build_formatter(fmt))
+
+    root = logging.getLogger()
+    for old in list(root.handlers):
+        root.removeHandler(old)
+    root.setLevel(level.upper() if isinstance(level, str) else level)
+
+    if use_queue:
+        log_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        front = NonBlockingQueueHandler(log_queue)
+        _listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+    else:
+        front = handler
+
+    rates = parse_sampling(sampling)
+    if rates:
+        front.addFilter(SamplingFilter(rates))
+    root.addHandler(front)
+    return root
+
+
+def shutdown_logging():
+    """Esvazia a fila e para a thread de escrita"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -1,12 +1,46 @@
 from datetime import datetime, timedelta
-from typing import List, Optional
+from typing import Dict, List, Optional
 from sqlalchemy.orm import Session
 from app.db.models import User, Bill, Transaction, Goal
 from app.services.whatsapp import WhatsAppService
+from app.services.outbox import NotificationOutbox
+from app.config import (
+    NOTIFY_DIGEST_WINDOW,
+    NOTIFY_RECIPIENT_RATE,
+    NOTIFY_GLOBAL_RATE,
+    NOTIFY_MAX_PENDING,
+)
+
+def format_monthly_report(summary: Dict, insights: List[str]) -> str:
+    message = "📊 Relatório Mensal\n\n"
+    message += f"💰 Receitas: R$ {summary['total_income']:.2f}\n"
+    message += f"💸 Despesas: R$ {summary['total_expense']:.2f}\n"
+    message += f"📈 Saldo: R$ {summary['balance']:.2f}\n\n"
+    
+    if insights:
+        message += "💡 Insights:\n"
+        for insight in insights:
+            message += f"- {insight}\n"
+    return message
 
 class NotificationService:
-    def __init__(self, whatsapp_service: WhatsAppService):
+    def __init__(
+        self,
+        whatsapp_service: WhatsAppService,
+        outbox: Optional[NotificationOutbox] = None
+    ):
         self.whatsapp = whatsapp_service
+        self.outbox = outbox or NotificationOutbox(
+            whatsapp_service.send_message,
+            window=NOTIFY_DIGEST_WINDOW,
+            recipient_rate=NOTIFY_RECIPIENT_RATE,
+            global_rate=NOTIFY_GLOBAL_RATE,
+            max_pending=NOTIFY_MAX_PENDING,
+        )
+
+    async def flush(self):
+        """Envia os resumos pendentes de todos os usuários"""
+        await self.outbox.flush_all()
 
     async def check_bills(self, user: User, db: Session):
         """Verifica contas próximas do vencimento"""
@@ -24,7 +58,7 @@ class NotificationService:
                 message += f"- {bill.description}: R$ {bill.amount:.2f} "
                 message += f"(vence em {bill.due_date.strftime('%d/%m')})\n"
             
-            await self.whatsapp.send_message(user.whatsapp, message)
+            await self.outbox.send(user.whatsapp, message)
 
     async def check_balance_alerts(self, user: User, db: Session):
         """Verifica alertas de saldo"""
@@ -32,7 +66,7 @@ class NotificationService:
             if account.balance < 100:
                 message = f"⚠️ Alerta de saldo baixo na conta {account.name}:\n"
                 message += f"Saldo atual: R$ {account.balance:.2f}"
-                await self.whatsapp.send_message(user.whatsapp, message)
+                await self.outbox.send(user.whatsapp, message)
 
     async def check_goals(self, user: User, db: Session):
         """Verifica progresso das metas"""
@@ -43,27 +77,23 @@ class NotificationService:
                 message = f"🎯 Meta: {goal.name}\n"
                 message += f"Progresso: {progress:.1f}%\n"
                 message += f"Faltam {days_left} dias para o prazo final!"
-                await self.whatsapp.send_message(user.whatsapp, message)
+                await self.outbox.send(user.whatsapp, message)
 
     async def send_monthly_report(self, user: User, db: Session):
         """Envia relatório mensal"""
         from app.services.analytics import FinancialAnalytics
         
         summary = await FinancialAnalytics.monthly_summary(user, db)
-        insights = await FinancialAnalytics.generate_insights(user, db)
-        
-        message = "📊 Relatório Mensal\n\n"
-        message += f"💰 Receitas: R$ {summary['total_income']:.2f}\n"
-        message += f"💸 Despesas: R$ {summary['total_expense']:.2f}\n"
-        message += f"📈 Saldo: R$ {summary['balance']:.2f}\n\n"
-        
-        if insights:
-            message += "💡 Insights:\n"
-            for insight in insights:
-                message += f"- {insight}\n"
+        insights = await FinancialAnalytics.generate_insights(user, db, summary)
+        await self.outbox.send(user.whatsapp, format_monthly_report(summary, insights))
+
+    async def send_monthly_reports(self, db: Session):
+        """Envia o relatório mensal de todos os usuários ativos (uma consulta)"""
+        from app.services.analytics import FinancialAnalytics
         
-        await self.whatsapp.send_message(user.whatsapp, message)
+        for report in FinancialAnalytics.batch_insights(db):
+            await self.outbox.send(report.whatsapp, format_monthly_report(report.summary, report.insights))
 
     async def send_alert(self, user: User, message: str):
         """Envia alerta genérico"""
-        await self.whatsapp.send_message(user.whatsapp, message) 
\ No newline at end of file
+        await self.outbox.send(user.whatsapp, message) 
\ No newline at end of file
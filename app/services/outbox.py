@@ -0,0 +1,181 @@
+"""
+    Saída de notificações para o WhatsApp.
+
+Mensagens para o mesmo destinatário dentro de uma janela curta são
+agrupadas em um único resumo, e os envios passam por token buckets (um
+global e um por destinatário) para não estourar o servidor Node.js nem os
+limites do WhatsApp.
+
+send() devolve o que aconteceu com a mensagem (Outcome): adiada para o
+resumo, enviada/falhou (janela zero) ou descartada (fila cheia).
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from enum import Enum
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+Sender = Callable[[str, str], Awaitable[bool]]
+
+DIGEST_SEPARATOR = "\n\n➖➖➖➖➖\n\n"
+
+
+class Outcome(str, Enum):
+    DEFERRED = "deferred"
+    SENT = "sent"
+    FAILED = "failed"
+    DROPPED = "dropped"
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: Optional[float] = None, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self._clock = clock
+        self._updated = clock()
+        self._waiters: deque = deque()
+
+    def _refill(self):
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    @property
+    def full(self) -> bool:
+        self._refill()
+        return self.tokens >= self.capacity
+
+    def try_acquire(self) -> float:
+        """Consome um token; retorna 0 ou quantos segundos faltam para haver um"""
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    async def acquire(self):
+        """Espera um token, por ordem de chegada.
+
+        Só o primeiro da fila dorme até o próximo token; os demais esperam
+        ser acordados um a um, sem acordar todos a cada token liberado.
+        """
+        if not self._waiters and not self.try_acquire():
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            if len(self._waiters) > 1:
+                await waiter
+            while True:
+                wait = self.try_acquire()
+                if not wait:
+                    return
+                await asyncio.sleep(wait)
+        finally:
+            self._waiters.remove(waiter)
+            if self._waiters and not self._waiters[0].done():
+                self._waiters[0].set_result(None)
+
+
+class NotificationOutbox:
+    def __init__(
+        self,
+        sender: Sender,
+        window: float = 2.0,
+        recipient_rate: float = 0.2,
+        recipient_burst: float = 1,
+        global_rate: float = 20.0,
+        max_buckets: int = 10000,
+        max_pending: int = 100000,
+    ):
+        self._sender = sender
+        self.window = window
+        self.recipient_rate = recipient_rate
+        self.recipient_burst = recipient_burst
+        self.global_bucket = TokenBucket(global_rate)
+        self.max_buckets = max_buckets
+        self.max_pending = max_pending
+        self._pending_count = 0
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._pending: Dict[str, List[str]] = {}
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+        # Contadores
+        self.queued = 0
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+
+    def _bucket(self, to: str) -> TokenBucket:
+        bucket = self._buckets.get(to)
+        if bucket is None:
+            if len(self._buckets) >= self.max_buckets:
+                # Buckets cheios equivalem a um destinatário ocioso
+                self._buckets = {k: b for k, b in self._buckets.items() if not b.full}
+            bucket = self._buckets[to] = TokenBucket(self.recipient_rate, self.recipient_burst)
+        return bucket
+
+    async def send(self, to: str, message: str) -> Outcome:
+        """Agenda a mensagem; ela sai no resumo do destinatário ao fim da janela"""
+        if self._pending_count >= self.max_pending:
+            self.dropped += 1
+            logger.warning(f"⚠️ Fila de notificações cheia, mensagem para {to} descartada")
+            return Outcome.DROPPED
+        self._pending.setdefault(to, []).append(message)
+        self._pending_count += 1
+        self.queued += 1
+        if self.window <= 0:
+            return Outcome.SENT if await self.flush(to) else Outcome.FAILED
+        if to not in self._timers:
+            loop = asyncio.get_running_loop()
+            self._timers[to] = loop.call_later(self.window, self._schedule_flush, to)
+        return Outcome.DEFERRED
+
+    def _schedule_flush(self, to: str):
+        task = asyncio.ensure_future(self.flush(to))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def flush(self, to: str) -> bool:
+        """Envia agora o resumo pendente de um destinatário"""
+        timer = self._timers.pop(to, None)
+        if timer is not None:
+            timer.cancel()
+        messages = self._pending.pop(to, None)
+        if not messages:
+            return True
+        self._pending_count -= len(messages)
+
+        await self._bucket(to).acquire()
+        await self.global_bucket.acquire()
+        try:
+            success = await self._sender(to, DIGEST_SEPARATOR.join(messages))
+        except Exception as e:
+            logger.error(f"❌ Erro ao enviar resumo para {to}: {e}")
+            success = False
+
+        if success:
+            self.sent += 1
+        else:
+            self.failed += 1
+        return success
+
+    async def flush_all(self):
+        """Envia todos os resumos pendentes (ex.: ao fim de uma rotina agendada)"""
+        await asyncio.gather(*(self.flush(to) for to in list(self._pending)))
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def stats(self) -> Dict:
+        return {
+            "queued": self.queued,
+            "sent": self.sent,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "pending_recipients": len(self._pending),
+        }
@@ -0,0 +1,96 @@
+"""
+    Paginação por chave (keyset).
+
+Em vez de OFFSET, cada página continua depois da última linha da anterior:
+WHERE (date, id) < (:date, :id) ORDER BY date DESC, id DESC LIMIT n. Com o
+índice por usuário e data, a página 100 custa o mesmo que a primeira.
+
+O cursor é opaco para o cliente: base64 (url-safe) dos valores da última
+linha. Consultas buscam limit + 1 linhas para saber se há próxima página.
+"""
+import base64
+import json
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Generic, List, Optional, Sequence, TypeVar
+
+from sqlalchemy import tuple_
+
+from app.config import PAGE_DEFAULT_SIZE, PAGE_MAX_SIZE
+
+T = TypeVar("T")
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+@dataclass
+class Page(Generic[T]):
+    items: List[T]
+    next_cursor: Optional[str] = None
+
+
+def page_size(limit: Optional[int]) -> int:
+    """Tamanho da página entre 1 e PAGE_MAX_SIZE"""
+    if not limit:
+        return PAGE_DEFAULT_SIZE
+    return max(1, min(limit, PAGE_MAX_SIZE))
+
+
+def _encode_value(value: Any):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def _decode_value(column, value: Any):
+    python_type = column.type.python_type
+    if value is None or isinstance(value, python_type):
+        return value
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    return python_type(value)
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps([_encode_value(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: Sequence) -> tuple:
+    """Valores do cursor convertidos para os tipos das colunas"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError
+        return tuple(_decode_value(c, v) for c, v in zip(columns, values))
+    except (ValueError, TypeError):
+        raise InvalidCursor("Cursor inválido")
+
+
+def paginate(query, columns: Sequence, cursor: Optional[str], limit: int, descending: bool = True):
+    """Aplica ordem, posição do cursor e limite (busca uma linha a mais)"""
+    if cursor:
+        values = decode_cursor(cursor, columns)
+        after = tuple_(*columns) < tuple_(*values) if descending else tuple_(*columns) > tuple_(*values)
+        query = query.where(after)
+    order = [c.desc() for c in columns] if descending else list(columns)
+    return query.order_by(*order).limit(limit + 1)
+
+
+def make_page(rows: Sequence[T], columns: Sequence, limit: int) -> Page[T]:
+    """Corta a linha extra e gera o cursor da próxima página"""
+    items = list(rows[:limit])
+    if len(rows) <= limit:
+        return Page(items)
+    last = items[-1]
+    return Page(items, encode_cursor([getattr(last, c.key) for c in columns]))
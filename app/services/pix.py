@@ -3,8 +3,13 @@ from typing import Optional
 from pydantic import BaseModel
 import qrcode
 import json
-import base64
-from io import BytesIO
+
+from app.config import IMAGE_PRESET, QR_FORMAT
+from app.services import images
+
+QR_BORDER = 4  # zona de silêncio mínima do padrão QR
+QR_MAX_BOX_SIZE = 10
+QR_MIN_BOX_SIZE = 4
 
 class PixPayload(BaseModel):
     merchant_name: str
@@ -26,6 +31,13 @@ class PixService:
         
         return payload
 
+    @staticmethod
+    def qr_box_size(modules: int, preset: str = IMAGE_PRESET) -> int:
+        """Pixels por módulo para caber na largura do preset"""
+        width = (modules + 2 * QR_BORDER) * QR_MAX_BOX_SIZE
+        box = int(QR_MAX_BOX_SIZE * images.scale(width, preset))
+        return max(QR_MIN_BOX_SIZE, box)
+
     @staticmethod
     async def generate_qr_code(
         amount: float,
@@ -34,7 +46,11 @@ class PixService:
         merchant_city: str = "SAO PAULO",
         postal_code: str = "01000000"
     ) -> dict:
-        """Gera QR Code do PIX"""
+        """Gera QR Code do PIX.
+
+        qr_code são os bytes da imagem (QR_FORMAT, media_type no resultado);
+        para JSON, converta com images.to_base64.
+        """
         try:
             # Cria ID único para a transação
             transaction_id = f"PIX{datetime.now().strftime('%Y%m%d%H%M%S')}"
@@ -50,23 +66,20 @@ class PixService:
             )
             
             # Gera o QR code
-            qr = qrcode.QRCode(version=1, box_size=10, border=5)
+            qr = qrcode.QRCode(version=1, border=QR_BORDER)
             qr.add_data(PixService.create_payload(payload))
             qr.make(fit=True)
+            qr.box_size = PixService.qr_box_size(qr.modules_count)
             
-            # Converte para imagem
-            img = qr.make_image(fill_color="black", back_color="white")
-            
-            # Converte para base64
-            buffered = BytesIO()
-            img.save(buffered, format="PNG")
-            qr_code_base64 = base64.b64encode(buffered.getvalue()).decode()
+            # Imagem de 1 bit, codificada sem passar por base64
+            img = qr.make_image(fill_color="black", back_color="white").get_image()
             
             return {
                 "transaction_id": transaction_id,
                 "amount": amount,
                 "description": description,
-                "qr_code": qr_code_base64,
+                "qr_code": images.encode(img, QR_FORMAT),
+                "media_type": images.MEDIA_TYPES[QR_FORMAT],
                 "payload": PixService.create_payload(payload)
             }
         except Exception as e:
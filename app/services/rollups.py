@@ -0,0 +1,174 @@
+"""
+    Totais mensais por usuário, categoria e tipo.
+
+Cada inclusão ou exclusão de transação soma (ou subtrai) o valor na linha
+(usuário, mês, categoria, tipo) com um upsert, na mesma transação do
+banco. Relatórios e orçamentos leem essas linhas: o custo depende do número
+de categorias, não do número de transações.
+
+Há uma tabela para cada modelo de dados: monthly_rollup para o bot
+(app.models) e transactionrollup para a API (app.db.models).
+
+Backfill e correção:
+    python -m app.services.rollups rebuild {chat,api} [--user ID]
+"""
+import argparse
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, insert
+from sqlmodel import select
+
+logger = logging.getLogger(__name__)
+
+
+def month_of(value: datetime) -> date:
+    """Chave do mês: primeiro dia"""
+    return date(value.year, value.month, 1)
+
+
+def upsert_insert(dialect: str):
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        raise ValueError(f"Dialeto sem suporte a upsert: {dialect}")
+    return dialect_insert
+
+
+class RollupService:
+    def __init__(self, rollup_model, source_model, user_field: str, category_field: str, no_category):
+        self.rollup_model = rollup_model
+        self.source_model = source_model
+        self.user_field = user_field
+        self.category_field = category_field
+        self.no_category = no_category  # chave usada quando a transação não tem categoria
+
+    @property
+    def columns(self) -> List[str]:
+        return [self.user_field, "month", self.category_field, "type"]
+
+    def key(self, user_id, when: datetime, category, type: str) -> Tuple:
+        return (user_id, month_of(when), category if category else self.no_category, type)
+
+    def aggregate(self, rows: Iterable[Tuple], totals: Optional[Dict] = None) -> Dict[Tuple, List]:
+        """Agrupa linhas (usuário, data, categoria, tipo, valor) em {chave: [total, contagem]}"""
+        totals = defaultdict(lambda: [0, 0]) if totals is None else totals
+        for user_id, when, category, type_, amount in rows:
+            entry = totals[self.key(user_id, when, category, type_)]
+            entry[0] += amount
+            entry[1] += 1
+        return totals
+
+    def rows(self, totals: Dict[Tuple, List]) -> List[Dict]:
+        return [
+            {**dict(zip(self.columns, key)), "total": total, "count": count}
+            for key, (total, count) in totals.items()
+        ]
+
+    def upsert(self, dialect: str, totals: Dict[Tuple, List]):
+        """Um único upsert (multi-linha) somando os deltas já agrupados"""
+        Rollup = self.rollup_model
+        stmt = upsert_insert(dialect)(Rollup).values(self.rows(totals))
+        return stmt.on_conflict_do_update(
+            index_elements=self.columns,
+            set_={
+                "total": Rollup.total + stmt.excluded.total,
+                "count": Rollup.count + stmt.excluded.count,
+            },
+        )
+
+    def statements(self, dialect: str, transaction, sign: int = 1):
+        """Upsert do delta (e limpeza da linha zerada, em exclusões)"""
+        Rollup = self.rollup_model
+        key = self.key(
+            getattr(transaction, self.user_field),
+            transaction.date,
+            getattr(transaction, self.category_field),
+            transaction.type,
+        )
+        yield self.upsert(dialect, {key: [sign * transaction.amount, sign]})
+        if sign < 0:
+            yield delete(Rollup).where(
+                *(getattr(Rollup, column) == value for column, value in zip(self.columns, key)),
+                Rollup.count <= 0,
+            )
+
+    def apply(self, session, transaction, sign: int = 1):
+        """Atualiza os totais numa sessão síncrona (sign=-1 para exclusão)"""
+        for stmt in self.statements(session.bind.dialect.name, transaction, sign):
+            session.execute(stmt)
+
+    async def apply_async(self, session, transaction, sign: int = 1):
+        """Atualiza os totais numa AsyncSession (sign=-1 para exclusão)"""
+        for stmt in self.statements(session.bind.dialect.name, transaction, sign):
+            await session.execute(stmt)
+
+    def rebuild(self, session, user_id: Optional[int] = None) -> int:
+        """Recalcula os totais a partir das transações (sessão síncrona;
+        com AsyncSession use session.run_sync(service.rebuild))"""
+        Rollup = self.rollup_model
+        Source = self.source_model
+        user_column = getattr(Source, self.user_field)
+
+        cleanup = delete(Rollup)
+        query = select(
+            user_column, Source.date, getattr(Source, self.category_field), Source.type, Source.amount
+        )
+        if user_id is not None:
+            cleanup = cleanup.where(getattr(Rollup, self.user_field) == user_id)
+            query = query.where(user_column == user_id)
+        session.execute(cleanup)
+
+        totals = self.aggregate(session.execute(query.execution_options(yield_per=1000)))
+        if totals:
+            session.execute(insert(Rollup), self.rows(totals))
+        logger.info("📊 Totais mensais recalculados: %d linhas", len(totals))
+        return len(totals)
+
+
+@lru_cache(maxsize=None)
+def chat_rollup() -> RollupService:
+    """Totais do bot (app.models)"""
+    from app.models import MonthlyRollup, Transaction
+    return RollupService(MonthlyRollup, Transaction, "user_id", "category", "outros")
+
+
+@lru_cache(maxsize=None)
+def api_rollup() -> RollupService:
+    """Totais da API (app.db.models)"""
+    from app.db.models import Transaction, TransactionRollup
+    return RollupService(TransactionRollup, Transaction, "owner_id", "category_id", 0)
+
+
+async def rebuild_chat(user_id: Optional[int] = None) -> int:
+    from app.database import get_session
+    async with get_session() as session:
+        return await session.run_sync(lambda s: chat_rollup().rebuild(s, user_id))
+
+
+def rebuild_api(user_id: Optional[int] = None) -> int:
+    from app.db.session import get_db_context
+    with get_db_context() as db:
+        rows = api_rollup().rebuild(db, user_id)
+        db.commit()
+        return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["rebuild"])
+    parser.add_argument("schema", choices=["chat", "api"])
+    parser.add_argument("--user", type=int, help="recalcula só este usuário")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    if args.schema == "chat":
+        rows = asyncio.run(rebuild_chat(args.user))
+    else:
+        rows = rebuild_api(args.user)
+    print(f"{rows} linhas recalculadas")
@@ -1,22 +1,51 @@
+import logging
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
-from app.db.session import get_db_context
+from app.db.session import get_read_context
 from app.services.notifications import NotificationService
+from app.services.whatsapp import whatsapp_service
+from app.services.ledger import balance_ledger
 from app.db.models import User
+from app.db.pool_metrics import held_by
+
+logger = logging.getLogger(__name__)
 
 scheduler = AsyncIOScheduler()
 
+@held_by("job:check_all_notifications")
 async def check_all_notifications():
     """Verifica todas as notificações para todos os usuários"""
-    with get_db_context() as db:
+    # Varredura só de leitura: réplica, se configurada
+    with get_read_context() as db:
         users = db.query(User).filter(User.is_active == True).all()
-        notification_service = NotificationService()
+        notification_service = NotificationService(whatsapp_service)
         
         for user in users:
             await notification_service.check_bills(user, db)
             await notification_service.check_balance_alerts(user, db)
             await notification_service.check_goals(user, db)
 
+        # Um resumo por usuário, respeitando os limites de envio
+        await notification_service.flush()
+
+@held_by("job:send_monthly_reports")
+async def send_monthly_reports():
+    """Envia o relatório mensal para todos os usuários ativos"""
+    with get_read_context() as db:
+        notification_service = NotificationService(whatsapp_service)
+        await notification_service.send_monthly_reports(db)
+        await notification_service.flush()
+
+@held_by("job:reconcile_balances")
+async def reconcile_balances():
+    """Corrige divergências entre o saldo materializado e as transações"""
+    drifts = await balance_ledger.reconcile(repair=True)
+    for drift in drifts:
+        logger.warning(
+            "Saldo corrigido: usuário %s, guardado %s, real %s",
+            drift.user_id, drift.stored, drift.actual,
+        )
+
 def setup_scheduler():
     """Configura as tarefas agendadas"""
     # Verifica contas a pagar todos os dias às 9h
@@ -31,4 +60,10 @@ def setup_scheduler():
         CronTrigger(day=1, hour=8, minute=0)
     )
     
+    # Reconcilia o saldo materializado de madrugada
+    scheduler.add_job(
+        reconcile_balances,
+        CronTrigger(hour=3, minute=30)
+    )
+    
     scheduler.start() 
\ No newline at end of file
@@ -6,9 +6,9 @@ from jose import jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlmodel import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import get_db
+from app.database import get_async_db
 from app.db.models import User
 from app.services.config import JWT_SECRET_KEY
 
@@ -40,8 +40,8 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
-def get_current_user(
-    db: Session = Depends(get_db),
+async def get_current_user(
+    db: AsyncSession = Depends(get_async_db),
     token: str = Depends(oauth2_scheme)
 ) -> User:
     credentials_exception = HTTPException(
@@ -57,7 +57,7 @@ def get_current_user(
     except jwt.JWTError:
         raise credentials_exception
     
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, int(user_id))
     if user is None:
         raise credentials_exception
     return user
@@ -1,6 +1,9 @@
 from typing import Optional, List
 from app.models import Transaction
-from app.database import get_session
+from app.database import get_read_session, get_session
+from app.services.ledger import balance_ledger, signed_amount
+from app.services.rollups import chat_rollup
+from app.services.pagination import Page, make_page, page_size, paginate
 from sqlmodel import select
 import logging
 from decimal import Decimal
@@ -9,48 +12,35 @@ from datetime import datetime
 logger = logging.getLogger(__name__)
 
 async def get_balance(user_id: int) -> Decimal:
-    """Calcula o saldo atual do usuário"""
+    """Retorna o saldo atual do usuário (leitura do saldo materializado)"""
     try:
-        async with get_session() as session:
-            # Busca receitas
-            query = select(Transaction.amount).where(
-                Transaction.user_id == user_id,
-                Transaction.type == "income"
-            )
-            result = await session.execute(query)
-            income = sum([r[0] for r in result]) or Decimal(0)
-            
-            # Busca despesas
-            query = select(Transaction.amount).where(
-                Transaction.user_id == user_id,
-                Transaction.type == "expense"
-            )
-            result = await session.execute(query)
-            expenses = sum([r[0] for r in result]) or Decimal(0)
-            
-            return income - expenses
-            
+        return await balance_ledger.balance(user_id)
     except Exception as e:
         logger.error(f"Erro ao calcular saldo: {e}")
         raise
 
-async def get_transactions(user_id: int, limit: int = 10) -> List[Transaction]:
-    """Retorna as últimas transações do usuário"""
+STATEMENT_COLUMNS = (Transaction.date, Transaction.id)
+
+async def get_statement(user_id: int, cursor: Optional[str] = None, limit: int = 10) -> Page[Transaction]:
+    """Página do extrato (/extrato), das mais recentes para as mais antigas"""
     try:
-        async with get_session() as session:
-            query = (
-                select(Transaction)
-                .where(Transaction.user_id == user_id)
-                .order_by(Transaction.date.desc())
-                .limit(limit)
+        async with get_read_session(user_id) as session:
+            size = page_size(limit)
+            query = paginate(
+                select(Transaction).where(Transaction.user_id == user_id),
+                STATEMENT_COLUMNS, cursor, size,
             )
             result = await session.execute(query)
-            return result.scalars().all()
-            
+            return make_page(result.scalars().all(), STATEMENT_COLUMNS, size)
+
     except Exception as e:
         logger.error(f"Erro ao buscar transações: {e}")
         raise
 
+async def get_transactions(user_id: int, limit: int = 10, cursor: Optional[str] = None) -> List[Transaction]:
+    """Retorna as últimas transações do usuário"""
+    return (await get_statement(user_id, cursor, limit)).items
+
 async def add_transaction(
     user_id: int,
     amount: Decimal,
@@ -69,6 +59,9 @@ async def add_transaction(
                 category=category
             )
             session.add(transaction)
+            # Saldo e totais mensais atualizados na mesma transação do banco
+            await balance_ledger.apply(session, user_id, signed_amount(type, amount))
+            await chat_rollup().apply_async(session, transaction)
             await session.commit()
             await session.refresh(transaction)
             return transaction
@@ -91,6 +84,10 @@ async def delete_transaction(user_id: int, transaction_id: int) -> Optional[Tran
             
             if transaction:
                 await session.delete(transaction)
+                await balance_ledger.apply(
+                    session, user_id, -signed_amount(transaction.type, transaction.amount)
+                )
+                await chat_rollup().apply_async(session, transaction, sign=-1)
                 await session.commit()
                 
             return transaction
@@ -20,7 +20,8 @@ def setup_logger() -> logging.Logger:
     """função que cria logger e salva erros em arquivo txt"""
     logger = logging.getLogger("_logs")
     logger.setLevel(logging.ERROR)
-    file_handler = logging.FileHandler("error_logs.txt")
+    # delay: o arquivo só é criado no primeiro erro
+    file_handler = logging.FileHandler("error_logs.txt", delay=True)
     formatter = logging.Formatter(
         "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
     )
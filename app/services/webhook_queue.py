@@ -0,0 +1,132 @@
+"""
+    Fila de processamento do webhook do WhatsApp.
+
+O webhook apenas valida o payload e o coloca em uma fila asyncio limitada,
+respondendo 202 imediatamente. Um grupo fixo de workers consome a fila,
+processa a mensagem e envia a resposta pelo servidor Node.js. Quando a fila
+está cheia a mensagem é recusada (backpressure) em vez de acumular memória.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+from app.db.pool_metrics import holding
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[Dict], Awaitable[Any]]
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Percentil por ordenação simples (amostras já limitadas)"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class WebhookQueue:
+    def __init__(
+        self,
+        handler: Handler,
+        maxsize: int = 1000,
+        workers: int = 4,
+        sample_size: int = 1000,
+    ):
+        self.handler = handler
+        self.maxsize = maxsize
+        self.workers = workers
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._wait_samples: Deque[float] = deque(maxlen=sample_size)
+
+        # Contadores
+        self.enqueued = 0
+        self.processed = 0
+        self.failed = 0
+        self.dropped = 0
+        self.max_wait = 0.0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    async def start(self):
+        """Cria a fila e inicia os workers no loop atual"""
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self._tasks = [
+            asyncio.create_task(self._worker(i), name=f"webhook-worker-{i}")
+            for i in range(self.workers)
+        ]
+        logger.info(f"🧵 Fila do webhook iniciada com {self.workers} workers")
+
+    async def stop(self, timeout: float = 10.0):
+        """Aguarda a fila esvaziar (até timeout) e encerra os workers"""
+        if not self.running:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"⚠️ Encerrando fila com {self.depth} mensagens pendentes")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, message: Dict) -> bool:
+        """Enfileira a mensagem; False se a fila estiver cheia ou parada"""
+        if not self.running:
+            self.dropped += 1
+            return False
+        try:
+            self._queue.put_nowait((time.perf_counter(), message))
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+        self.enqueued += 1
+        return True
+
+    async def _worker(self, index: int):
+        while True:
+            enqueued_at, message = await self._queue.get()
+            wait = time.perf_counter() - enqueued_at
+            self._wait_samples.append(wait)
+            self.max_wait = max(self.max_wait, wait)
+            try:
+                with holding("webhook-worker"):
+                    await self.handler(message)
+                self.processed += 1
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"❌ Erro no worker {index} do webhook: {e}")
+                logger.exception(e)
+            finally:
+                self._queue.task_done()
+
+    def stats(self) -> Dict:
+        """Métricas da fila (tempos em milissegundos)"""
+        samples = list(self._wait_samples)
+        return {
+            "running": self.running,
+            "workers": self.workers,
+            "maxsize": self.maxsize,
+            "depth": self.depth,
+            "enqueued": self.enqueued,
+            "processed": self.processed,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "wait_ms": {
+                "p50": percentile(samples, 50) * 1000,
+                "p99": percentile(samples, 99) * 1000,
+                "max": self.max_wait * 1000,
+            },
+        }
@@ -1,28 +1,75 @@
+import inspect
 import logging
-import requests
-from app.config import config
+from typing import Optional
+from app.config import (
+    config,
+    BRIDGE_MAX_CONNECTIONS,
+    BRIDGE_MAX_KEEPALIVE,
+    BRIDGE_KEEPALIVE_EXPIRY,
+    BRIDGE_CONNECT_TIMEOUT,
+    BRIDGE_SEND_TIMEOUT,
+    BRIDGE_QR_TIMEOUT,
+)
 import os
 import httpx
+from app.services.auth import resolve_user_id
+from app.services.identity import normalize_phone
+from app.services.pagination import InvalidCursor
+from app.services.commands import (
+    CommandRegistry,
+    ParsedCommand,
+    TransactionCommand,
+    transaction_parser,
+)
 
 logger = logging.getLogger(__name__)
 
 class WhatsAppService:
-    def __init__(self):
+    def __init__(self, api_url: Optional[str] = None):
         self.phone_number = config("WHATSAPP_NUMBER")
-        self.api_url = os.getenv("NODE_URL", "http://localhost:3001")
+        self.api_url = api_url or os.getenv("NODE_URL", "http://localhost:3001")
         self.qr_code = None
+        self._client: Optional[httpx.AsyncClient] = None
         logger.info(f"🚀 Iniciando WhatsApp com URL: {self.api_url}")
-        
+
+    def _create_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            base_url=self.api_url,
+            limits=httpx.Limits(
+                max_connections=BRIDGE_MAX_CONNECTIONS,
+                max_keepalive_connections=BRIDGE_MAX_KEEPALIVE,
+                keepalive_expiry=BRIDGE_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(BRIDGE_SEND_TIMEOUT, connect=BRIDGE_CONNECT_TIMEOUT),
+        )
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Cliente HTTP compartilhado (keep-alive) com o servidor Node.js"""
+        if self._client is None or self._client.is_closed:
+            self._client = self._create_client()
+        return self._client
+
+    async def startup(self):
+        """Cria o cliente HTTP no início da aplicação"""
+        if self._client is None:
+            self._client = self._create_client()
+
+    async def shutdown(self):
+        """Fecha as conexões abertas com o servidor Node.js"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
     async def get_qr_code(self):
         """Obtém QR code do servidor Node.js"""
         try:
             logger.info(f"🔍 Tentando obter QR code de {self.api_url}/whatsapp/qr")
-            async with httpx.AsyncClient() as client:
-                response = await client.get(f"{self.api_url}/whatsapp/qr")
-                logger.info(f"✅ Resposta recebida: {response.status_code}")
-                data = response.json()
-                logger.info(f"📱 QR Code presente: {bool(data.get('qr'))}")
-                return data.get("qr")
+            response = await self.client.get("/whatsapp/qr", timeout=BRIDGE_QR_TIMEOUT)
+            logger.info(f"✅ Resposta recebida: {response.status_code}")
+            data = response.json()
+            logger.info(f"📱 QR Code presente: {bool(data.get('qr'))}")
+            return data.get("qr")
         except Exception as e:
             logger.error(f"❌ Erro ao obter QR code: {str(e)}")
             logger.exception(e)
@@ -31,67 +78,41 @@ class WhatsAppService:
     async def send_message(self, to: str, message: str) -> bool:
         """Envia mensagem via servidor Node.js"""
         try:
-            logger.info(f"\n📤 Tentando enviar mensagem para {to}")
+            logger.debug("📤 Enviando mensagem para %s", to)
             
             # Formata número
-            clean_number = to.replace("+", "").replace("-", "").replace(" ", "")
-            if not clean_number.startswith("55"):
-                clean_number = "55" + clean_number
-                
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.api_url}/send-message",
-                    json={
-                        "to": f"{clean_number}@c.us",
-                        "message": message
-                    }
-                )
-                
-                if response.status_code == 200:
-                    logger.info("✅ Mensagem enviada com sucesso")
-                    return True
-                    
-                logger.error(f"❌ Erro ao enviar mensagem: {response.text}")
-                return False
+            clean_number = normalize_phone(to)
+
+            response = await self.client.post(
+                "/send-message",
+                json={
+                    "to": f"{clean_number}@c.us",
+                    "message": message
+                }
+            )
+
+            if response.status_code == 200:
+                logger.info("✅ Mensagem enviada", extra={"to": clean_number})
+                return True
+
+            logger.error("❌ Erro ao enviar mensagem: %s", response.text)
+            return False
                 
         except Exception as e:
-            logger.error(f"❌ Erro ao enviar mensagem: {str(e)}")
-            logger.exception(e)
+            logger.exception("❌ Erro ao enviar mensagem: %s", e)
             return False
             
-    def process_message(self, text: str) -> str:
-        """Processa mensagens recebidas"""
+    async def process_message(self, text: str, phone: Optional[str] = None) -> str:
+        """Processa mensagens recebidas; phone identifica o remetente"""
         try:
-            text = text.lower().strip()
-            logger.info(f"\n📨 Processando mensagem:")
-            logger.info(f"Texto original: {text}")
-            logger.info(f"Texto processado: {text.lower().strip()}")
-            
-            # Comandos básicos
-            if text in ["oi", "olá", "ola"]:
-                logger.info("✅ Comando identificado: Saudação")
-                return (
-                    "👋 Olá! Eu sou o FinBot!\n\n"
-                    "Para começar, envie:\n"
-                    "📝 /ajuda - Ver todos os comandos"
-                )
-            
-            # Comando de ajuda
-            if text == "/ajuda":
-                return (
-                    "🤖 Comandos disponíveis:\n\n"
-                    "💰 Finanças:\n"
-                    "/saldo - Ver saldo atual\n"
-                    "/extrato - Ver últimas transações\n"
-                    "/categorias - Resumo por categoria\n\n"
-                    "💸 Registros:\n"
-                    "/despesa valor descrição #categoria\n"
-                    "Exemplo: /despesa 50 Almoço #alimentação\n\n"
-                    "/receita valor descrição #categoria\n"
-                    "Exemplo: /receita 1000 Salário #salário\n\n"
-                    "💡 A categoria é opcional"
-                )
-            
+            logger.debug("📨 Processando mensagem: %s", text)
+
+            response = commands.dispatch(text, phone)
+            if inspect.isawaitable(response):
+                response = await response
+            if response is not None:
+                return response
+
             # Comando não reconhecido
             return "❓ Comando não reconhecido. Digite /ajuda para ver os comandos disponíveis."
             
@@ -100,5 +121,124 @@ class WhatsAppService:
             logger.exception(e)
             return "❌ Desculpe, ocorreu um erro ao processar sua mensagem."
 
+
+# Registro de comandos
+commands = CommandRegistry()
+
+DESPESA_USAGE = "/despesa valor descrição #categoria\nExemplo: /despesa 50 Almoço #alimentação"
+RECEITA_USAGE = "/receita valor descrição #categoria\nExemplo: /receita 1000 Salário #salário"
+UNKNOWN_SENDER = (
+    "❌ Não foi possível identificar o usuário. "
+    "Cadastre este número de WhatsApp no seu perfil para usar este comando."
+)
+
+
+async def sender_id(command: ParsedCommand) -> Optional[int]:
+    """Id do usuário dono do número do remetente; None se desconhecido.
+
+    Vem do cache para remetentes conhecidos (sem consultar o banco). Falha
+    na consulta também devolve None: o handler responde que não identificou
+    o usuário em vez de derrubar a mensagem.
+    """
+    if not command.sender:
+        return None
+    try:
+        return await resolve_user_id(command.sender)
+    except Exception as e:
+        logger.error(f"Erro ao identificar o remetente: {e}")
+        return None
+
+
+def format_currency(value) -> str:
+    """Formata valores no padrão brasileiro (R$ 1.234,56)"""
+    return f"R$ {value:,.2f}".replace(",", "_").replace(".", ",").replace("_", ".")
+
+
+@commands.command("oi", aliases=["olá", "ola"])
+def greeting(command: ParsedCommand) -> str:
+    return (
+        "👋 Olá! Eu sou o FinBot!\n\n"
+        "Para começar, envie:\n"
+        "📝 /ajuda - Ver todos os comandos"
+    )
+
+
+@commands.command("/ajuda")
+def help_command(command: ParsedCommand) -> str:
+    return (
+        "🤖 Comandos disponíveis:\n\n"
+        "💰 Finanças:\n"
+        "/saldo - Ver saldo atual\n"
+        "/extrato - Ver últimas transações (/extrato <código> para a próxima página)\n"
+        "/categorias - Resumo por categoria\n\n"
+        "💸 Registros:\n"
+        f"{DESPESA_USAGE}\n\n"
+        f"{RECEITA_USAGE}\n\n"
+        "💡 A categoria é opcional"
+    )
+
+
+async def record(command: TransactionCommand, type: str) -> Optional[int]:
+    """Grava a transação do comando; None se o remetente não é conhecido"""
+    user_id = await sender_id(command)
+    if user_id is None:
+        return None
+    # Import tardio: app.db.models conflita com app.models no mesmo metadata
+    from app.services.chat_transactions import record_transaction
+
+    await record_transaction(user_id, command.amount, command.description, type, command.category)
+    return user_id
+
+
+@commands.command("/despesa", parser=transaction_parser(DESPESA_USAGE), usage=DESPESA_USAGE)
+async def expense_command(command: TransactionCommand) -> str:
+    if await record(command, "expense") is None:
+        return UNKNOWN_SENDER
+    return (
+        f"💸 Despesa: {format_currency(command.amount)}\n"
+        f"📝 {command.description}\n"
+        f"🏷️ #{command.category}"
+    )
+
+
+@commands.command("/receita", parser=transaction_parser(RECEITA_USAGE), usage=RECEITA_USAGE)
+async def income_command(command: TransactionCommand) -> str:
+    if await record(command, "income") is None:
+        return UNKNOWN_SENDER
+    return (
+        f"💰 Receita: {format_currency(command.amount)}\n"
+        f"📝 {command.description}\n"
+        f"🏷️ #{command.category}"
+    )
+
+
+def format_statement(transactions, next_cursor: Optional[str] = None) -> str:
+    """Texto de uma página do extrato (services.chat_transactions.get_statement)"""
+    if not transactions:
+        return "📭 Nenhuma transação encontrada."
+    lines = ["📄 Extrato:\n"]
+    for t in transactions:
+        icon = "💰" if t.type == "income" else "💸"
+        lines.append(f"{icon} {t.date:%d/%m} {format_currency(t.amount)} - {t.description}")
+    if next_cursor:
+        lines.append(f"\n➡️ Mais: /extrato {next_cursor}")
+    return "\n".join(lines)
+
+
+@commands.command("/extrato")
+async def statement_command(command: ParsedCommand) -> str:
+    user_id = await sender_id(command)
+    if user_id is None:
+        return UNKNOWN_SENDER
+    # Import tardio: app.db.models conflita com app.models no mesmo metadata
+    from app.services.chat_transactions import get_statement
+
+    try:
+        page = await get_statement(user_id, command.args or None)
+    except InvalidCursor:
+        return "❌ Código de página inválido. Envie /extrato para ver o início."
+    return format_statement(page.items, page.next_cursor)
+
+
 # Instância global
 whatsapp_service = WhatsAppService() 
\ No newline at end of file
@@ -0,0 +1,108 @@
+"""
+    Benchmark de concorrência das rotas de finanças.
+
+Uma rota lenta (consulta SQLite pesada) recebe requisições ao mesmo tempo
+que uma rota rápida (/ping). Compara o padrão antigo (Session síncrona
+dentro de "async def", bloqueando o event loop) com AsyncSession via
+aiosqlite, medindo a latência da rota rápida enquanto as lentas executam.
+
+uso: python -m benchmarks.bench_async_routes [--slow N] [--fast N] [--rows N]
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+# Soma de 1..N com CTE recursiva: lenta sem depender de dados
+SLOW_QUERY = text(
+    "WITH RECURSIVE n(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM n WHERE x < :rows) "
+    "SELECT sum(x) FROM n"
+)
+PING_INTERVAL = 0.01
+
+
+def build_app(path: str, rows: int, use_async: bool) -> FastAPI:
+    app = FastAPI()
+
+    if use_async:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+        async def get_db():
+            async with factory() as session:
+                yield session
+
+        @app.get("/slow")
+        async def slow(db: AsyncSession = Depends(get_db)):
+            result = await db.execute(SLOW_QUERY, {"rows": rows})
+            return {"sum": result.scalar()}
+    else:
+        engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+
+        def get_db():
+            with Session(engine) as session:
+                yield session
+
+        @app.get("/slow")
+        async def slow(db: Session = Depends(get_db)):
+            # Como export_transactions fazia: consulta bloqueante no event loop
+            return {"sum": db.execute(SLOW_QUERY, {"rows": rows}).scalar()}
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    return app
+
+
+async def measure(app: FastAPI, slow: int, fast: int) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def timed(path: str, samples: list, scheduled: float):
+            # Latência a partir do horário previsto: inclui o tempo parado no event loop
+            await client.get(path)
+            samples.append(time.perf_counter() - scheduled)
+
+        slow_samples, fast_samples = [], []
+        started = time.perf_counter()
+        tasks = [asyncio.create_task(timed("/slow", slow_samples, started)) for _ in range(slow)]
+        for i in range(fast):
+            scheduled = started + i * PING_INTERVAL
+            await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+            tasks.append(asyncio.create_task(timed("/ping", fast_samples, scheduled)))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+
+    fast_samples.sort()
+    return {
+        "elapsed_s": elapsed,
+        "ping_p50_ms": fast_samples[len(fast_samples) // 2] * 1000,
+        "ping_max_ms": fast_samples[-1] * 1000,
+    }
+
+
+async def main(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        print(f"{'cenário':<28} {'total s':>8} {'ping p50 ms':>12} {'ping máx ms':>12}")
+        for name, use_async in (("antigo: Session síncrona", False), ("AsyncSession", True)):
+            result = await measure(build_app(path, args.rows, use_async), args.slow, args.fast)
+            print(
+                f"{name:<28} {result['elapsed_s']:>8.2f} "
+                f"{result['ping_p50_ms']:>12.2f} {result['ping_max_ms']:>12.2f}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--slow", type=int, default=4, help="requisições lentas simultâneas")
+    parser.add_argument("--fast", type=int, default=50, help="requisições /ping durante as lentas (uma a cada 10 ms)")
+    parser.add_argument("--rows", type=int, default=2_000_000, help="tamanho da consulta lenta")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,66 @@
+"""
+    Benchmark do cliente HTTP do servidor Node.js.
+
+Compara mensagens/segundo de WhatsAppService.send_message usando o cliente
+compartilhado (keep-alive) com um cliente novo por chamada, contra o
+servidor falso de benchmarks/fake_bridge.py.
+
+uso: python -m benchmarks.bench_bridge_client [--messages N] [--concurrency C]
+"""
+import argparse
+import asyncio
+import logging
+import time
+
+import httpx
+
+from app.services.whatsapp import WhatsAppService
+from benchmarks.fake_bridge import FakeBridge
+
+
+async def send_per_call(api_url: str, to: str, message: str) -> bool:
+    """Comportamento anterior: um AsyncClient (e uma conexão) por mensagem"""
+    async with httpx.AsyncClient() as client:
+        response = await client.post(
+            f"{api_url}/send-message",
+            json={"to": f"{to}@c.us", "message": message},
+        )
+        return response.status_code == 200
+
+
+async def run(send, messages: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        async with semaphore:
+            await send("5511999999999", f"mensagem {i}")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(messages)))
+    return messages / (time.perf_counter() - started)
+
+
+async def main(messages: int, concurrency: int):
+    async with FakeBridge() as bridge:
+        rate = await run(
+            lambda to, msg: send_per_call(bridge.url, to, msg), messages, concurrency
+        )
+        print(f"cliente por chamada: {rate:8.0f} msg/s  ({bridge.connections} conexões)")
+
+        bridge.connections = 0
+        service = WhatsAppService(api_url=bridge.url)
+        await service.startup()
+        try:
+            rate = await run(service.send_message, messages, concurrency)
+        finally:
+            await service.shutdown()
+        print(f"cliente compartilhado: {rate:6.0f} msg/s  ({bridge.connections} conexões)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    asyncio.run(main(args.messages, args.concurrency))
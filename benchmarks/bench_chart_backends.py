@@ -0,0 +1,108 @@
+"""
+    Benchmark dos backends de gráficos: lite (SVG/Pillow) x matplotlib.
+
+Para cada backend e formato, desenha os três gráficos do bot (pizza,
+comparação mensal e progresso da meta) N vezes e reporta o tempo médio por
+gráfico e o tamanho médio da saída. A memória do worker é medida num
+processo novo que só importa o backend e desenha uma vez cada gráfico, como
+um worker do chart_renderer recém-criado.
+
+uso: python -m benchmarks.bench_chart_backends [--repeat N] [--json]
+"""
+import argparse
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+from app.services.charts import BACKENDS, load_backend
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CATEGORIES = {"Alimentação": 820.5, "Transporte": 310.0, "Moradia": 1500.0, "Lazer": 240.9, "Saúde": 180.0}
+MONTHS = ["Jan", "Fev", "Mar", "Abr", "Mai", "Jun"]
+VALUES = [2400.0, 2210.5, 2680.0, 1990.0, 2300.2, 2750.8]
+
+WORKER = """
+import time
+started = time.perf_counter()
+from app.services.charts import load_backend
+backend = load_backend({name!r})
+backend.draw_expense_pie({{"a": 1, "b": 2}}, {fmt!r})
+backend.draw_monthly_comparison(["Jan", "Fev"], [1, 2], {fmt!r})
+backend.draw_savings_progress(10, 4, {fmt!r})
+elapsed = time.perf_counter() - started
+with open("/proc/self/status") as status:
+    rss = next(int(line.split()[1]) for line in status if line.startswith("VmRSS:"))
+print(rss / 1024, elapsed * 1000)
+"""
+
+
+def charts(backend, fmt: str):
+    return [
+        lambda: backend.draw_expense_pie(CATEGORIES, fmt),
+        lambda: backend.draw_monthly_comparison(MONTHS, VALUES, fmt),
+        lambda: backend.draw_savings_progress(5000, 1830, fmt),
+    ]
+
+
+def worker_memory(name: str, fmt: str):
+    """RSS (MB) e tempo de partida (ms) de um processo novo com o backend"""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get("PYTHONPATH")])))
+    output = subprocess.run(
+        [sys.executable, "-c", WORKER.format(name=name, fmt=fmt)],
+        env=env, capture_output=True, text=True, check=True,
+    ).stdout.split()
+    return float(output[0]), float(output[1])
+
+
+def measure(name: str, fmt: str, repeat: int) -> Dict:
+    backend = load_backend(name)
+    draws = charts(backend, fmt)
+    for draw in draws:
+        draw()
+    sizes = []
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for draw in draws:
+            sizes.append(len(draw()))
+    elapsed = time.perf_counter() - started
+    rss, startup = worker_memory(name, fmt)
+    return {
+        "backend": name,
+        "format": fmt,
+        "ms_per_chart": round(elapsed / len(sizes) * 1000, 2),
+        "bytes_per_chart": sum(sizes) // len(sizes),
+        "worker_rss_mb": round(rss, 1),
+        "worker_startup_ms": round(startup, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    results: List[Dict] = []
+    for name, module in BACKENDS.items():
+        if name == "matplotlib" and importlib.util.find_spec("matplotlib") is None:
+            print("matplotlib não instalado: backend ignorado", file=sys.stderr)
+            continue
+        for fmt in ("png", "svg"):
+            results.append(measure(name, fmt, args.repeat))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'backend':<11} {'formato':<7} {'ms/gráfico':>10} {'bytes/gráfico':>13} {'RSS worker (MB)':>15} {'partida (ms)':>12}")
+    for r in results:
+        print(f"{r['backend']:<11} {r['format']:<7} {r['ms_per_chart']:>10.2f} {r['bytes_per_chart']:>13} "
+              f"{r['worker_rss_mb']:>15.1f} {r['worker_startup_ms']:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
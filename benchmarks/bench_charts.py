@@ -0,0 +1,115 @@
+"""
+    Benchmark de memória e latência do pool de gráficos.
+
+Desenha N gráficos com dados sempre diferentes (sem acerto de cache) pelo
+chart_renderer e registra, a cada 10% do caminho, o RSS do processo
+principal e dos workers e o maior atraso do event loop. Com --legacy mede
+antes o padrão antigo (pyplot global sem plt.close) no próprio processo.
+
+uso: python -m benchmarks.bench_charts [--charts N] [--workers W] [--backend lite|matplotlib] [--legacy N]
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from app.services.charts import ChartRenderer
+
+MONTHS = ["Jan", "Fev", "Mar", "Abr", "Mai", "Jun"]
+
+
+def rss_mb() -> float:
+    """RSS do processo atual em MB (Linux)"""
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def worker_rss():
+    return os.getpid(), rss_mb()
+
+
+def legacy(charts: int):
+    """Padrão antigo: pyplot global, figuras nunca fechadas"""
+    import io
+
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    before = rss_mb()
+    started = time.perf_counter()
+    for i in range(charts):
+        plt.figure(figsize=(12, 6))
+        plt.bar(MONTHS, [i + m for m in range(6)], color="#66B2FF")
+        plt.savefig(io.BytesIO(), format="png")
+    elapsed = time.perf_counter() - started
+    print(f"antigo (pyplot): {charts} gráficos, {elapsed / charts * 1000:.1f} ms/gráfico, "
+          f"RSS {before:.0f} -> {rss_mb():.0f} MB, figuras abertas: {len(plt.get_fignums())}")
+    plt.close("all")
+
+
+async def run(charts: int, workers: int, concurrency: int, backend: str):
+    renderer = ChartRenderer(backend=backend, workers=workers, timeout=60, cache_size=0)
+    draw = renderer.backend.draw_monthly_comparison
+    lag = 0.0
+
+    async def ticker():
+        nonlocal lag
+        last = time.perf_counter()
+        while True:
+            await asyncio.sleep(0.005)
+            now = time.perf_counter()
+            lag = max(lag, now - last - 0.005)
+            last = now
+
+    async def samples():
+        seen = {}
+        for _ in range(workers * 4):
+            pid, rss = await renderer.run(worker_rss)
+            seen[pid] = rss
+        return seen
+
+    await renderer.run(worker_rss)
+    task = asyncio.create_task(ticker())
+    started = time.perf_counter()
+    done = 0
+    step = max(1, charts // 10)
+    print(f"{'gráficos':>9} {'ms/gráfico':>11} {'RSS main':>9} {'RSS workers (MB)':>24} {'lag máx (ms)':>13}")
+    try:
+        while done < charts:
+            batch = min(step, charts - done)
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def one(i):
+                async with semaphore:
+                    await renderer.render(draw, MONTHS, [i + m for m in range(6)])
+
+            await asyncio.gather(*(one(done + i) for i in range(batch)))
+            done += batch
+            elapsed = time.perf_counter() - started
+            workers_rss = " ".join(f"{v:.0f}" for v in sorted((await samples()).values()))
+            print(f"{done:>9} {elapsed / done * 1000:>11.1f} {rss_mb():>9.0f} {workers_rss:>24} {lag * 1000:>13.1f}")
+    finally:
+        task.cancel()
+        await renderer.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--charts", type=int, default=10000)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--backend", default="lite", choices=["lite", "matplotlib"])
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--legacy", type=int, default=0, help="gráficos no padrão antigo (0: pula)")
+    args = parser.parse_args()
+
+    if args.legacy:
+        legacy(args.legacy)
+    asyncio.run(run(args.charts, args.workers, args.concurrency, args.backend))
+
+
+if __name__ == "__main__":
+    main()
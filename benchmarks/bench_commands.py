@@ -0,0 +1,91 @@
+"""
+    Microbenchmark do roteador de comandos.
+
+Mede o custo por mensagem do despacho de comandos usado por
+WhatsAppService.process_message com diferentes quantidades de comandos
+registrados, comparando a tabela de comandos com uma cadeia de if
+equivalente.
+
+uso: python -m benchmarks.bench_commands [--messages N]
+"""
+import argparse
+import timeit
+from typing import List, Optional, Tuple
+
+from app.services.commands import CommandRegistry, transaction_parser
+
+USAGE = "/despesa valor descrição #categoria"
+WITH_ARGS = {"/despesa", "/receita"}
+MESSAGES = [
+    "oi",
+    "/ajuda",
+    "/despesa 50 Almoço #alimentação",
+    "/receita 1.000,00 Salário #salário",
+    "/comando25",
+    "mensagem qualquer",
+]
+
+
+def command_list(size: int) -> List[Tuple[Tuple[str, ...], Optional[str]]]:
+    """Comandos (nomes, resposta) usados pelas duas implementações;
+    /despesa e /receita têm argumentos"""
+    commands = [
+        (("oi", "olá", "ola"), "olá"),
+        (("/ajuda",), "ajuda"),
+        (("/despesa",), "despesa"),
+        (("/receita",), "receita"),
+    ]
+    commands += [((f"/comando{i}",), "ok") for i in range(size - len(commands))]
+    return commands
+
+
+def build_registry(size: int) -> CommandRegistry:
+    registry = CommandRegistry()
+    for (name, *aliases), reply in command_list(size):
+        parser = transaction_parser(USAGE) if name in WITH_ARGS else None
+        registry.register(name, lambda c, reply=reply: reply, aliases=aliases, parser=parser)
+    return registry
+
+
+def build_if_chain(size: int):
+    commands = command_list(size)
+
+    def dispatch(text: str):
+        text = text.lower().strip()
+        for names, reply in commands:
+            if names[0] in WITH_ARGS:
+                if text.startswith(names[0]):
+                    return reply
+            elif text in names:
+                return reply
+        return None
+    return dispatch
+
+
+def bench(dispatch, repeat: int) -> float:
+    """Retorna o custo médio por mensagem em microssegundos"""
+    def run():
+        for message in MESSAGES:
+            dispatch(message)
+    best = min(timeit.repeat(run, number=repeat, repeat=5))
+    return best / (repeat * len(MESSAGES)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"{'comandos':>9} {'registro (µs)':>14} {'if-chain (µs)':>14}")
+    for size in (5, 50, 200, 1000):
+        registry = build_registry(size)
+        assert len(registry) == sum(len(names) for names, _ in command_list(size))
+        print(
+            f"{len(command_list(size)):>9} "
+            f"{bench(registry.dispatch, args.messages):>14.3f} "
+            f"{bench(build_if_chain(size), args.messages):>14.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+    Benchmark de bytes por imagem e tempo de geração das imagens do bot.
+
+Compara o pipeline antigo (tamanho de desktop, PNG de cores reais e string
+base64) com os presets e formatos de app.services.images, que entregam os
+bytes crus. Mede os três gráficos (backend lite e, se instalado, matplotlib)
+e o QR code do PIX.
+
+uso: python -m benchmarks.bench_images [--repeat N] [--json]
+"""
+import argparse
+import base64
+import importlib.util
+import io
+import json
+import time
+from typing import Callable, Dict, List
+
+import qrcode
+
+from app.services import images
+from app.services.charts import load_backend
+from app.services.pix import PixPayload, PixService
+
+CATEGORIES = {"Alimentação": 820.5, "Transporte": 310.0, "Moradia": 1500.0, "Lazer": 240.9, "Saúde": 180.0}
+MONTHS = ["Jan", "Fev", "Mar", "Abr", "Mai", "Jun"]
+VALUES = [2400.0, 2210.5, 2680.0, 1990.0, 2300.2, 2750.8]
+PAYLOAD = PixService.create_payload(PixPayload(
+    merchant_name="PixzinhoBot", merchant_city="SAO PAULO", postal_code="01000000",
+    amount=125.9, transaction_id="PIX20240510120000", description="Almoço",
+))
+
+VARIANTS = [
+    ("antigo: desktop png + base64", "png", "desktop", True),
+    ("desktop png8", "png8", "desktop", False),
+    ("whatsapp png", "png", "whatsapp", False),
+    ("whatsapp png8", "png8", "whatsapp", False),
+    ("whatsapp webp", "webp", "whatsapp", False),
+]
+
+
+def charts(backend, fmt: str, preset: str) -> List[Callable[[], bytes]]:
+    return [
+        lambda: backend.draw_expense_pie(CATEGORIES, fmt, preset),
+        lambda: backend.draw_monthly_comparison(MONTHS, VALUES, fmt, preset),
+        lambda: backend.draw_savings_progress(5000, 1830, fmt, preset),
+    ]
+
+
+def legacy_qr() -> bytes:
+    """Como generate_qr_code fazia: box 10, borda 5, PNG"""
+    qr = qrcode.QRCode(version=1, box_size=10, border=5)
+    qr.add_data(PAYLOAD)
+    qr.make(fit=True)
+    buffer = io.BytesIO()
+    qr.make_image(fill_color="black", back_color="white").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def qr(fmt: str, preset: str) -> bytes:
+    code = qrcode.QRCode(version=1, border=4)
+    code.add_data(PAYLOAD)
+    code.make(fit=True)
+    code.box_size = PixService.qr_box_size(code.modules_count, preset)
+    return images.encode(code.make_image(fill_color="black", back_color="white").get_image(), fmt)
+
+
+def measure(name: str, draws: List[Callable[[], bytes]], as_base64: bool, repeat: int) -> Dict:
+    for draw in draws:
+        draw()
+    sizes = []
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for draw in draws:
+            data = draw()
+            sizes.append(len(base64.b64encode(data).decode()) if as_base64 else len(data))
+    elapsed = time.perf_counter() - started
+    return {
+        "case": name,
+        "bytes_per_image": sum(sizes) // len(sizes),
+        "ms_per_image": round(elapsed / len(sizes) * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    results: List[Dict] = []
+    backends = ["lite"] + (["matplotlib"] if importlib.util.find_spec("matplotlib") else [])
+    for name in backends:
+        backend = load_backend(name)
+        for label, fmt, preset, as_base64 in VARIANTS:
+            results.append(measure(f"{name}: {label}", charts(backend, fmt, preset), as_base64, args.repeat))
+
+    results.append(measure("qr: antigo png + base64", [legacy_qr], True, args.repeat))
+    for fmt in ("png", "png8", "webp"):
+        results.append(measure(f"qr: whatsapp {fmt}", [lambda fmt=fmt: qr(fmt, "whatsapp")], False, args.repeat))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'caso':<44} {'bytes/imagem':>12} {'ms/imagem':>10}")
+    for r in results:
+        print(f"{r['case']:<44} {r['bytes_per_image']:>12} {r['ms_per_image']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+    Benchmark do custo de logging por mensagem do webhook.
+
+Compara, na thread que atende a requisição, o padrão antigo (seis
+logger.info com f-strings e corpo completo da mensagem, StreamHandler
+síncrono) com o modo estruturado (argumentos preguiçosos, fila com thread
+de escrita e amostragem de INFO) de app.services.logs.
+
+uso: python -m benchmarks.bench_logging [--messages N]
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+from app.services.logs import setup_logging, shutdown_logging
+
+MESSAGE = {
+    "id": "ABCDEF123456",
+    "from": "5511999990000@c.us",
+    "text": "/despesa 50 Almoço no restaurante perto do trabalho #alimentação",
+    "timestamp": 1700000000,
+}
+RESPONSE = "💸 Despesa: R$ 50,00\n📝 Almoço no restaurante perto do trabalho\n🏷️ #alimentação"
+
+
+def eager(logger: logging.Logger, message: dict):
+    """Como o webhook e process_message registravam cada mensagem"""
+    text = message["text"]
+    logger.info("\n📨 Webhook recebido:")
+    logger.info(f"Mensagem: {message}")
+    logger.info(f"De: {message['from']}")
+    logger.info(f"Texto: {text}")
+    logger.info(f"\n📨 Processando mensagem:")
+    logger.info(f"Texto original: {text}")
+    logger.info(f"Texto processado: {text.lower().strip()}")
+    logger.info("\n✅ Mensagem processada:")
+    logger.info(f"Resposta: {RESPONSE}")
+
+
+def lazy(logger: logging.Logger, message: dict):
+    """Padrão atual: um INFO estruturado, detalhes em DEBUG preguiçoso"""
+    logger.info("📨 Webhook recebido", extra={"from_number": message["from"]})
+    logger.debug("Mensagem: %s", message)
+    logger.debug("📨 Processando mensagem: %s", message["text"])
+    logger.debug("✅ Resposta: %s", RESPONSE)
+
+
+def run(log, messages: int, **config) -> float:
+    """Custo médio por mensagem na thread chamadora, em microssegundos"""
+    with tempfile.NamedTemporaryFile("w", delete=False, suffix=".log") as output:
+        setup_logging(stream=output, **config)
+        logger = logging.getLogger("app.routes.whatsapp")
+        started = time.perf_counter()
+        for _ in range(messages):
+            log(logger, MESSAGE)
+        elapsed = time.perf_counter() - started
+        shutdown_logging()
+    os.unlink(output.name)
+    return elapsed / messages * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=20000)
+    args = parser.parse_args()
+
+    scenarios = [
+        ("antigo: f-strings, texto síncrono", eager, {}),
+        ("preguiçoso, texto síncrono", lazy, {}),
+        ("preguiçoso, json em fila", lazy, {"fmt": "json", "use_queue": True}),
+        ("preguiçoso, json em fila, 10% INFO", lazy, {
+            "fmt": "json", "use_queue": True, "sampling": "app.routes.whatsapp=0.1",
+        }),
+    ]
+    print(f"{'cenário':<38} {'µs/mensagem':>12}")
+    for name, log, config in scenarios:
+        print(f"{name:<38} {run(log, args.messages, **config):>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
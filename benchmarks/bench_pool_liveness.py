@@ -0,0 +1,84 @@
+"""
+    Benchmark de round trips por requisição: pool_pre_ping x checagem adaptativa.
+
+Cada "requisição" pega uma conexão do pool e executa uma consulta. Com
+pool_pre_ping, todo checkout faz um SELECT 1 antes (um round trip a mais).
+Com a checagem adaptativa (app.db.profiles.LivenessCheck), só conexões
+paradas no pool por mais que o limite são checadas.
+
+O tráfego é simulado com um relógio: requisições a cada --gap ms e, a cada
+--burst requisições, uma pausa de --pause s. A latência de rede (--rtt ms)
+é somada a cada round trip (ping ou consulta), sem dormir de verdade.
+
+uso: python -m benchmarks.bench_pool_liveness [--requests N] [--rtt MS] [--idle S]
+"""
+import argparse
+import os
+import tempfile
+
+from sqlalchemy import create_engine, text
+
+from app.db.profiles import LivenessCheck
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def run(path: str, args, adaptive: bool) -> dict:
+    clock = Clock()
+    engine = create_engine(f"sqlite:///{path}", pool_size=5, pool_pre_ping=not adaptive)
+    pings = {"count": 0}
+    do_ping = engine.dialect.do_ping
+
+    def counted_ping(dbapi_connection):
+        pings["count"] += 1
+        return do_ping(dbapi_connection)
+
+    engine.dialect.do_ping = counted_ping
+    if adaptive:
+        LivenessCheck(args.idle, clock=clock).install(engine)
+
+    for i in range(args.requests):
+        clock.now += args.pause if i and i % args.burst == 0 else args.gap / 1000
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    engine.dispose()
+
+    round_trips = args.requests + pings["count"]
+    return {
+        "pings": pings["count"],
+        "round_trips_per_request": round_trips / args.requests,
+        "network_ms": round_trips * args.rtt,
+    }
+
+
+def main(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        print(f"{'cenário':<24} {'pings':>7} {'round trips/req':>16} {'rede (ms)':>10}")
+        results = {}
+        for name, adaptive in (("pool_pre_ping", False), (f"adaptativa ({args.idle:g}s)", True)):
+            results[name] = result = run(path, args, adaptive)
+            print(
+                f"{name:<24} {result['pings']:>7} "
+                f"{result['round_trips_per_request']:>16.2f} {result['network_ms']:>10.0f}"
+            )
+        before, after = results.values()
+        saved = before["pings"] - after["pings"]
+        print(f"\nround trips economizados: {saved} ({saved / args.requests:.2f} por requisição)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=10_000)
+    parser.add_argument("--gap", type=float, default=50, help="intervalo entre requisições (ms)")
+    parser.add_argument("--burst", type=int, default=200, help="requisições entre pausas")
+    parser.add_argument("--pause", type=float, default=120, help="duração da pausa (s)")
+    parser.add_argument("--rtt", type=float, default=20, help="latência de rede por round trip (ms)")
+    parser.add_argument("--idle", type=float, default=30, help="limite de ociosidade da checagem (s)")
+    main(parser.parse_args())
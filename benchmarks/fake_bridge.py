@@ -0,0 +1,100 @@
+"""
+    Servidor HTTP mínimo que simula o servidor Node.js (whatsapp-server.js).
+
+Responde POST /send-message e GET /whatsapp/qr com keep-alive, contando
+requisições e conexões TCP abertas, para os benchmarks rodarem sem o
+WhatsApp real.
+"""
+import asyncio
+import json
+from typing import List, Optional, Set
+
+
+class FakeBridge:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.requests = 0
+        self.connections = 0
+        self.messages: List[dict] = []
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._handlers: Set[asyncio.Task] = set()
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            # Encerra conexões keep-alive ainda abertas pelos clientes
+            for task in list(self._handlers):
+                task.cancel()
+            await asyncio.gather(*self._handlers, return_exceptions=True)
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self) -> "FakeBridge":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        self._handlers.add(asyncio.current_task())
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode().split(" ", 2)
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode().partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                body = b""
+                length = int(headers.get("content-length", 0))
+                if length:
+                    body = await reader.readexactly(length)
+
+                self.requests += 1
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+
+                if method == "POST" and path == "/send-message":
+                    self.messages.append(json.loads(body or b"{}"))
+                    status, payload = "200 OK", {"success": True}
+                elif method == "GET" and path == "/whatsapp/qr":
+                    status, payload = "200 OK", {"qr": "fake-qr"}
+                else:
+                    status, payload = "404 Not Found", {"error": "not found"}
+
+                data = json.dumps(payload).encode()
+                close = headers.get("connection", "").lower() == "close"
+                writer.write(
+                    f"HTTP/1.1 {status}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'close' if close else 'keep-alive'}\r\n\r\n".encode()
+                    + data
+                )
+                await writer.drain()
+                if close:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionResetError, asyncio.CancelledError):
+            pass
+        finally:
+            self._handlers.discard(asyncio.current_task())
+            writer.close()
@@ -0,0 +1,106 @@
+"""
+    Relatório de tempo de importação (python -X importtime).
+
+Importa o módulo num processo novo, num diretório temporário e sem
+DATABASE_URL, e lista os módulos que mais pesam na partida a frio. O
+relatório também aponta arquivos criados durante a importação (a importação
+não deve ter efeitos colaterais).
+
+uso: python -m benchmarks.importtime [--module app.main] [--top N] [--json]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@dataclass(frozen=True)
+class ImportEntry:
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def parse_importtime(output: str) -> List[ImportEntry]:
+    """Lê as linhas "import time: self | cumulative | módulo" do stderr"""
+    entries = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # cabeçalho
+        name = fields[2].rstrip()
+        module = name.lstrip()
+        entries.append(ImportEntry(
+            module=module,
+            self_us=int(fields[0]),
+            cumulative_us=int(fields[1]),
+            depth=(len(name) - len(module) - 1) // 2,
+        ))
+    return entries
+
+
+def measure(module: str = "app.main", env: Optional[Dict[str, str]] = None) -> Dict:
+    """Importa o módulo num processo novo e devolve o relatório"""
+    child_env = {k: v for k, v in os.environ.items() if k != "DATABASE_URL"}
+    child_env["PYTHONPATH"] = os.pathsep.join(filter(None, [ROOT, child_env.get("PYTHONPATH")]))
+    child_env.update(env or {})
+
+    with tempfile.TemporaryDirectory() as cwd:
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=cwd, env=child_env, capture_output=True, text=True,
+        )
+        created = sorted(os.listdir(cwd))
+
+    if result.returncode != 0:
+        raise RuntimeError(f"falha ao importar {module}:\n{result.stderr[-2000:]}")
+
+    entries = parse_importtime(result.stderr)
+    root = next(e for e in reversed(entries) if e.module == module)
+    return {
+        "module": module,
+        "total_ms": root.cumulative_us / 1000,
+        "modules": [e.module for e in entries],
+        "created_files": created,
+        "entries": entries,
+    }
+
+
+def top(entries: List[ImportEntry], n: int = 20, key: str = "self_us") -> List[ImportEntry]:
+    return sorted(entries, key=lambda e: getattr(e, key), reverse=True)[:n]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--json", action="store_true", help="relatório em JSON")
+    args = parser.parse_args()
+
+    report = measure(args.module)
+    if args.json:
+        report = {**report, "entries": [asdict(e) for e in top(report["entries"], args.top)]}
+        json.dump(report, sys.stdout, indent=2)
+        print()
+        return
+
+    print(f"{report['module']}: {report['total_ms']:.0f} ms ({len(report['modules'])} módulos)")
+    if report["created_files"]:
+        print(f"arquivos criados na importação: {report['created_files']}")
+    print()
+    print(f"{'próprio ms':>10} {'acumulado ms':>12}  módulo")
+    for entry in top(report["entries"], args.top):
+        print(f"{entry.self_us / 1000:>10.1f} {entry.cumulative_us / 1000:>12.1f}  {entry.module}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""
+    Replay de mensagens contra o webhook do WhatsApp.
+
+Envia um corpus de payloads (gravado em JSONL ou sintético) para
+POST /whatsapp/webhook da aplicação (app.main:app), em processo, via
+httpx.ASGITransport. O servidor Node.js é substituído pelo servidor falso
+de benchmarks/fake_bridge.py.
+
+Relata vazão, latência p50/p95/p99 por tipo de comando e comandos SQL por
+mensagem. Com --json o relatório sai em JSON para acompanhar regressões.
+
+uso:
+    python -m benchmarks.replay_webhook [--corpus arquivo.jsonl] [--messages N]
+        [--concurrency C] [--app modulo:atributo] [--json]
+
+Cada linha do corpus é um payload do webhook: {"message": {"from": ..., "text": ...}}
+"""
+import argparse
+import asyncio
+import importlib
+import itertools
+import json
+import logging
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, Iterator, List
+
+import httpx
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from benchmarks.fake_bridge import FakeBridge
+
+SYNTHETIC_TEXTS = [
+    "oi",
+    "/ajuda",
+    "/saldo",
+    "/extrato",
+    "/despesa 50 Almoço #alimentação",
+    "/despesa 12,90 Café",
+    "/receita 1.000,00 Salário #salário",
+    "mensagem qualquer",
+]
+
+
+class StatementCounter:
+    """Conta comandos SQL executados por qualquer engine do processo"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __enter__(self):
+        event.listen(Engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(Engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+
+def synthetic_corpus(senders: int = 50, seed: int = 42) -> Iterator[Dict]:
+    rng = random.Random(seed)
+    for i in itertools.count():
+        yield {
+            "message": {
+                "id": f"synthetic-{i}",
+                "from": f"55119{rng.randrange(senders):08d}@c.us",
+                "text": rng.choice(SYNTHETIC_TEXTS),
+                "timestamp": 1700000000 + i,
+            }
+        }
+
+
+def load_corpus(path: str) -> List[Dict]:
+    with open(path, encoding="utf-8") as corpus:
+        payloads = [json.loads(line) for line in corpus if line.strip()]
+    return [p if "message" in p else {"message": p} for p in payloads]
+
+
+def command_type(payload: Dict) -> str:
+    text = (payload["message"].get("text") or "").strip().lower()
+    head = text.split(" ", 1)[0] if text else ""
+    return head if head.startswith("/") else "texto"
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def summarize(latencies: List[float]) -> Dict:
+    return {
+        "count": len(latencies),
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def load_app(target: str):
+    module_name, _, attribute = target.partition(":")
+    return getattr(importlib.import_module(module_name), attribute or "app")
+
+
+async def replay(app, payloads: List[Dict], concurrency: int, bridge: FakeBridge) -> Dict:
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    statuses: Dict[int, int] = defaultdict(int)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://app") as client:
+        async def send(payload: Dict):
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post("/whatsapp/webhook", json=payload)
+                latencies[command_type(payload)].append(time.perf_counter() - started)
+                statuses[response.status_code] += 1
+
+        with StatementCounter() as statements:
+            started = time.perf_counter()
+            await asyncio.gather(*(send(p) for p in payloads))
+
+            # Modo fila: espera os workers entregarem as respostas ao servidor falso
+            queued = statuses.get(202, 0)
+            deadline = time.perf_counter() + 30
+            while len(bridge.messages) < queued and time.perf_counter() < deadline:
+                await asyncio.sleep(0.01)
+            elapsed = time.perf_counter() - started
+
+    all_latencies = [l for samples in latencies.values() for l in samples]
+    return {
+        "messages": len(payloads),
+        "concurrency": concurrency,
+        "elapsed_s": elapsed,
+        "throughput_msg_s": len(payloads) / elapsed if elapsed else 0.0,
+        "statuses": dict(statuses),
+        "bridge_messages": len(bridge.messages),
+        "db_statements": statements.count,
+        "db_statements_per_message": statements.count / len(payloads) if payloads else 0.0,
+        "latency": summarize(all_latencies),
+        "by_command": {name: summarize(samples) for name, samples in sorted(latencies.items())},
+    }
+
+
+def print_report(report: Dict):
+    print(f"mensagens:  {report['messages']} (concorrência {report['concurrency']})")
+    print(f"vazão:      {report['throughput_msg_s']:.0f} msg/s")
+    print(f"status:     {report['statuses']}")
+    print(f"SQL/msg:    {report['db_statements_per_message']:.2f}")
+    print(f"bridge:     {report['bridge_messages']} mensagens enviadas")
+    print()
+    print(f"{'comando':<12} {'n':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    rows = list(report["by_command"].items()) + [("total", report["latency"])]
+    for name, stats in rows:
+        print(
+            f"{name:<12} {stats['count']:>6} {stats['p50_ms']:>8.2f} "
+            f"{stats['p95_ms']:>8.2f} {stats['p99_ms']:>8.2f}"
+        )
+
+
+async def main(args):
+    if args.corpus:
+        corpus = load_corpus(args.corpus)
+        payloads = list(itertools.islice(itertools.cycle(corpus), args.messages or len(corpus)))
+    else:
+        payloads = list(itertools.islice(synthetic_corpus(), args.messages or 1000))
+
+    async with FakeBridge() as bridge:
+        # A aplicação lê NODE_URL ao ser importada
+        os.environ["NODE_URL"] = bridge.url
+        app = load_app(args.app)
+        async with app.router.lifespan_context(app):
+            report = await replay(app, payloads, args.concurrency, bridge)
+
+    if args.json:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", help="arquivo JSONL com payloads gravados")
+    parser.add_argument("--messages", type=int, default=0, help="total de mensagens (padrão: corpus inteiro ou 1000)")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--app", default="app.main:app")
+    parser.add_argument("--json", action="store_true", help="relatório em JSON")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    asyncio.run(main(args))
@@ -1,6 +1,7 @@
 import os
 import logging
 from decouple import config
+from app.db.profiles import detect_profile
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -28,6 +29,8 @@ def check_database_url():
     if 'sslmode=require' not in DATABASE_URL:
         logger.warning("⚠️ SSL não está configurado!")
         
+    # Porta 6543: pooler em modo transação (sem prepared statements no asyncpg)
+    logger.info(f"Perfil do engine: {config('DB_ENGINE_PROFILE', default='') or detect_profile(DATABASE_URL)}")
     logger.info("✅ URL do banco parece correta!")
     logger.info(f"URL: {DATABASE_URL}")
     return True
@@ -1,7 +1,6 @@
 import os
 import logging
-import time
-from app.db.session import initialize_db
+from app.db.session import initialize_db, wait_for_db
 from app.db.migrations import run_migrations
 import uvicorn
 
@@ -10,8 +9,8 @@ logger = logging.getLogger(__name__)
 
 def main():
     try:
-        # Aguarda banco inicializar
-        time.sleep(5)
+        # Aguarda o banco aceitar conexões
+        wait_for_db(timeout=float(os.getenv("DB_WAIT_TIMEOUT", "30")))
         
         # Inicializa banco
         initialize_db()
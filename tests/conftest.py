@@ -0,0 +1,68 @@
+import httpx
+import pytest
+import pytest_asyncio
+from fastapi import FastAPI
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlmodel import SQLModel
+
+from app.database import get_async_db
+from app.db.models import User
+from app.routes import finance
+from app.services.security import get_current_user
+
+
+@pytest.fixture
+def seed():
+    """Dados iniciais do banco da API: async (session) -> usuário logado.
+
+    Cada módulo sobrescreve esta fixture com o próprio cenário.
+    """
+    async def seed(session):
+        user = User(email="ana@example.com", hashed_password="x", full_name="Ana")
+        session.add(user)
+        return user
+    return seed
+
+
+@pytest.fixture
+def override_read_db():
+    """False deixa as leituras com o roteador de réplica (app.database.read_router)"""
+    return True
+
+
+@pytest_asyncio.fixture
+async def database(tmp_path):
+    """(engine, factory) de um SQLite novo com as tabelas da API"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'finance.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    yield engine, sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def client(database, seed, override_read_db):
+    """Cliente das rotas /finance com o usuário de seed autenticado"""
+    engine, factory = database
+    async with factory() as session:
+        user = await seed(session)
+        await session.commit()
+        await session.refresh(user)
+
+    async def override_db():
+        async with factory() as session:
+            yield session
+
+    app = FastAPI()
+    app.include_router(finance.router)
+    app.dependency_overrides[get_async_db] = override_db
+    if override_read_db:
+        app.dependency_overrides[finance.get_read_db] = override_db
+    app.dependency_overrides[get_current_user] = lambda: user
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        client.factory = factory
+        client.engine = engine
+        yield client
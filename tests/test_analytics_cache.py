@@ -0,0 +1,121 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlmodel import SQLModel
+
+from app.db.models import Account, Category, Transaction, TransactionRollup, User
+from app.services.analytics import FinancialAnalytics
+from app.services.analytics_cache import analytics_cache
+from app.services.cache import VersionedCache
+from app.services.rollups import api_rollup
+
+TABLES = [t.__table__ for t in (User, Account, Category, Transaction, TransactionRollup)]
+
+
+@pytest.mark.asyncio
+async def test_hits_and_lru_eviction():
+    """Testa acertos, expulsão do menos usado e a versão na chave"""
+    cache = VersionedCache(maxsize=2)
+    calls = []
+
+    async def load(value):
+        calls.append(value)
+        return value
+
+    for user_id in (1, 2, 1, 3):
+        await cache.get_or_load(cache.key(user_id, "x"), lambda: load(user_id))
+    assert calls == [1, 2, 3]
+    assert cache.evictions == 1
+    assert cache.key(2, "x") not in cache._data
+
+    cache.versions.bump(1)
+    await cache.get_or_load(cache.key(1, "x"), lambda: load(1))
+    assert calls == [1, 2, 3, 1]
+    assert cache.stats()["hit_rate"] == 0.2
+
+
+@pytest.mark.asyncio
+async def test_single_flight():
+    """Testa se chamadas simultâneas com a mesma chave carregam uma vez só"""
+    cache = VersionedCache()
+    calls = 0
+    release = asyncio.Event()
+
+    async def load():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return {"total": 10}
+
+    tasks = [asyncio.create_task(cache.get_or_load(cache.key(1, "x"), load)) for _ in range(5)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*tasks)
+    assert calls == 1
+    assert all(result is results[0] for result in results)
+    assert cache.coalesced == 4
+
+    async def fail():
+        raise RuntimeError("falhou")
+
+    with pytest.raises(RuntimeError):
+        await cache.get_or_load(cache.key(1, "y"), fail)
+    assert cache.key(1, "y") not in cache._data
+
+
+@pytest.mark.asyncio
+async def test_ttl_bounds_staleness_across_workers():
+    """Testa se a entrada expira mesmo sem escrita vista neste processo"""
+    now = [0.0]
+    cache = VersionedCache(ttl=60, clock=lambda: now[0])
+    calls = []
+
+    async def load():
+        calls.append(now[0])
+        return len(calls)
+
+    key = cache.key(1, "x")
+    assert await cache.get_or_load(key, load) == 1
+    now[0] = 59
+    assert await cache.get_or_load(key, load) == 1
+    # Outro worker gravou: a versão local não mudou, mas a entrada venceu
+    now[0] = 61
+    assert await cache.get_or_load(key, load) == 2
+    assert calls == [0, 61]
+    assert (cache.hits, cache.expired) == (1, 1)
+
+
+@pytest.mark.asyncio
+async def test_commit_invalidates_user(tmp_path):
+    """Testa se um commit com dados do usuário invalida o resumo em cache"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'cache.db'}")
+    SQLModel.metadata.create_all(engine, tables=TABLES)
+    with Session(engine) as db:
+        db.add(User(id=1, email="ana@example.com", hashed_password="x"))
+        db.add(Account(id=1, name="Carteira", owner_id=1))
+        db.commit()
+        user = db.get(User, 1)
+
+        def add(amount):
+            transaction = Transaction(
+                amount=amount, type="expense", description="t", date=datetime.now(),
+                owner_id=1, account_id=1,
+            )
+            db.add(transaction)
+            api_rollup().apply(db, transaction)
+            db.commit()
+            db.refresh(user)
+
+        add(30)
+        first = await FinancialAnalytics.monthly_summary(user, db)
+        hits = analytics_cache.hits
+        assert await FinancialAnalytics.monthly_summary(user, db) is first
+        assert analytics_cache.hits == hits + 1
+
+        add(20)
+        second = await FinancialAnalytics.monthly_summary(user, db)
+        assert (first["total_expense"], second["total_expense"]) == (30, 50)
+    engine.dispose()
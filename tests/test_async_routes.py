@@ -0,0 +1,88 @@
+from datetime import datetime
+
+import pytest
+from sqlmodel import select
+
+from app.database import async_database_url
+from app.db.models import Account, Category, Goal, Transaction, TransactionRollup
+from app.services.charts import chart_renderer
+from app.services.images import etag
+
+
+def test_async_database_url():
+    """Testa a conversão de URLs síncronas para drivers assíncronos"""
+    assert async_database_url("postgres://u:p@h/db?sslmode=require") == "postgresql+asyncpg://u:p@h/db?ssl=require"
+    assert async_database_url("postgresql://u:p@h/db") == "postgresql+asyncpg://u:p@h/db"
+    assert async_database_url("sqlite:///./finbot.db") == "sqlite+aiosqlite:///./finbot.db"
+    assert async_database_url("sqlite+aiosqlite:///x.db") == "sqlite+aiosqlite:///x.db"
+
+
+@pytest.mark.asyncio
+async def test_transaction_updates_balance(client):
+    """Testa criação de conta e transação com AsyncSession"""
+    response = await client.post("/finance/accounts/", json={"name": "Carteira", "balance": 100})
+    assert response.status_code == 200
+    account_id = response.json()["id"]
+
+    response = await client.post(
+        "/finance/transactions/",
+        json={"account_id": account_id, "amount": 30, "type": "expense", "description": "Almoço"},
+    )
+    assert response.status_code == 200
+
+    accounts = (await client.get("/finance/accounts/")).json()
+    assert accounts[0]["balance"] == 70
+
+    # Totais mensais atualizados junto com a transação
+    async with client.factory() as session:
+        rollup = (await session.execute(select(TransactionRollup))).scalars().one()
+    assert (rollup.type, rollup.category_id, rollup.total, rollup.count) == ("expense", 0, 30, 1)
+
+
+@pytest.mark.asyncio
+async def test_export_loads_category_eagerly(client):
+    """Testa se o CSV usa a categoria carregada na consulta (sem lazy load)"""
+    async with client.factory() as session:
+        category = Category(name="alimentação", type="expense")
+        account = Account(name="Carteira", balance=0, owner_id=1)
+        session.add_all([category, account])
+        await session.flush()
+        session.add(Transaction(
+            description="Almoço", amount=25.5, type="expense", date=datetime(2024, 5, 10),
+            account_id=account.id, category_id=category.id, owner_id=1,
+        ))
+        await session.commit()
+
+    params = {"start_date": "2024-05-01T00:00:00", "end_date": "2024-05-31T00:00:00"}
+    response = await client.get("/finance/export/transactions", params=params)
+    assert response.status_code == 200
+    lines = response.text.strip().splitlines()
+    assert lines[1].endswith("25.50,1,alimentação")
+
+    response = await client.get("/finance/export/transactions", params={**params, "format": "excel"})
+    assert response.content.startswith("﻿".encode("utf-8"))
+    assert ";" in response.content.decode("utf-8-sig").splitlines()[0]
+
+
+@pytest.mark.asyncio
+async def test_goal_chart_served_with_etag(client):
+    """Testa se o gráfico da meta sai em bytes com ETag e revalida com 304"""
+    async with client.factory() as session:
+        session.add(Goal(name="Viagem", target_amount=1000, current_amount=250, deadline=datetime(2030, 1, 1), owner_id=1))
+        await session.commit()
+
+    try:
+        response = await client.get("/finance/goals/1/chart")
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "image/png"
+        assert response.headers["etag"] == etag(response.content)
+
+        again = await client.get("/finance/goals/1/chart", headers={"If-None-Match": response.headers["etag"]})
+        assert again.status_code == 304
+        assert again.content == b""
+        weak = await client.get("/finance/goals/1/chart", headers={"If-None-Match": f'"x", W/{response.headers["etag"]}'})
+        assert weak.status_code == 304
+
+        assert (await client.get("/finance/goals/2/chart")).status_code == 404
+    finally:
+        await chart_renderer.shutdown()
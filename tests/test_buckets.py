@@ -0,0 +1,92 @@
+import random
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+from sqlmodel import SQLModel
+
+from app.db.models import Account, Transaction, TransactionRollup, User
+from app.services.analytics import FinancialAnalytics
+from app.services.buckets import UNITS, bucket_start, bucket_totals, numpy_totals, shift
+
+TABLES = [t.__table__ for t in (User, Account, Transaction, TransactionRollup)]
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'buckets.db'}")
+    SQLModel.metadata.create_all(engine, tables=TABLES)
+    with Session(engine) as session:
+        session.add(User(id=1, email="ana@example.com", hashed_password="x"))
+        session.add(Account(id=1, name="Carteira", owner_id=1))
+        rng = random.Random(3)
+        now = datetime.now()
+        session.add_all([
+            Transaction(
+                amount=round(rng.uniform(1, 100), 2), type=rng.choice(["income", "expense"]),
+                description="t", date=now - timedelta(days=rng.randrange(0, 3 * 365), minutes=rng.randrange(1440)),
+                owner_id=1, account_id=1,
+            )
+            for _ in range(2000)
+        ])
+        session.commit()
+        yield session
+    engine.dispose()
+
+
+def reference(db, unit):
+    totals = defaultdict(float)
+    for t in db.query(Transaction):
+        totals[(bucket_start(t.date, unit), t.type)] += t.amount
+    return totals
+
+
+def rounded(totals):
+    return {key: round(value, 2) for key, value in totals.items()}
+
+
+def test_calendar_boundaries():
+    """Testa os limites do calendário e o deslocamento de períodos"""
+    sunday = datetime(2024, 3, 10, 23, 59)
+    assert bucket_start(sunday, "week") == date(2024, 3, 4)
+    assert bucket_start(date(2024, 3, 4), "week") == date(2024, 3, 4)
+    assert bucket_start(sunday, "month") == date(2024, 3, 1)
+    assert bucket_start(sunday, "year") == date(2024, 1, 1)
+    assert shift(date(2024, 1, 1), "month", -2) == date(2023, 11, 1)
+    assert shift(date(2024, 3, 4), "week", -1) == date(2024, 2, 26)
+    with pytest.raises(ValueError):
+        bucket_start(sunday, "quarter")
+
+
+@pytest.mark.parametrize("unit", UNITS)
+def test_sql_and_numpy_match_reference(db, unit):
+    """Testa se SQL (SQLite) e NumPy dão os mesmos totais que o cálculo em Python"""
+    args = (db, Transaction.date, Transaction.type, Transaction.amount, [Transaction.owner_id == 1], unit)
+    expected = rounded(reference(db, unit))
+    assert rounded(bucket_totals(*args, strategy="sql")) == expected
+    assert rounded(bucket_totals(*args, strategy="numpy")) == expected
+
+
+def test_numpy_streams_in_chunks():
+    """Testa o agrupamento em blocos menores que a entrada"""
+    rows = [(datetime(2024, 1, d), "expense", 1.5) for d in range(1, 32)]
+    totals = numpy_totals(iter(rows), "week", chunk=4)
+    assert totals[(date(2024, 1, 1), "expense")] == 10.5
+    assert sum(totals.values()) == 31 * 1.5
+
+
+@pytest.mark.asyncio
+async def test_weekly_trends_single_query(db):
+    """Testa tendências semanais com uma consulta e períodos do calendário"""
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db.bind, "before_cursor_execute", listener)
+    user = db.get(User, 1)
+    trends = await FinancialAnalytics.spending_trends(user, db, unit="week", periods=4)
+    event.remove(db.bind, "before_cursor_execute", listener)
+
+    first = shift(bucket_start(datetime.now(), "week"), "week", -3)
+    assert {t["start"] for t in trends} <= {shift(first, "week", i).isoformat() for i in range(4)}
+    assert len([s for s in statements if "transaction" in s]) == 1
@@ -0,0 +1,173 @@
+import asyncio
+import gc
+import importlib.util
+import io
+import time
+import xml.etree.ElementTree as ET
+
+import pytest
+from PIL import Image
+
+from app.services import charts_lite
+from app.services.charts import ChartRenderer, ChartService, load_backend
+from benchmarks.importtime import measure
+
+PNG = b"\x89PNG"
+needs_matplotlib = pytest.mark.skipif(
+    importlib.util.find_spec("matplotlib") is None, reason="matplotlib não instalado"
+)
+
+
+def slow(seconds: float) -> float:
+    time.sleep(seconds)
+    return seconds
+
+
+def draw_all(backend, fmt):
+    return [
+        backend.draw_expense_pie({"Alimentação": 300, "Transporte": 120, "Lazer": 0}, fmt),
+        backend.draw_monthly_comparison(["Jan", "Fev", "Mar"], [100.0, 80.0, 120.5], fmt),
+        backend.draw_savings_progress(1000, 250, fmt),
+    ]
+
+
+@pytest.mark.parametrize("name", ["lite", pytest.param("matplotlib", marks=needs_matplotlib)])
+def test_backends_draw_every_format(name):
+    """Testa se cada backend gera png, png8, webp e svg válidos para os três gráficos"""
+    backend = load_backend(name)
+    assert all(image.startswith(PNG) for image in draw_all(backend, "png"))
+    for image in draw_all(backend, "png8"):
+        assert Image.open(io.BytesIO(image)).mode == "P"
+    for image in draw_all(backend, "webp"):
+        assert Image.open(io.BytesIO(image)).format == "WEBP"
+    for image in draw_all(backend, "svg"):
+        assert ET.fromstring(image).tag.endswith("svg")
+
+
+@pytest.mark.parametrize("name", ["lite", pytest.param("matplotlib", marks=needs_matplotlib)])
+def test_presets_limit_width(name):
+    """Testa se o preset reduz a largura mantendo a proporção"""
+    backend = load_backend(name)
+    sizes = {
+        preset: Image.open(io.BytesIO(backend.draw_monthly_comparison(["Jan"], [1.0], "png", preset))).size
+        for preset in ("desktop", "whatsapp", "thumbnail")
+    }
+    assert sizes == {"desktop": (1200, 600), "whatsapp": (800, 400), "thumbnail": (400, 200)}
+
+
+def test_lite_svg_content():
+    """Testa rótulos, fatias e escape de texto no SVG do backend leve"""
+    svg = charts_lite.draw_expense_pie({"Casa & Cia": 75, "<Outros>": 25}, "svg").decode()
+    assert "75.0%" in svg and "25.0%" in svg
+    assert "Casa &amp; Cia" in svg and "&lt;Outros&gt;" in svg
+    assert svg.count("<path") == 2
+
+    assert "<circle" in charts_lite.draw_expense_pie({"Tudo": 10}, "svg").decode()
+    assert "Sem despesas" in charts_lite.draw_expense_pie({}, "svg").decode()
+    assert "25.0%" in charts_lite.draw_savings_progress(200, 50, "svg").decode()
+    thumbnail = ET.fromstring(charts_lite.draw_savings_progress(10, 5, "svg", "thumbnail"))
+    assert (thumbnail.get("width"), thumbnail.get("viewBox")) == ("400", "0 0 800 300")
+
+    with pytest.raises(ValueError):
+        charts_lite.draw_savings_progress(1, 1, "gif")
+    with pytest.raises(ValueError):
+        charts_lite.draw_savings_progress(1, 1, "png", "4k")
+    with pytest.raises(ValueError):
+        load_backend("svgwrite")
+
+
+def test_service_keeps_base64_strings():
+    """Testa se os métodos generate_* continuam devolvendo base64 (borda JSON)"""
+    assert ChartService.generate_savings_progress_chart(1000, 250).startswith("iVBOR")
+    assert ChartService.generate_expense_pie_chart({"a": 1}).startswith("iVBOR")
+
+
+def test_charts_import_does_not_load_plotting_libraries():
+    """Testa se importar o serviço de gráficos não carrega matplotlib nem Pillow"""
+    report = measure("app.services.charts")
+    assert report["created_files"] == []
+    for module in ("matplotlib", "PIL"):
+        assert module not in report["modules"]
+
+
+@needs_matplotlib
+def test_repeated_draws_do_not_leak_figures():
+    """Testa se o backend matplotlib não deixa figuras vivas"""
+    from matplotlib.figure import Figure
+    import matplotlib.pyplot as plt
+
+    backend = load_backend("matplotlib")
+    for i in range(50):
+        backend.draw_monthly_comparison(["Jan", "Fev"], [i, i + 1])
+    gc.collect()
+    assert not [obj for obj in gc.get_objects() if isinstance(obj, Figure)]
+    assert plt.get_fignums() == []
+
+
+def test_cache_key_depends_on_data_and_order():
+    """Testa se a chave muda com os dados, a ordem das categorias e o formato"""
+    pie = charts_lite.draw_expense_pie
+    a = ChartRenderer.key(pie, {"a": 1, "b": 2})
+    assert a == ChartRenderer.key(pie, {"a": 1, "b": 2})
+    assert a != ChartRenderer.key(pie, {"b": 2, "a": 1})
+    assert a != ChartRenderer.key(pie, {"a": 1, "b": 3})
+    assert a != ChartRenderer.key(pie, {"a": 1, "b": 2}, "svg")
+    assert a != ChartRenderer.key(charts_lite.draw_monthly_comparison, {"a": 1, "b": 2})
+
+
+@pytest.mark.asyncio
+async def test_render_in_pool_with_cache_and_free_loop():
+    """Testa se o desenho roda fora do event loop e gráficos iguais saem do cache"""
+    renderer = ChartRenderer(workers=1, timeout=60)
+    pie = renderer.backend.draw_expense_pie
+    gaps = []
+
+    async def ticker():
+        last = time.perf_counter()
+        while True:
+            await asyncio.sleep(0.01)
+            now = time.perf_counter()
+            gaps.append(now - last)
+            last = now
+
+    task = asyncio.create_task(ticker())
+    try:
+        first, second = await asyncio.gather(
+            renderer.render(pie, {"Alimentação": 300, "Lazer": 50}),
+            renderer.render(pie, {"Alimentação": 300, "Lazer": 50}),
+        )
+        third = await renderer.render(pie, {"Alimentação": 300, "Lazer": 50})
+    finally:
+        task.cancel()
+        await renderer.shutdown()
+
+    assert first.startswith(PNG)
+    assert first == second == third
+    assert renderer.rendered == 1
+    assert renderer.cache.stats()["hits"] == 1
+    assert renderer.cache.stats()["coalesced"] == 1
+    assert max(gaps) < 0.5
+
+
+@pytest.mark.asyncio
+async def test_timeout_is_raised_and_counted():
+    """Testa se um gráfico lento estoura o timeout e o pool com o worker preso é trocado"""
+    renderer = ChartRenderer(workers=1, timeout=0.5)
+    try:
+        # A partida do worker (spawn + backend) fica fora do timeout
+        await renderer.run(slow, 0, timeout=60)
+        stuck = list(renderer.executor._processes.values())
+        with pytest.raises(asyncio.TimeoutError):
+            await renderer.run(slow, 30)
+        assert renderer.timeouts == 1
+        assert renderer.stats()["recycled"] == 1
+        assert renderer.stats()["running"] is False
+
+        for process in stuck:
+            process.join(5)
+            assert not process.is_alive()
+        # Pool novo, sem esperar o desenho preso terminar
+        assert await renderer.run(slow, 0, timeout=60) == 0
+    finally:
+        await renderer.shutdown()
+    assert renderer.stats()["running"] is False
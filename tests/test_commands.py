@@ -0,0 +1,154 @@
+import sys
+from datetime import datetime
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.commands import (
+    CommandRegistry,
+    CommandSyntaxError,
+    ParsedCommand,
+    TransactionCommand,
+    parse_amount,
+    transaction_parser,
+)
+from app.services import whatsapp as whatsapp_module
+from app.services.identity import identity_resolver
+from app.services.pagination import InvalidCursor, Page
+from app.services.whatsapp import commands, whatsapp_service
+
+USAGE = "/despesa valor descrição #categoria"
+
+
+@pytest.fixture
+def registry():
+    registry = CommandRegistry()
+    registry.register("/despesa", lambda c: c, parser=transaction_parser(USAGE), usage=USAGE)
+    registry.register("oi", lambda c: "olá", aliases=["ola"])
+    return registry
+
+
+def test_parse_transaction_with_category(registry):
+    """Testa se a gramática separa valor, descrição e categoria"""
+    _, parsed = registry.parse("/despesa 50 Almoço no centro #Alimentação")
+    assert parsed == TransactionCommand(
+        name="/despesa",
+        args="50 Almoço no centro #Alimentação",
+        amount=Decimal("50"),
+        description="Almoço no centro",
+        category="alimentação",
+    )
+
+
+def test_parse_transaction_without_category(registry):
+    """Testa se a categoria padrão é usada quando omitida"""
+    _, parsed = registry.parse("  /DESPESA 12,90 Café ")
+    assert parsed.amount == Decimal("12.90")
+    assert parsed.description == "Café"
+    assert parsed.category == "outros"
+
+
+@pytest.mark.parametrize("text", ["/despesa\n50 Café", "/despesa\t50 Café", "/despesa   50 Café"])
+def test_any_whitespace_separates_command(registry, text):
+    """Testa quebra de linha, tabulação e espaços repetidos após o comando"""
+    _, parsed = registry.parse(text)
+    assert (parsed.amount, parsed.description) == (Decimal("50"), "Café")
+    assert registry.parse("   ") is None
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("50", Decimal("50")),
+    ("50.5", Decimal("50.5")),
+    ("50,50", Decimal("50.50")),
+    ("1.500", Decimal("1500")),
+    ("1.234.567", Decimal("1234567")),
+    ("1.234,56", Decimal("1234.56")),
+])
+def test_parse_amount(value, expected):
+    """Testa os formatos de valor aceitos"""
+    assert parse_amount(value) == expected
+
+
+def test_invalid_arguments_raise_syntax_error(registry):
+    """Testa se argumentos fora da gramática geram erro com o uso correto"""
+    with pytest.raises(CommandSyntaxError) as exc:
+        registry.parse("/despesa abc")
+    assert exc.value.usage == USAGE
+    assert registry.dispatch("/despesa abc").endswith(USAGE)
+
+
+def test_dispatch_aliases_and_unknown(registry):
+    """Testa apelidos, comandos sem gramática e comandos desconhecidos"""
+    assert registry.dispatch("Ola") == "olá"
+    assert registry.parse("oi")[1] == ParsedCommand(name="oi", args="")
+    assert registry.dispatch("/nada") is None
+
+
+def test_duplicate_registration_is_rejected(registry):
+    """Testa se um nome não pode ser registrado duas vezes"""
+    with pytest.raises(ValueError):
+        registry.register("OI", lambda c: "")
+
+
+@pytest.mark.asyncio
+async def test_whatsapp_service_uses_registry():
+    """Testa se o serviço responde pelos comandos registrados"""
+    assert "/ajuda" in commands
+    assert "FinBot" in await whatsapp_service.process_message("olá")
+    assert "Cadastre" in await whatsapp_service.process_message("/receita 1000 Salário #salário")
+    assert "não reconhecido" in await whatsapp_service.process_message("/xyz")
+
+
+@pytest.mark.asyncio
+async def test_sender_is_resolved_only_by_handlers_that_need_it(monkeypatch):
+    """Testa se o remetente é resolvido sob demanda e se falhas viram None"""
+    resolved = []
+
+    async def fake_resolve(phone, register=True):
+        resolved.append(phone)
+        if phone == "falha":
+            raise RuntimeError("banco fora")
+        return 7
+
+    async def whoami(command):
+        return f"usuário {await whatsapp_module.sender_id(command)}"
+
+    monkeypatch.setattr(identity_resolver, "resolve", fake_resolve)
+    registry = CommandRegistry()
+    registry.register("/eu", whoami)
+    registry.register("/ping", lambda c: "pong")
+    monkeypatch.setattr(whatsapp_module, "commands", registry)
+
+    assert await whatsapp_service.process_message("/ping", "5511999990000@c.us") == "pong"
+    assert resolved == []
+    assert await whatsapp_service.process_message("/eu", "5511999990000@c.us") == "usuário 7"
+    assert resolved == ["5511999990000@c.us"]
+    assert await whatsapp_service.process_message("/eu", "falha") == "usuário None"
+    assert registry.parse("/eu")[1].sender is None
+
+
+@pytest.mark.asyncio
+async def test_statement_command_pages(monkeypatch):
+    """Testa se /extrato e /extrato <código> consultam a página do remetente"""
+    calls = []
+
+    async def get_statement(user_id, cursor=None):
+        calls.append((user_id, cursor))
+        if cursor == "ruim":
+            raise InvalidCursor(cursor)
+        item = SimpleNamespace(type="expense", date=datetime(2024, 5, 10), amount=Decimal("12.5"), description="Café")
+        return Page([item], next_cursor=None if cursor else "abc")
+
+    async def fake_resolve(phone, register=True):
+        return 7
+
+    monkeypatch.setitem(sys.modules, "app.services.chat_transactions", SimpleNamespace(get_statement=get_statement))
+    monkeypatch.setattr(identity_resolver, "resolve", fake_resolve)
+
+    first = await whatsapp_service.process_message("/extrato", "5511999990000")
+    assert "10/05 R$ 12,50 - Café" in first and first.endswith("/extrato abc")
+    assert not (await whatsapp_service.process_message("/extrato abc", "5511999990000")).endswith("abc")
+    assert "inválido" in await whatsapp_service.process_message("/extrato ruim", "5511999990000")
+    assert calls == [(7, None), (7, "abc"), (7, "ruim")]
+    assert "identificar" in await whatsapp_service.process_message("/extrato")
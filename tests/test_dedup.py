@@ -0,0 +1,157 @@
+from contextlib import asynccontextmanager
+
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+import app.database
+from app.db.models import ProcessedMessage
+from app.services.cache import TTLCache
+from app.services.dedup import (
+    PENDING,
+    CLAIM_ATTEMPTS,
+    CachedResponse,
+    DatabaseDedupStore,
+    MemoryDedupStore,
+    WebhookDeduplicator,
+    create_deduplicator,
+    message_key,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_message_key_prefers_bridge_id():
+    """Testa se o id do WhatsApp é usado quando disponível"""
+    assert message_key({"id": "ABC", "text": "oi"}) == "id:ABC"
+    assert message_key({"id": {"_serialized": "XYZ"}}) == "id:XYZ"
+
+
+def test_message_key_hashes_content_with_timestamp():
+    """Testa se sem id a chave depende de remetente, horário e texto"""
+    first = message_key({"from": "5511", "timestamp": 1, "text": "/saldo"})
+    assert first == message_key({"from": "5511", "timestamp": 1, "text": "/saldo"})
+    assert first != message_key({"from": "5511", "timestamp": 2, "text": "/saldo"})
+    assert message_key({"from": "5511", "text": "/saldo"}) is None
+
+
+def test_ttl_cache_expires_and_evicts():
+    """Testa expiração por TTL e remoção do item menos usado"""
+    clock = FakeClock()
+    cache = TTLCache(maxsize=2, ttl=10, clock=clock)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert len(cache) == 2
+
+    clock.now = 11
+    assert cache.get("a") is None
+
+
+@pytest.mark.asyncio
+async def test_duplicates_get_cached_response():
+    """Testa se a repetição recebe a resposta da primeira entrega"""
+    dedup = WebhookDeduplicator(MemoryDedupStore())
+    message = {"id": "1", "from": "5511", "text": "/despesa 10 café"}
+
+    key, cached = await dedup.claim(message)
+    assert cached is None
+    assert (await dedup.claim(message))[1] is PENDING
+
+    await dedup.complete(key, {"message": "ok"})
+    assert await dedup.claim(message) == (key, CachedResponse({"message": "ok"}, 200))
+    assert dedup.stats()["duplicates"] == 2
+
+
+@pytest.mark.asyncio
+async def test_duplicates_replay_status_code():
+    """Testa se a repetição recebe o mesmo status HTTP (ex.: 202 no modo fila)"""
+    dedup = WebhookDeduplicator(MemoryDedupStore())
+    key, _ = await dedup.claim({"id": "1"})
+    await dedup.complete(key, {"status": "queued"}, status_code=202)
+    assert await dedup.claim({"id": "1"}) == (key, CachedResponse({"status": "queued"}, 202))
+
+    # Entradas antigas, só com o corpo, são repetidas com 200
+    store = MemoryDedupStore()
+    store.cache.set("id:2", {"message": "ok"})
+    assert (await WebhookDeduplicator(store).claim({"id": "2"}))[1] == CachedResponse({"message": "ok"}, 200)
+
+
+@pytest.mark.asyncio
+async def test_release_allows_reprocessing():
+    """Testa se após um erro a mensagem pode ser processada de novo"""
+    dedup = WebhookDeduplicator(MemoryDedupStore())
+    key, _ = await dedup.claim({"id": "1"})
+    await dedup.release(key)
+    assert (await dedup.claim({"id": "1"}))[1] is None
+
+
+@pytest.mark.asyncio
+async def test_disabled_deduplicator_never_matches():
+    dedup = create_deduplicator("off", 10, 10)
+    assert await dedup.claim({"id": "1"}) == (None, None)
+    assert await dedup.claim({"id": "1"}) == (None, None)
+
+
+@pytest_asyncio.fixture
+async def dedup_database(tmp_path, monkeypatch):
+    """Banco SQLite com a tabela processedmessage no lugar de app.database.get_session"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'dedup.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(ProcessedMessage.__table__.create)
+
+    @asynccontextmanager
+    async def get_session():
+        async with sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)() as session:
+            try:
+                yield session
+                await session.commit()
+            except Exception:
+                await session.rollback()
+                raise
+
+    monkeypatch.setattr(app.database, "get_session", get_session)
+    yield
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_database_store_is_shared(dedup_database):
+    """Testa o backend em banco: duas instâncias enxergam a mesma chave"""
+    worker_a = DatabaseDedupStore()
+    worker_b = DatabaseDedupStore()
+    assert await worker_a.claim("id:1") == (True, None)
+    assert await worker_b.claim("id:1") == (False, PENDING)
+
+    await worker_a.complete("id:1", {"message": "ok"})
+    assert await worker_b.claim("id:1") == (False, {"message": "ok"})
+
+    await worker_b.release("id:1")
+    assert await worker_b.claim("id:1") == (True, None)
+
+
+@pytest.mark.asyncio
+async def test_database_store_retries_lost_race_once(dedup_database, monkeypatch):
+    """Testa se a corrida perdida tenta de novo só uma vez e depois conta como repetida"""
+    store = DatabaseDedupStore()
+    assert await store.claim("id:1") == (True, None)
+
+    reads = []
+
+    async def vanished(self, model, key):
+        # A linha some entre o INSERT recusado e a leitura, sempre
+        reads.append(key)
+        return None
+
+    monkeypatch.setattr(AsyncSession, "get", vanished)
+    assert await store.claim("id:1") == (False, PENDING)
+    assert reads == ["id:1"] * CLAIM_ATTEMPTS
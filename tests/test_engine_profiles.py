@@ -0,0 +1,82 @@
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.db.profiles import LivenessCheck, detect_profile, engine_options, get_profile
+
+POOLER = "postgresql://u:p@aws-0-us-west-1.pooler.supabase.com"
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_detect_profile():
+    """Testa a detecção do perfil pela URL"""
+    assert detect_profile(f"{POOLER}:6543/postgres?sslmode=require") == "transaction-pooler"
+    assert detect_profile(f"{POOLER}:5432/postgres") == "session-pooler"
+    assert detect_profile("postgresql://u:p@db.example.supabase.co:5432/postgres") == "direct"
+    assert detect_profile("sqlite:///./test.db") == "sqlite"
+    assert get_profile("sqlite:///x.db", "transaction-pooler").name == "sqlite"
+    with pytest.raises(ValueError):
+        get_profile(f"{POOLER}:6543/postgres", "pgbouncer")
+
+
+def test_transaction_pooler_disables_prepared_statements():
+    """Testa se o perfil de pooler em modo transação desliga o cache do asyncpg"""
+    url = f"{POOLER.replace('postgresql', 'postgresql+asyncpg')}:6543/postgres"
+    options = engine_options(url, get_profile(url))
+    assert options["pool_pre_ping"] is False
+    assert options["connect_args"]["statement_cache_size"] == 0
+    assert options["connect_args"]["prepared_statement_cache_size"] == 0
+    name = options["connect_args"]["prepared_statement_name_func"]
+    assert name() != name()
+
+    direct = "postgresql+asyncpg://u:p@db.example.com:5432/postgres"
+    assert "statement_cache_size" not in engine_options(direct, get_profile(direct))["connect_args"]
+    sync = engine_options(f"{POOLER}:6543/postgres", get_profile(f"{POOLER}:6543/postgres"))
+    assert sync["connect_args"]["keepalives"] == 1
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", pool_size=1, max_overflow=0)
+    yield engine
+    engine.dispose()
+
+
+def checkout(engine):
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+
+def test_liveness_only_after_idle(engine):
+    """Testa se a checagem só roda para conexões paradas além do limite"""
+    clock = Clock()
+    check = LivenessCheck(idle=30, clock=clock).install(engine)
+    for _ in range(5):
+        clock.now += 1
+        checkout(engine)
+    assert check.stats["pings"] == 0
+
+    clock.now += 31
+    checkout(engine)
+    assert check.stats["pings"] == 1
+    assert check.stats["checkouts"] == 6
+
+
+def test_stale_connection_is_replaced(engine):
+    """Testa se uma conexão que falha na checagem é trocada por outra"""
+    clock = Clock()
+    check = LivenessCheck(idle=30, clock=clock).install(engine)
+    checkout(engine)
+    first = engine.pool._pool.queue[0].dbapi_connection
+
+    engine.dialect.do_ping = lambda dbapi_connection: False
+    clock.now += 60
+    checkout(engine)
+    assert check.stats["stale"] == 1
+    assert engine.pool._pool.queue[0].dbapi_connection is not first
@@ -0,0 +1,128 @@
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Optional
+
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlmodel import Field, SQLModel, select
+
+from app.services.identity import IdentityResolver, new_phone_user, normalize_phone
+
+
+class PhoneUser(SQLModel, table=True):
+    """Tabela de identidade própria do bot, com cadastro automático"""
+    __tablename__ = "identity_test_user"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    phone: str = Field(unique=True, index=True)
+    name: str
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    is_active: bool = Field(default=True)
+
+
+@pytest_asyncio.fixture
+async def database(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'identity.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(PhoneUser.__table__.create)
+
+    calls = []
+
+    @asynccontextmanager
+    async def get_session():
+        calls.append(1)
+        async with sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)() as session:
+            try:
+                yield session
+                await session.commit()
+            except Exception:
+                await session.rollback()
+                raise
+
+    yield get_session, calls
+    await engine.dispose()
+
+
+def phone_resolver(get_session):
+    return IdentityResolver(
+        session_factory=get_session, model=PhoneUser, column="phone", new_user=new_phone_user
+    )
+
+
+@pytest.mark.parametrize("raw", [
+    "5511999990000@c.us",
+    "+55 (11) 99999-0000",
+    "11 99999-0000",
+    "11999990000",
+])
+def test_normalize_phone(raw):
+    """Testa se os formatos recebidos e enviados chegam à mesma forma"""
+    assert normalize_phone(raw) == "5511999990000"
+
+
+@pytest.mark.asyncio
+async def test_known_user_is_served_from_cache(database):
+    """Testa se o usuário é registrado uma vez e depois vem do cache"""
+    get_session, calls = database
+    resolver = phone_resolver(get_session)
+
+    user_id = await resolver.resolve("5511999990000@c.us")
+    assert len(calls) == 1
+    assert await resolver.resolve("+55 11 99999-0000") == user_id
+    assert len(calls) == 1
+    assert resolver.stats() == {"cached": 1, "hits": 1, "misses": 1}
+
+    async with get_session() as session:
+        user = (await session.execute(select(PhoneUser))).scalar_one()
+    assert (user.id, user.phone, user.name) == (user_id, "5511999990000", "User_0000")
+
+
+@pytest.mark.asyncio
+async def test_concurrent_first_messages_create_one_user(database):
+    """Testa se primeiras mensagens simultâneas não duplicam o usuário"""
+    get_session, _ = database
+    resolvers = [phone_resolver(get_session) for _ in range(5)]
+
+    ids = await asyncio.gather(*(r.resolve("11999990000") for r in resolvers))
+    assert len(set(ids)) == 1
+
+    async with get_session() as session:
+        assert len((await session.execute(select(PhoneUser))).scalars().all()) == 1
+
+
+@pytest.mark.asyncio
+async def test_unknown_number_is_negatively_cached(database):
+    """Testa se consultas sem registro guardam a ausência do usuário"""
+    get_session, calls = database
+    resolver = phone_resolver(get_session)
+
+    assert await resolver.resolve("11988887777", register=False) is None
+    assert await resolver.resolve("11988887777", register=False) is None
+    assert len(calls) == 1
+
+    user_id = await resolver.resolve("11988887777")
+    assert await resolver.resolve("11988887777", register=False) == user_id
+
+
+@pytest.mark.asyncio
+async def test_legacy_phone_format_is_migrated(database):
+    """Testa se um usuário salvo no formato antigo é encontrado e migrado, sem duplicar"""
+    get_session, calls = database
+    async with get_session() as session:
+        session.add(PhoneUser(phone="5511999990000@c.us", name="Maria"))
+        session.add(PhoneUser(phone="11988887777", name="João"))
+
+    resolver = phone_resolver(get_session)
+    maria = await resolver.resolve("5511999990000@c.us")
+    joao = await resolver.resolve("+55 11 98888-7777", register=False)
+    assert joao is not None
+
+    async with get_session() as session:
+        users = {u.id: (u.phone, u.name) for u in (await session.execute(select(PhoneUser))).scalars()}
+    assert users == {
+        maria: ("5511999990000", "Maria"),
+        joao: ("5511988887777", "João"),
+    }
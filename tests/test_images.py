@@ -0,0 +1,81 @@
+import asyncio
+import io
+
+import pytest
+from PIL import Image, ImageDraw
+
+from app.services import images
+from app.services.pix import PixService
+
+
+def sample_chart() -> Image.Image:
+    image = Image.new("RGB", (800, 400), "white")
+    draw = ImageDraw.Draw(image)
+    draw.rectangle((50, 50, 300, 350), fill="#66B2FF")
+    draw.pieslice((400, 50, 700, 350), 0, 120, fill="#FF9999")
+    draw.text((60, 20), "Comparação Mensal", fill="#222222")
+    return image
+
+
+def test_compact_formats_are_smaller():
+    """Testa se png8 e webp saem menores que o PNG de cores reais"""
+    image = sample_chart()
+    png = images.encode(image, "png")
+    png8 = images.encode(image, "png8")
+    webp = images.encode(image, "webp")
+    assert len(png8) < len(png) and len(webp) < len(png)
+    assert Image.open(io.BytesIO(png8)).mode == "P"
+    assert Image.open(io.BytesIO(webp)).size == (800, 400)
+    with pytest.raises(ValueError):
+        images.encode(image, "gif")
+
+
+def test_scale_and_etag():
+    """Testa presets (sem ampliar) e ETag estável pelo conteúdo"""
+    assert images.scale(1600, "whatsapp") == 0.5
+    assert images.scale(400, "whatsapp") == 1.0
+    assert images.scale(1600, "desktop") == 1.0
+    assert images.scale(1600, None) == 1.0
+    with pytest.raises(ValueError):
+        images.scale(1600, "4k")
+
+    assert images.etag(b"abc") == images.etag(b"abc")
+    assert images.etag(b"abc") != images.etag(b"abd")
+    assert images.etag(b"abc").startswith('"')
+    assert images.to_base64(b"\x89PNG") == "iVBORw=="
+
+
+@pytest.mark.parametrize("header,matches", [
+    ('"abc"', True),
+    ('"x", "abc"', True),
+    ('W/"abc"', True),
+    ("*", True),
+    ('"abcd"', False),
+    ('"ab"', False),
+    ("", False),
+])
+def test_etag_matches(header, matches):
+    """Testa If-None-Match com listas, "*" e tags fracas, sem casar por substring"""
+    assert images.etag_matches(header, '"abc"') is matches
+
+
+def test_qr_format_must_be_raster():
+    """Testa se só formatos rasterizados valem para o QR code"""
+    for fmt in images.RASTER_FORMATS:
+        assert images.check_raster_format(fmt) == fmt
+    with pytest.raises(ValueError):
+        images.check_raster_format("svg")
+
+
+def test_pix_qr_code_is_raw_bytes():
+    """Testa se o QR code do PIX sai em bytes, no tamanho do preset"""
+    result = asyncio.run(PixService.generate_qr_code(25.5, "Almoço"))
+    assert isinstance(result["qr_code"], bytes)
+    image = Image.open(io.BytesIO(result["qr_code"]))
+    assert result["media_type"] == "image/png"
+    assert image.size[0] <= images.PRESETS["whatsapp"]
+    assert image.mode in ("1", "P")
+
+    assert PixService.qr_box_size(25, "desktop") == 10
+    assert PixService.qr_box_size(45, "thumbnail") == 7
+    assert PixService.qr_box_size(177, "whatsapp") == 4
@@ -0,0 +1,207 @@
+import io
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import event
+from sqlmodel import select
+
+from app.db.models import Account, Category, Transaction, TransactionRollup, User
+from app.services.importer import TransactionImporter, csv_records, ofx_records, parse_amount
+
+OFX = """OFXHEADER:100
+DATA:OFXSGML
+
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>
+<STMTTRN>
+<TRNTYPE>DEBIT
+<DTPOSTED>20240510120000[-3:BRT]
+<TRNAMT>-42.50
+<MEMO>Mercado
+</STMTTRN>
+<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20240505<TRNAMT>1000.00<NAME>Salario</STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+"""
+
+
+@pytest.fixture
+def seed():
+    async def seed(session):
+        user = User(email="ana@example.com", hashed_password="x", full_name="Ana")
+        session.add_all([user, Category(name="Alimentação", type="expense")])
+        await session.flush()
+        session.add(Account(name="Carteira", balance=100, owner_id=user.id))
+        return user
+    return seed
+
+
+def upload(client, content: str, format="csv", account_id=1):
+    return client.post(
+        "/finance/import/transactions",
+        params={"account_id": account_id, "format": format},
+        files={"file": (f"extrato.{format}", content.encode("utf-8"))},
+    )
+
+
+def test_csv_records_header_aliases():
+    """Testa cabeçalhos em português com ';' e o número da linha"""
+    stream = io.StringIO("Data;Descrição;Valor\n10/05/2024;Almoço;-25,50\n\n11/05/2024;Pix;10\n")
+    assert list(csv_records(stream)) == [
+        (2, {"date": "10/05/2024", "description": "Almoço", "amount": "-25,50"}),
+        (4, {"date": "11/05/2024", "description": "Pix", "amount": "10"}),
+    ]
+
+
+@pytest.mark.parametrize("value,expected", [
+    ("1,234.56", Decimal("1234.56")),
+    ("1.234,56", Decimal("1234.56")),
+    ("R$ -25,50", Decimal("-25.50")),
+    ("-42.50", Decimal("-42.50")),
+    ("10", Decimal("10")),
+])
+def test_parse_amount_uses_last_separator(value, expected):
+    """Testa se o último separador é o decimal, nas convenções pt e en"""
+    assert parse_amount(value) == expected
+
+
+@pytest.mark.parametrize("value,decimal,expected", [
+    ("1.500", ",", Decimal("1500")),
+    ("1.500", ".", Decimal("1.5")),
+    ("1,500", ".", Decimal("1500")),
+    ("1.234.567", None, Decimal("1234567")),
+    ("1.50", ",", Decimal("1.50")),
+])
+def test_parse_amount_three_digit_groups(value, decimal, expected):
+    """Testa se "1.500" segue a convenção do arquivo e é ambíguo sem ela"""
+    assert parse_amount(value, decimal) == expected
+    with pytest.raises(ValueError, match="ambíguo"):
+        parse_amount("1.500")
+
+
+@pytest.mark.parametrize("value", ["Infinity", "-inf", "NaN", "1e5", "abc"])
+def test_parse_amount_rejects_non_finite(value):
+    """Testa se valores não finitos ou com expoente são recusados"""
+    with pytest.raises(ValueError):
+        parse_amount(value)
+
+
+def test_ofx_records_sgml():
+    """Testa blocos STMTTRN com tags sem fechamento e várias tags por linha"""
+    records = list(ofx_records(io.StringIO(OFX)))
+    assert [r["TRNAMT"] for _, r in records] == ["-42.50", "1000.00"]
+    assert records[1][1]["NAME"] == "Salario"
+
+
+@pytest.mark.asyncio
+async def test_import_csv_in_batches(client):
+    """Testa a importação em lotes, com erros por linha, saldo e totais mensais"""
+    lines = ["data,descricao,valor,tipo,categoria"]
+    for day in range(1, 26):
+        lines.append(f"2024-05-{day:02d},Compra {day},R$ 10,expense,alimentação")
+    lines.insert(3, "2024-05-40,Data ruim,10,expense,")
+    lines.insert(6, "2024-05-02,Sem valor,,expense,")
+    lines.append("2024-06-01,Salário,\"1.000,00\",receita,")
+
+    response = await upload(client, "\n".join(lines))
+    assert response.status_code == 200
+    report = response.json()
+    assert (report["rows"], report["inserted"], report["error_count"]) == (28, 26, 2)
+    assert [e["line"] for e in report["errors"]] == [4, 7]
+    assert report["rows_per_sec"] > 0
+
+    async with client.factory() as session:
+        account = await session.get(Account, 1)
+        assert account.balance == 100 - 250 + 1000
+        count = len((await session.execute(select(Transaction))).scalars().all())
+        assert count == 26
+        rollups = {
+            (r.month, r.category_id, r.type): (r.total, r.count)
+            for r in (await session.execute(select(TransactionRollup))).scalars()
+        }
+    assert rollups == {
+        (date(2024, 5, 1), 1, "expense"): (250.0, 25),
+        (date(2024, 6, 1), 0, "income"): (1000.0, 1),
+    }
+
+
+@pytest.mark.asyncio
+async def test_import_reports_non_finite_amounts(client, monkeypatch):
+    """Testa se NaN, Infinity e erros aritméticos viram erros de linha, não um 500"""
+    import app.services.importer as importer
+
+    parse_record = importer.parse_record
+
+    def exploding(fields, categories, amounts):
+        if fields.get("description") == "boom":
+            raise ArithmeticError("boom")
+        return parse_record(fields, categories, amounts)
+
+    monkeypatch.setattr(importer, "parse_record", exploding)
+    response = await upload(client, (
+        "data,descricao,valor\n"
+        "2024-05-01,a,NaN\n2024-05-01,b,Infinity\n2024-05-01,boom,1\n2024-05-01,c,\"1,234.56\"\n"
+    ))
+    assert response.status_code == 200
+    report = response.json()
+    assert (report["inserted"], [e["line"] for e in report["errors"]]) == (1, [2, 3, 4])
+
+    async with client.factory() as session:
+        assert (await session.get(Account, 1)).balance == 100 + 1234.56
+
+
+@pytest.mark.asyncio
+async def test_import_infers_decimal_separator_per_file(client):
+    """Testa se o arquivo pt-BR lê "1.500" como milhar depois de um valor sem dúvida"""
+    response = await upload(client, (
+        "data;descricao;valor\n"
+        "2024-05-01;antes;1.500\n"
+        "2024-05-02;café;-12,50\n"
+        "2024-05-03;aluguel;-1.500\n"
+    ))
+    report = response.json()
+    assert report["inserted"] == 2
+    assert report["errors"] == [{"line": 2, "message": "Valor ambíguo: 1.500 (separador de milhar ou decimal?)"}]
+
+    async with client.factory() as session:
+        assert (await session.get(Account, 1)).balance == 100 - 12.5 - 1500
+
+
+@pytest.mark.asyncio
+async def test_import_statements_per_batch(client):
+    """Testa se cada lote usa um comando de inserção e um de saldo"""
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(client.engine.sync_engine, "before_cursor_execute", listener)
+
+    async with client.factory() as session:
+        importer = TransactionImporter(session, owner_id=1, account_id=1, batch_size=10)
+        csv = "date,amount\n" + "".join(f"2024-05-01,-{i + 1}\n" for i in range(25))
+        report = await importer.run(io.BytesIO(csv.encode()), "csv")
+    event.remove(client.engine.sync_engine, "before_cursor_execute", listener)
+
+    assert (report.inserted, report.batches) == (25, 3)
+    assert sum(s.startswith('INSERT INTO "transaction"') for s in statements) == 3
+    assert sum(s.startswith("UPDATE account") for s in statements) == 3
+
+
+@pytest.mark.asyncio
+async def test_import_ofx(client):
+    """Testa a importação de OFX: sinal do valor define o tipo"""
+    response = await upload(client, OFX, format="ofx")
+    assert response.json()["inserted"] == 2
+
+    async with client.factory() as session:
+        rows = (await session.execute(select(Transaction).order_by(Transaction.date))).scalars().all()
+    assert [(t.type, t.amount, t.description) for t in rows] == [
+        ("income", 1000.0, "Salario"),
+        ("expense", 42.5, "Mercado"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_import_rejects_foreign_account_and_bad_header(client):
+    """Testa conta inexistente e CSV sem as colunas obrigatórias"""
+    assert (await upload(client, "data,valor\n", account_id=99)).status_code == 404
+    response = await upload(client, "foo,bar\n1,2\n")
+    assert response.status_code == 400
+    assert (await upload(client, "", format="xls")).status_code == 400
@@ -0,0 +1,171 @@
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime
+from decimal import Decimal
+from typing import Optional
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import event, update
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlmodel import Field, SQLModel
+
+from app.services.ledger import BalanceLedger, Drift, signed_amount
+
+
+class LedgerTransaction(SQLModel, table=True):
+    """Mesmas colunas de app.models.Transaction, em tabela própria para o teste"""
+    __tablename__ = "ledger_test_transactions"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    user_id: int
+    amount: Decimal
+    description: str
+    type: str
+    category: str
+    date: datetime = Field(default_factory=datetime.utcnow)
+
+
+class LedgerBalance(SQLModel, table=True):
+    """Mesmas colunas de app.models.Balance"""
+    __tablename__ = "ledger_test_balance"
+
+    user_id: int = Field(primary_key=True)
+    amount: Decimal = Field(default=Decimal(0))
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+@pytest_asyncio.fixture
+async def ledger(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'ledger.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(LedgerTransaction.__table__.create)
+        await conn.run_sync(LedgerBalance.__table__.create)
+    factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    @asynccontextmanager
+    async def get_session():
+        async with factory() as session:
+            try:
+                yield session
+                await session.commit()
+            except Exception:
+                await session.rollback()
+                raise
+
+    statements = []
+    event.listen(engine.sync_engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    ledger = BalanceLedger(get_session, LedgerTransaction, LedgerBalance)
+    ledger.statements = statements
+    yield ledger
+    await engine.dispose()
+
+
+async def add(ledger, user_id, amount, type, use_ledger=True):
+    """Como transactions.add_transaction"""
+    async with ledger._session() as session:
+        transaction = LedgerTransaction(
+            user_id=user_id, amount=Decimal(amount), description="t", type=type, category="outros"
+        )
+        session.add(transaction)
+        if use_ledger:
+            await ledger.apply(session, user_id, signed_amount(type, amount))
+    return transaction
+
+
+async def delete(ledger, transaction):
+    """Como transactions.delete_transaction"""
+    async with ledger._session() as session:
+        row = await session.get(LedgerTransaction, transaction.id)
+        await session.delete(row)
+        await ledger.apply(session, row.user_id, -signed_amount(row.type, row.amount))
+
+
+def test_signed_amount():
+    """Testa o efeito de receitas e despesas no saldo"""
+    assert signed_amount("income", "10.50") == Decimal("10.50")
+    assert signed_amount("expense", 3) == Decimal("-3")
+
+
+@pytest.mark.asyncio
+async def test_balance_follows_add_and_delete(ledger):
+    """Testa se o saldo acompanha inclusões e exclusões"""
+    await add(ledger, 1, "1000.00", "income")
+    lunch = await add(ledger, 1, "50.25", "expense")
+    await add(ledger, 2, "10.00", "expense")
+
+    assert await ledger.balance(1) == Decimal("949.75")
+    assert await ledger.balance(2) == Decimal("-10.00")
+
+    await delete(ledger, lunch)
+    assert await ledger.balance(1) == Decimal("1000.00")
+    assert await ledger.reconcile() == []
+
+
+@pytest.mark.asyncio
+async def test_balance_is_a_primary_key_read(ledger):
+    """Testa se /saldo lê uma linha, sem somar o histórico"""
+    for _ in range(20):
+        await add(ledger, 1, "5.00", "income")
+
+    ledger.statements.clear()
+    assert await ledger.balance(1) == Decimal("100.00")
+    selects = [s for s in ledger.statements if s.lstrip().upper().startswith("SELECT")]
+    assert len(selects) == 1
+    assert "ledger_test_balance" in selects[0]
+    assert "sum(" not in selects[0].lower()
+
+
+@pytest.mark.asyncio
+async def test_history_before_ledger_is_seeded_once(ledger):
+    """Testa se usuários com histórico antigo recebem a linha calculada uma vez"""
+    await add(ledger, 1, "300.00", "income", use_ledger=False)
+    await add(ledger, 1, "100.00", "expense", use_ledger=False)
+
+    assert await ledger.balance(1) == Decimal("200.00")
+    assert ledger.seeds == 1
+
+    # Primeira escrita de outro usuário com histórico: linha criada já com a nova transação
+    await add(ledger, 2, "40.00", "income", use_ledger=False)
+    await add(ledger, 2, "15.00", "expense")
+    assert await ledger.balance(2) == Decimal("25.00")
+    assert await ledger.balance(1) == Decimal("200.00")
+    assert ledger.seeds == 2
+
+
+@pytest.mark.asyncio
+async def test_concurrent_writes_keep_balance_consistent(ledger):
+    """Testa inclusões simultâneas, incluindo a primeira escrita do usuário"""
+    await asyncio.gather(*(add(ledger, 1, "1.10", "income") for _ in range(30)))
+    await asyncio.gather(*(add(ledger, 1, "0.10", "expense") for _ in range(10)))
+
+    assert await ledger.balance(1) == Decimal("32.00")
+    assert await ledger.reconcile() == []
+
+
+@pytest.mark.asyncio
+async def test_reconcile_detects_and_repairs_drift(ledger):
+    """Testa se a reconciliação encontra e corrige divergências"""
+    await add(ledger, 1, "100.00", "income")
+    await add(ledger, 2, "20.00", "income")
+    await add(ledger, 3, "7.00", "expense", use_ledger=False)  # sem linha no ledger
+
+    async with ledger._session() as session:
+        await session.execute(
+            update(LedgerBalance).where(LedgerBalance.user_id == 1).values(amount=Decimal("999.00"))
+        )
+
+    drifts = await ledger.reconcile(repair=False)
+    assert drifts == [
+        Drift(1, Decimal("999.00"), Decimal("100.00")),
+        Drift(3, None, Decimal("-7.00")),
+    ]
+    # Só detecta
+    assert await ledger.reconcile(repair=False) == drifts
+
+    await ledger.reconcile()
+    assert await ledger.reconcile() == []
+    assert await ledger.balance(1) == Decimal("100.00")
+    assert await ledger.balance(3) == Decimal("-7.00")
@@ -0,0 +1,79 @@
+import io
+import json
+import logging
+import queue
+
+import pytest
+
+from app.services.logs import (
+    JsonFormatter,
+    LogfmtFormatter,
+    NonBlockingQueueHandler,
+    SamplingFilter,
+    parse_sampling,
+    setup_logging,
+    shutdown_logging,
+)
+
+
+@pytest.fixture
+def root_logger():
+    """Restaura a configuração do logger raiz depois do teste"""
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    yield root
+    shutdown_logging()
+    root.handlers[:] = handlers
+    root.setLevel(level)
+
+
+def make_record(name="app.routes.whatsapp", level=logging.INFO, msg="oi %s", args=("ana",), **extra):
+    record = logging.LogRecord(name, level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_formatter_includes_extra_fields():
+    data = json.loads(JsonFormatter().format(make_record(from_number="5511")))
+    assert data["msg"] == "oi ana"
+    assert data["level"] == "info"
+    assert data["logger"] == "app.routes.whatsapp"
+    assert data["from_number"] == "5511"
+
+
+def test_logfmt_formatter_quotes_values():
+    line = LogfmtFormatter().format(make_record(msg="texto com espaço", args=()))
+    assert 'msg="texto com espaço"' in line
+    assert "level=info" in line
+
+
+def test_sampling_uses_most_specific_logger():
+    """Testa se a taxa do logger mais específico vale e avisos nunca são descartados"""
+    sampler = SamplingFilter(parse_sampling("app=1, app.routes=0"), rng=lambda: 0.5)
+    assert not sampler.filter(make_record("app.routes.whatsapp"))
+    assert sampler.filter(make_record("app.routes.whatsapp", level=logging.WARNING))
+    assert sampler.filter(make_record("app.services.whatsapp"))
+    assert sampler.filter(make_record("uvicorn"))
+
+
+def test_queue_handler_does_not_format_and_drops_when_full():
+    """Testa se o handler só enfileira e descarta quando a fila está cheia"""
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=1))
+    record = make_record()
+    handler.handle(record)
+    handler.handle(make_record())
+    assert handler.queue.get_nowait() is record
+    assert record.msg == "oi %s"
+    assert handler.dropped == 1
+
+
+def test_setup_logging_with_queue_writes_in_background(root_logger):
+    """Testa se os registros chegam ao destino pela thread de escrita"""
+    output = io.StringIO()
+    setup_logging(fmt="json", use_queue=True, stream=output)
+    logging.getLogger("app.test").info("mensagem %d", 1, extra={"user": 7})
+    shutdown_logging()
+
+    data = json.loads(output.getvalue())
+    assert data["msg"] == "mensagem 1"
+    assert data["user"] == 7
@@ -0,0 +1,150 @@
+import asyncio
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.notifications import NotificationService
+from app.services.outbox import DIGEST_SEPARATOR, NotificationOutbox, Outcome, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeWhatsApp:
+    def __init__(self):
+        self.sent = []
+
+    async def send_message(self, to, message):
+        self.sent.append((to, message))
+        return True
+
+
+def test_token_bucket_refills_at_rate():
+    """Testa se o bucket libera tokens na taxa configurada"""
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, capacity=2, clock=clock)
+
+    assert bucket.try_acquire() == 0
+    assert bucket.try_acquire() == 0
+    assert bucket.try_acquire() == pytest.approx(0.5)
+
+    clock.now = 0.5
+    assert bucket.try_acquire() == 0
+    clock.now = 100
+    assert bucket.full
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_wakes_waiters_in_order():
+    """Testa se os que esperam token são atendidos em ordem, sem acordar todos a cada token"""
+    bucket = TokenBucket(rate=500, capacity=1)
+    calls = 0
+    try_acquire = bucket.try_acquire
+
+    def counting():
+        nonlocal calls
+        calls += 1
+        return try_acquire()
+
+    bucket.try_acquire = counting
+    order = []
+
+    async def worker(i):
+        await bucket.acquire()
+        order.append(i)
+
+    await asyncio.gather(*(worker(i) for i in range(30)))
+    assert order == list(range(30))
+    # Cada espera consulta o bucket poucas vezes (com polling seria ~N²)
+    assert calls < 30 * 4
+
+
+@pytest.mark.asyncio
+async def test_send_reports_outcome():
+    """Testa se send devolve enviada, falhou ou descartada"""
+    whatsapp = FakeWhatsApp()
+    outbox = NotificationOutbox(whatsapp.send_message, window=0, global_rate=1000)
+    assert await outbox.send("5511", "agora") == Outcome.SENT
+
+    async def broken(to, message):
+        return False
+
+    outbox = NotificationOutbox(broken, window=0, global_rate=1000)
+    assert await outbox.send("5511", "agora") == Outcome.FAILED
+
+    outbox = NotificationOutbox(whatsapp.send_message, window=60, max_pending=1)
+    assert await outbox.send("5511", "a") == Outcome.DEFERRED
+    assert await outbox.send("5522", "b") == Outcome.DROPPED
+    await outbox.flush_all()
+    assert await outbox.send("5522", "b") == Outcome.DEFERRED
+    assert outbox.stats()["dropped"] == 1
+    await outbox.flush_all()
+
+
+@pytest.mark.asyncio
+async def test_messages_for_same_recipient_are_coalesced():
+    """Testa se mensagens do mesmo destinatário viram um único resumo"""
+    whatsapp = FakeWhatsApp()
+    outbox = NotificationOutbox(whatsapp.send_message, window=60, global_rate=1000)
+
+    assert await outbox.send("5511", "contas") == Outcome.DEFERRED
+    await outbox.send("5511", "saldo")
+    await outbox.send("5522", "meta")
+    assert whatsapp.sent == []
+
+    await outbox.flush_all()
+    assert sorted(whatsapp.sent) == [
+        ("5511", f"contas{DIGEST_SEPARATOR}saldo"),
+        ("5522", "meta"),
+    ]
+    assert outbox.stats() == {"queued": 3, "sent": 2, "failed": 0, "dropped": 0, "pending_recipients": 0}
+
+
+@pytest.mark.asyncio
+async def test_digest_is_sent_after_window():
+    """Testa se o resumo sai sozinho ao fim da janela"""
+    whatsapp = FakeWhatsApp()
+    outbox = NotificationOutbox(whatsapp.send_message, window=0.01, global_rate=1000)
+    await outbox.send("5511", "a")
+    await outbox.send("5511", "b")
+    await asyncio.sleep(0.05)
+
+    assert whatsapp.sent == [("5511", f"a{DIGEST_SEPARATOR}b")]
+
+
+@pytest.mark.asyncio
+async def test_notification_service_sends_one_digest_per_user():
+    """Testa se alertas de saldo e metas do mesmo usuário saem juntos"""
+    whatsapp = FakeWhatsApp()
+    outbox = NotificationOutbox(whatsapp.send_message, window=60, global_rate=1000)
+    service = NotificationService(whatsapp, outbox=outbox)
+    user = SimpleNamespace(
+        whatsapp="5511",
+        accounts=[
+            SimpleNamespace(name="Corrente", balance=10.0),
+            SimpleNamespace(name="Poupança", balance=50.0),
+        ],
+        goals=[
+            SimpleNamespace(
+                name="Viagem",
+                target_amount=1000.0,
+                current_amount=250.0,
+                deadline=datetime.now() + timedelta(days=10),
+            )
+        ],
+    )
+
+    await service.check_balance_alerts(user, None)
+    await service.check_goals(user, None)
+    await service.flush()
+
+    assert len(whatsapp.sent) == 1
+    to, message = whatsapp.sent[0]
+    assert to == "5511"
+    assert "Corrente" in message and "Poupança" in message and "Viagem" in message
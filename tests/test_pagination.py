@@ -0,0 +1,107 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.config import PAGE_MAX_SIZE
+from app.db.models import Account, Bill, Transaction, User
+from app.services.pagination import (
+    NEXT_CURSOR_HEADER, InvalidCursor, decode_cursor, encode_cursor, page_size,
+)
+from app.services.whatsapp import format_statement
+
+START = datetime(2024, 1, 1)
+
+
+@pytest.fixture
+def seed():
+    async def seed(session):
+        user = User(email="ana@example.com", hashed_password="x")
+        other = User(email="bia@example.com", hashed_password="x")
+        session.add_all([user, other])
+        await session.flush()
+        session.add_all([Account(name="Carteira", owner_id=user.id), Account(name="Outra", owner_id=other.id)])
+        await session.flush()
+        # Datas repetidas: o id desempata a ordem
+        session.add_all([
+            Transaction(
+                amount=i, type="expense", description=f"t{i}", date=START + timedelta(days=i // 3),
+                owner_id=user.id, account_id=1,
+            )
+            for i in range(25)
+        ])
+        session.add(Transaction(amount=1, type="expense", description="x", date=START, owner_id=other.id, account_id=2))
+        session.add_all([
+            Bill(description=f"b{i}", amount=10, due_date=START + timedelta(days=i % 4), is_paid=i % 5 == 0, owner_id=user.id)
+            for i in range(12)
+        ])
+        return user
+    return seed
+
+
+async def walk(client, url, limit):
+    """Percorre todas as páginas seguindo o cabeçalho do cursor"""
+    pages, cursor = [], None
+    while True:
+        params = {"limit": limit, **({"cursor": cursor} if cursor else {})}
+        response = await client.get(url, params=params)
+        assert response.status_code == 200
+        pages.append(response.json())
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if not cursor:
+            return pages
+
+
+def test_cursor_roundtrip():
+    """Testa se o cursor preserva os tipos das colunas"""
+    columns = (Transaction.date, Transaction.id)
+    cursor = encode_cursor([datetime(2024, 5, 10, 12, 30), 42])
+    assert decode_cursor(cursor, columns) == (datetime(2024, 5, 10, 12, 30), 42)
+    with pytest.raises(InvalidCursor):
+        decode_cursor("não-é-cursor", columns)
+    with pytest.raises(InvalidCursor):
+        decode_cursor(encode_cursor([1]), columns)
+
+
+def test_page_size_limits():
+    """Testa o tamanho padrão e o máximo da página"""
+    assert page_size(None) > 0
+    assert page_size(10**6) == PAGE_MAX_SIZE
+    assert page_size(-5) == 1
+
+
+@pytest.mark.asyncio
+async def test_transactions_keyset_pages(client):
+    """Testa se as páginas cobrem todas as transações, sem repetir, na ordem (data, id)"""
+    pages = await walk(client, "/finance/transactions/", limit=7)
+    assert [len(p) for p in pages] == [7, 7, 7, 4]
+    items = [t for page in pages for t in page]
+    assert [t["id"] for t in items] == list(range(25, 0, -1))
+    assert all(t["owner_id"] == 1 for t in items)
+
+
+@pytest.mark.asyncio
+async def test_pending_bills_by_due_date(client):
+    """Testa a paginação crescente por vencimento"""
+    pages = await walk(client, "/finance/bills/pending", limit=4)
+    bills = [b for page in pages for b in page]
+    assert len(bills) == 9
+    assert [(b["due_date"], b["id"]) for b in bills] == sorted((b["due_date"], b["id"]) for b in bills)
+
+
+@pytest.mark.asyncio
+async def test_single_page_has_no_cursor(client):
+    """Testa que a última página não devolve cursor e que cursor inválido dá 400"""
+    response = await client.get("/finance/accounts/")
+    assert len(response.json()) == 1
+    assert NEXT_CURSOR_HEADER not in response.headers
+    response = await client.get("/finance/transactions/", params={"cursor": "xyz"})
+    assert response.status_code == 400
+
+
+def test_format_statement():
+    """Testa o texto do extrato com link para a próxima página"""
+    transaction = Transaction(amount=12.5, type="expense", description="Café", date=START, owner_id=1, account_id=1)
+    text = format_statement([transaction], next_cursor="abc")
+    assert "01/01 R$ 12,50 - Café" in text
+    assert text.endswith("/extrato abc")
+    assert "Nenhuma" in format_statement([])
@@ -0,0 +1,123 @@
+import threading
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from app.db import pool_metrics
+from app.db.pool_metrics import HolderMiddleware, Histogram, PoolMetrics, holding
+from app.routes import internal
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", pool_size=1, max_overflow=0, pool_timeout=0.05)
+    yield engine
+    engine.dispose()
+
+
+def test_histogram_buckets():
+    """Testa a contagem por faixa"""
+    histogram = Histogram((1, 10))
+    for value in (0.5, 1, 5, 50):
+        histogram.observe(value)
+    snapshot = histogram.snapshot()
+    assert snapshot["buckets"] == {"<=1": 2, "<=10": 1, "+inf": 1}
+    assert snapshot["max"] == 50
+
+
+def test_long_hold_attributed_to_holder(engine):
+    """Testa o tempo de uso e a atribuição de conexões presas ao job"""
+    clock = Clock()
+    metrics = PoolMetrics("teste", long_hold=2, clock=clock).install(engine)
+    with holding("job:relatorio"):
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            assert metrics.held() == [{"holder": "job:relatorio", "seconds": 0.0}]
+            assert metrics.snapshot()["checkedout"] == 1
+            clock.now += 3
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+    snapshot = metrics.snapshot()
+    assert snapshot["hold_ms"]["count"] == 2
+    assert snapshot["long_holds"] == {"job:relatorio": 1}
+    assert snapshot["wait_ms"]["count"] == 2
+    assert snapshot["checkedout"] == 0 and snapshot["held"] == []
+
+
+def test_timeout_counted(engine):
+    """Testa o registro de timeouts com o pool esgotado"""
+    metrics = PoolMetrics("teste").install(engine)
+    with engine.connect():
+        errors = []
+
+        def other_request():
+            try:
+                engine.connect()
+            except PoolTimeoutError as e:
+                errors.append(e)
+
+        thread = threading.Thread(target=other_request)
+        thread.start()
+        thread.join()
+    assert len(errors) == 1
+    assert metrics.timeouts == 1
+    assert metrics.wait_ms.max >= 50
+
+
+def test_lifetime_and_dispose(engine):
+    """Testa o tempo de vida das conexões e a medição após dispose()"""
+    metrics = PoolMetrics("teste").install(engine)
+    with engine.connect():
+        pass
+    engine.dispose()
+    assert metrics.lifetime_s.count == 1
+    with engine.connect():
+        pass
+    assert metrics.wait_ms.count == 2
+
+
+@pytest.mark.asyncio
+async def test_internal_pool_endpoint(engine, monkeypatch):
+    """Testa a rota /internal/pool, o token e a atribuição à rota HTTP"""
+    monkeypatch.setattr(pool_metrics, "registry", {})
+    PoolMetrics("sync", long_hold=0).install(engine)
+
+    app = FastAPI()
+    app.add_middleware(HolderMiddleware)
+    app.include_router(internal.router)
+
+    @app.get("/relatorio/{report_id}")
+    def relatorio(report_id: int):
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        return {}
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        # Sem token configurado as rotas internas não existem
+        monkeypatch.setattr(internal, "INTERNAL_API_TOKEN", "")
+        assert (await client.get("/internal/pool")).status_code == 404
+
+        monkeypatch.setattr(internal, "INTERNAL_API_TOKEN", "segredo")
+        assert (await client.get("/internal/pool")).status_code == 403
+
+        await client.get("/relatorio/1")
+        await client.get("/relatorio/2")
+        response = await client.get("/internal/pool", headers={"X-Internal-Token": "segredo"})
+        assert response.status_code == 200
+        data = response.json()
+        # Uma chave por rota, não por caminho
+        assert data["sync"]["long_holds"] == {"GET /relatorio/{report_id}": 2}
+        assert data["sync"]["pool"] == "QueuePool"
@@ -0,0 +1,232 @@
+import importlib.util
+import os
+import random
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import (
+    Boolean, Column, DateTime, Integer, MetaData, Numeric, String, Table, create_engine, select,
+)
+from sqlmodel import SQLModel
+
+from app.db.models import Account, Bill, Category, Transaction, User
+from app.services.pagination import encode_cursor, paginate
+
+MIGRATION = Path(__file__).resolve().parent.parent / "alembic" / "versions" / "e41e61f2b695_add_per_user_composite_indexes.py"
+
+USERS = 200
+ROWS_PER_USER = 100
+NOW = datetime(2024, 6, 15)
+
+# Tabelas do bot (app.models) sem importar o módulo, que conflita com app.db.models
+chat_metadata = MetaData()
+chat_transactions = Table(
+    "transactions", chat_metadata,
+    Column("id", Integer, primary_key=True),
+    Column("user_id", Integer, nullable=False),
+    Column("amount", Numeric, nullable=False),
+    Column("description", String, nullable=False),
+    Column("type", String, nullable=False),
+    Column("category", String, nullable=False),
+    Column("date", DateTime, nullable=False),
+)
+reminder = Table(
+    "reminder", chat_metadata,
+    Column("id", Integer, primary_key=True),
+    Column("user_id", Integer, nullable=False),
+    Column("description", String, nullable=False),
+    Column("amount", Numeric, nullable=False),
+    Column("due_date", Integer, nullable=False),
+    Column("category", String),
+    Column("is_active", Boolean, nullable=False),
+    Column("created_at", DateTime, nullable=False),
+)
+
+API_TABLES = [t.__table__ for t in (User, Account, Category, Transaction, Bill)]
+
+# Consultas quentes, como escritas nos serviços
+HOT_QUERIES = {
+    "finance.export_transactions": (
+        "ix_transaction_owner_id_date",
+        select(Transaction).where(
+            Transaction.owner_id == 7,
+            Transaction.date.between(NOW - timedelta(days=30), NOW),
+        ),
+    ),
+    "notifications.check_bills": (
+        "ix_bill_owner_id_is_paid_due_date",
+        select(Bill).where(Bill.owner_id == 7, Bill.is_paid == False, Bill.due_date <= NOW + timedelta(days=1)),
+    ),
+    "reminders.get_reminders": (
+        "ix_reminder_user_id_is_active",
+        select(reminder).where(reminder.c.user_id == 7, reminder.c.is_active == True),
+    ),
+    "transactions.get_transactions": (
+        "ix_transactions_user_id_date",
+        select(chat_transactions).where(chat_transactions.c.user_id == 7)
+        .order_by(chat_transactions.c.date.desc()).limit(10),
+    ),
+    "finance.get_transactions (cursor)": (
+        "ix_transaction_owner_id_date",
+        paginate(
+            select(Transaction).where(Transaction.owner_id == 7),
+            (Transaction.date, Transaction.id), encode_cursor([NOW - timedelta(days=100), 10**6]), 50,
+        ),
+    ),
+    "transactions.get_statement (cursor)": (
+        "ix_transactions_user_id_date",
+        paginate(
+            select(chat_transactions).where(chat_transactions.c.user_id == 7),
+            (chat_transactions.c.date, chat_transactions.c.id),
+            encode_cursor([NOW - timedelta(days=100), 10**6]), 10,
+        ),
+    ),
+    "budgets.get_budget_status": (
+        "ix_transactions_user_id_date",
+        select(chat_transactions).where(
+            chat_transactions.c.user_id == 7,
+            chat_transactions.c.type == "expense",
+            chat_transactions.c.date >= NOW.replace(day=1),
+        ),
+    ),
+}
+
+
+def load_migration():
+    spec = importlib.util.spec_from_file_location("composite_indexes", MIGRATION)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def run_migration(engine, step: str):
+    # Como alembic/env.py: transação aberta pelo contexto da migração
+    with engine.connect() as conn:
+        context = MigrationContext.configure(conn)
+        with context.begin_transaction(), Operations.context(context):
+            getattr(load_migration(), step)()
+
+
+def seed(conn):
+    rng = random.Random(0)
+    conn.execute(User.__table__.insert(), [
+        {"id": u, "email": f"u{u}@example.com", "hashed_password": "x", "is_active": True, "is_superuser": False}
+        for u in range(1, USERS + 1)
+    ])
+    conn.execute(Account.__table__.insert(), [
+        {"id": u, "name": "Carteira", "balance": 0.0, "type": "checking", "owner_id": u}
+        for u in range(1, USERS + 1)
+    ])
+
+    transactions, chat, bills, reminders = [], [], [], []
+    for u in range(1, USERS + 1):
+        for i in range(ROWS_PER_USER):
+            date = NOW - timedelta(days=rng.randrange(365), minutes=i)
+            kind = rng.choice(["income", "expense"])
+            transactions.append({
+                "amount": 10.0, "type": kind, "description": "t", "date": date,
+                "owner_id": u, "account_id": u,
+            })
+            chat.append({
+                "user_id": u, "amount": 10, "description": "t", "type": kind,
+                "category": "outros", "date": date,
+            })
+        for i in range(ROWS_PER_USER // 5):
+            bills.append({
+                "description": "b", "amount": 50.0, "due_date": NOW + timedelta(days=rng.randrange(-60, 60)),
+                "is_paid": rng.random() < 0.8, "owner_id": u,
+            })
+            reminders.append({
+                "user_id": u, "description": "r", "amount": 10, "due_date": 1 + i % 28,
+                "category": None, "is_active": rng.random() < 0.5, "created_at": NOW,
+            })
+    conn.execute(Transaction.__table__.insert(), transactions)
+    conn.execute(chat_transactions.insert(), chat)
+    conn.execute(Bill.__table__.insert(), bills)
+    conn.execute(reminder.insert(), reminders)
+
+
+def query_plan(conn, stmt) -> str:
+    compiled = stmt.compile(dialect=conn.dialect)
+    params = compiled.construct_params()
+    if conn.dialect.name == "postgresql":
+        rows = conn.exec_driver_sql("EXPLAIN " + str(compiled), params)
+        return "\n".join(row[0] for row in rows)
+    positional = tuple(params[name] for name in compiled.positiontup)
+    rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + str(compiled), positional)
+    return "\n".join(row[-1] for row in rows)
+
+
+def uses_index(plan: str, index: str) -> bool:
+    markers = (
+        f"USING INDEX {index} ", f"USING COVERING INDEX {index} ",  # SQLite
+        f"Index Scan using {index} ", f"Index Only Scan using {index} ",  # PostgreSQL
+        f"Bitmap Index Scan on {index} ",
+    )
+    return any(marker in plan + " " for marker in markers)
+
+
+def full_scan(plan: str) -> bool:
+    lines = plan.splitlines()
+    return any(
+        "Seq Scan" in line or (line.startswith("SCAN ") and "INDEX" not in line)
+        for line in lines
+    )
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """Banco novo por teste: as migrações alteram o esquema"""
+    # EXPLAIN_DATABASE_URL aponta para um PostgreSQL de testes; padrão: SQLite
+    url = os.getenv("EXPLAIN_DATABASE_URL") or f"sqlite:///{tmp_path / 'plans.db'}"
+    engine = create_engine(url)
+    SQLModel.metadata.create_all(engine, tables=API_TABLES)
+    chat_metadata.create_all(engine)
+    with engine.begin() as conn:
+        seed(conn)
+    yield engine
+    SQLModel.metadata.drop_all(engine, tables=API_TABLES)
+    chat_metadata.drop_all(engine)
+    engine.dispose()
+
+
+def analyze(engine):
+    with engine.begin() as conn:
+        conn.exec_driver_sql("ANALYZE")
+
+
+def test_hot_queries_scan_without_indexes(engine):
+    """Testa se, sem os índices, as consultas quentes fazem varredura completa"""
+    run_migration(engine, "downgrade")
+    analyze(engine)
+    with engine.connect() as conn:
+        for name, (index, stmt) in HOT_QUERIES.items():
+            plan = query_plan(conn, stmt)
+            assert full_scan(plan), f"{name}: {plan}"
+
+
+def test_hot_queries_use_composite_indexes(engine):
+    """Testa se a migração (downgrade e upgrade) cria os índices e cada consulta quente os usa"""
+    run_migration(engine, "downgrade")
+    run_migration(engine, "upgrade")
+    analyze(engine)
+    with engine.connect() as conn:
+        for name, (index, stmt) in HOT_QUERIES.items():
+            plan = query_plan(conn, stmt)
+            assert uses_index(plan, index), f"{name}: {plan}"
+            assert not full_scan(plan), f"{name}: {plan}"
+            # O índice já entrega a ordem por data
+            assert "TEMP B-TREE FOR ORDER BY" not in plan, f"{name}: {plan}"
+
+
+def test_upgrade_is_idempotent_and_matches_models(engine):
+    """Testa se a migração ignora índices existentes e usa os nomes dos modelos"""
+    run_migration(engine, "upgrade")
+    run_migration(engine, "upgrade")
+    model_indexes = {index.name for table in API_TABLES for index in table.indexes}
+    migration_indexes = {name for name, _, _ in load_migration().INDEXES}
+    # create_all (instalações novas) e a migração criam os mesmos índices
+    assert {"ix_transaction_owner_id_date", "ix_bill_owner_id_is_paid_due_date"} <= model_indexes & migration_indexes
@@ -0,0 +1,111 @@
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlmodel import SQLModel
+
+import app.database
+from app.database import get_read_session
+from app.db.models import Account, User
+from app.db.routing import ReadRouter, RecentWrites
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest_asyncio.fixture
+async def databases(tmp_path, monkeypatch):
+    """Principal e réplica em dois SQLite; a réplica não recebe as escritas"""
+    factories = []
+    for name in ("primary", "replica"):
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / name}.db")
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+        factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        async with factory() as session:
+            session.add(User(id=1, email="ana@example.com", hashed_password="x"))
+            session.add(Account(id=1, name=name, owner_id=1))
+            await session.commit()
+        factories.append((engine, factory))
+
+    clock = Clock()
+    (_, primary), (_, replica) = factories
+    router = ReadRouter(primary, replica, writes=RecentWrites(sticky_seconds=5, clock=clock))
+    monkeypatch.setattr(app.database, "read_router", router)
+    monkeypatch.setattr("app.db.routing.recent_writes", router.writes)
+    yield primary, router, clock
+    for engine, _ in factories:
+        await engine.dispose()
+
+
+@pytest.fixture
+def database(databases):
+    """O cliente compartilhado (conftest) escreve no principal"""
+    primary, _, _ = databases
+    return primary.kw["bind"], primary
+
+
+@pytest.fixture
+def seed():
+    async def seed(session):
+        return await session.get(User, 1)
+    return seed
+
+
+@pytest.fixture
+def override_read_db():
+    return False
+
+
+def test_recent_writes_window():
+    """Testa a janela em que o usuário fica no banco principal"""
+    clock = Clock()
+    writes = RecentWrites(sticky_seconds=5, clock=clock)
+    writes.mark(1)
+    assert writes.is_recent(1) and not writes.is_recent(2)
+    clock.now += 5
+    assert not writes.is_recent(1)
+
+
+@pytest.mark.asyncio
+async def test_reads_go_to_replica(databases):
+    """Testa se leituras sem escrita recente usam a réplica"""
+    _, router, _ = databases
+    async with get_read_session(1) as session:
+        account = await session.get(Account, 1)
+    assert account.name == "replica"
+    assert router.stats == {"replica": 1}
+
+
+@pytest.mark.asyncio
+async def test_read_your_writes(client, databases):
+    """Testa se, logo após gravar, o usuário lê do principal e depois volta à réplica"""
+    _, router, clock = databases
+    response = await client.post(
+        "/finance/transactions/",
+        json={"account_id": 1, "amount": 30, "type": "expense", "description": "Almoço"},
+    )
+    assert response.status_code == 200
+
+    # Dentro da janela: principal (vê a transação recém-criada)
+    transactions = (await client.get("/finance/transactions/")).json()
+    assert [t["description"] for t in transactions] == ["Almoço"]
+    assert router.stats["primary"] == 1
+
+    # Após a janela: réplica (ainda sem a transação)
+    clock.now += 10
+    assert (await client.get("/finance/transactions/")).json() == []
+    assert (await client.get("/finance/accounts/")).json()[0]["name"] == "replica"
+    assert router.stats["replica"] == 2
+
+
+def test_without_replica_reads_use_primary():
+    """Testa o comportamento padrão, sem DATABASE_REPLICA_URL"""
+    router = ReadRouter("primary")
+    assert router.sessionmaker_for(1) == "primary"
+    assert router.sessionmaker_for(None) == "primary"
@@ -0,0 +1,48 @@
+import itertools
+
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import create_engine, text
+
+from benchmarks.fake_bridge import FakeBridge
+from benchmarks.replay_webhook import (
+    StatementCounter,
+    command_type,
+    replay,
+    synthetic_corpus,
+)
+
+
+def test_command_type():
+    assert command_type({"message": {"text": "/Despesa 10 café"}}) == "/despesa"
+    assert command_type({"message": {"text": "oi"}}) == "texto"
+
+
+def test_statement_counter_counts_every_engine():
+    """Testa se os comandos SQL de qualquer engine são contados"""
+    engine = create_engine("sqlite://")
+    with StatementCounter() as counter:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            conn.execute(text("SELECT 2"))
+    assert counter.count == 2
+
+
+@pytest.mark.asyncio
+async def test_replay_reports_latency_per_command():
+    """Testa o replay em processo contra uma aplicação e o servidor falso"""
+    app = FastAPI()
+
+    @app.post("/whatsapp/webhook")
+    async def webhook(body: dict):
+        return {"message": body["message"]["text"]}
+
+    payloads = list(itertools.islice(synthetic_corpus(), 40))
+    async with FakeBridge() as bridge:
+        report = await replay(app, payloads, concurrency=4, bridge=bridge)
+
+    assert report["messages"] == 40
+    assert report["statuses"] == {200: 40}
+    assert report["latency"]["count"] == 40
+    assert sum(s["count"] for s in report["by_command"].values()) == 40
+    assert report["db_statements"] == 0
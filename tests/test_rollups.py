@@ -0,0 +1,202 @@
+import random
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+from sqlmodel import SQLModel, select
+
+from app.db.models import Account, Category, Transaction, TransactionRollup, User
+from app.services.analytics import FinancialAnalytics
+from app.services.rollups import api_rollup, month_of
+
+TABLES = [t.__table__ for t in (User, Account, Category, Transaction, TransactionRollup)]
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'rollups.db'}")
+    SQLModel.metadata.create_all(engine, tables=TABLES)
+    with Session(engine) as session:
+        session.add(User(id=1, email="ana@example.com", hashed_password="x"))
+        session.add(Account(id=1, name="Carteira", owner_id=1))
+        session.add_all([
+            Category(id=1, name="alimentação", type="expense"),
+            Category(id=2, name="salário", type="income"),
+        ])
+        session.commit()
+        yield session
+    engine.dispose()
+
+
+def add(db, amount, type, category_id=None, when=None, owner_id=1):
+    """Como finance.create_transaction"""
+    transaction = Transaction(
+        amount=amount, type=type, description="t", date=when or datetime.now(),
+        owner_id=owner_id, account_id=1, category_id=category_id,
+    )
+    db.add(transaction)
+    api_rollup().apply(db, transaction)
+    db.commit()
+    return transaction
+
+
+def seed(db, count=300):
+    rng = random.Random(1)
+    now = datetime.now()
+    for _ in range(count):
+        kind = rng.choice(["income", "expense"])
+        add(
+            db, round(rng.uniform(1, 100), 2), kind,
+            category_id=rng.choice([None, 1 if kind == "expense" else 2]),
+            when=now - timedelta(days=rng.randrange(0, 120)),
+        )
+
+
+def rollup_rows(db):
+    return {
+        (r.month, r.category_id, r.type): (round(r.total, 2), r.count)
+        for r in db.execute(select(TransactionRollup)).scalars()
+    }
+
+
+def test_month_of():
+    """Testa a chave do mês"""
+    assert month_of(datetime(2024, 2, 29, 23, 59)) == date(2024, 2, 1)
+
+
+def test_incremental_rollup_matches_rebuild(db):
+    """Testa se os totais incrementais batem com o recálculo completo"""
+    seed(db)
+    incremental = rollup_rows(db)
+
+    expected = defaultdict(lambda: [0.0, 0])
+    for t in db.execute(select(Transaction)).scalars():
+        key = (month_of(t.date), t.category_id or 0, t.type)
+        expected[key][0] += t.amount
+        expected[key][1] += 1
+    assert incremental == {k: (round(total, 2), count) for k, (total, count) in expected.items()}
+
+    assert api_rollup().rebuild(db) == len(incremental)
+    db.commit()
+    assert rollup_rows(db) == incremental
+
+
+def test_delete_subtracts_and_drops_empty_rows(db):
+    """Testa se a exclusão subtrai o valor e remove a linha zerada"""
+    first = add(db, 10.0, "expense", category_id=1)
+    second = add(db, 5.0, "expense", category_id=1)
+
+    api_rollup().apply(db, second, sign=-1)
+    db.delete(second)
+    db.commit()
+    assert list(rollup_rows(db).values()) == [(10.0, 1)]
+
+    api_rollup().apply(db, first, sign=-1)
+    db.delete(first)
+    db.commit()
+    assert rollup_rows(db) == {}
+
+
+@pytest.mark.asyncio
+async def test_reports_read_rollups(db):
+    """Testa os relatórios a partir dos totais, sem ler transações"""
+    add(db, 1000.0, "income", category_id=2)
+    add(db, 200.0, "expense", category_id=1)
+    add(db, 50.0, "expense")
+    # Dois meses antes do atual (limites do calendário)
+    add(db, 70.0, "expense", category_id=1, when=datetime.now().replace(day=1) - timedelta(days=40))
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(db.bind, "before_cursor_execute", listener)
+    user = db.get(User, 1)
+
+    summary = await FinancialAnalytics.monthly_summary(user, db)
+    assert summary["total_income"] == 1000.0
+    assert summary["total_expense"] == 250.0
+    assert summary["by_category"] == {"salário": 1000.0, "alimentação": 200.0, "Sem categoria": 50.0}
+
+    budget = await FinancialAnalytics.budget_analysis(user, db)
+    assert budget["expenses"] == {"alimentação": 200.0}
+
+    trends = await FinancialAnalytics.spending_trends(user, db, months=3)
+    assert [t["total"] for t in trends if t["type"] == "expense"] == [70.0, 250.0]
+
+    event.remove(db.bind, "before_cursor_execute", listener)
+    assert not any('FROM "transaction"' in s or "FROM transaction " in s for s in statements)
+
+
+class QueryCounter:
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self.listener)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self.listener)
+
+    def listener(self, conn, cursor, statement, *args):
+        self.statements.append(statement)
+
+
+@pytest.mark.asyncio
+async def test_summary_and_insights_query_count(db):
+    """Testa se resumo e insights usam um número fixo de consultas, sem N+1 de categorias"""
+    user = db.get(User, 1)
+    counts = []
+    for batch in (5, 300):
+        seed(db, batch)
+        db.refresh(user)
+        with QueryCounter(db.bind) as counter:
+            summary = await FinancialAnalytics.monthly_summary(user, db)
+            await FinancialAnalytics.generate_insights(user, db, summary)
+        counts.append(len(counter.statements))
+        assert "GROUP BY" in counter.statements[0]
+    assert counts == [1, 1]
+
+    # Sem escritas desde o último resumo: vem do cache
+    with QueryCounter(db.bind) as counter:
+        await FinancialAnalytics.generate_insights(user, db)
+    assert len(counter.statements) == 0
+
+
+@pytest.mark.asyncio
+async def test_batch_insights_match_per_user(db):
+    """Testa se o lote (uma consulta, em blocos) dá o mesmo resultado que usuário a usuário"""
+    db.add_all([
+        User(id=2, email="bia@example.com", hashed_password="x", whatsapp="5511"),
+        User(id=3, email="caio@example.com", hashed_password="x"),
+        User(id=4, email="inativo@example.com", hashed_password="x", is_active=False),
+    ])
+    db.commit()
+    seed(db, 50)
+    add(db, 100.0, "income", category_id=2, owner_id=2)
+    add(db, 300.0, "expense", category_id=1, owner_id=2)
+    add(db, 40.0, "expense", owner_id=4)
+
+    with QueryCounter(db.bind) as counter:
+        reports = list(FinancialAnalytics.batch_insights(db, chunk=2))
+    assert len(counter.statements) == 1
+    assert [r.user_id for r in reports] == [1, 2, 3]
+    assert reports[1].whatsapp == "5511"
+
+    for report in reports:
+        user = db.get(User, report.user_id)
+        summary = FinancialAnalytics.summarize(
+            datetime.now().replace(day=1, hour=0, minute=0),
+            [row for row in db.execute(
+                select(Category.name, TransactionRollup.type, TransactionRollup.total)
+                .outerjoin(Category, Category.id == TransactionRollup.category_id)
+                .where(TransactionRollup.owner_id == user.id, TransactionRollup.month == month_of(datetime.now()))
+            )]
+        )
+        assert report.summary["balance"] == pytest.approx(summary["balance"])
+        assert report.summary["by_category"] == pytest.approx(summary["by_category"])
+        assert report.summary["category_percentages"] == pytest.approx(summary["category_percentages"])
+        assert sorted(report.insights) == sorted(FinancialAnalytics.insights_for(summary))
+    assert reports[2].summary["total_income"] == 0
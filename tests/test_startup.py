@@ -0,0 +1,128 @@
+import os
+import sqlite3
+import subprocess
+import sys
+
+import httpx
+import pytest
+
+from benchmarks.importtime import ROOT, measure, parse_importtime
+
+# Orçamento generoso para a partida a frio (a máquina de CI pode ser lenta)
+IMPORT_BUDGET_MS = float(os.getenv("IMPORT_BUDGET_MS", "3000"))
+
+
+def test_parse_importtime():
+    """Testa a leitura da saída de -X importtime"""
+    output = (
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       100 |        100 |   json.decoder\n"
+        "import time:       250 |        350 | json\n"
+    )
+    entries = parse_importtime(output)
+    assert [(e.module, e.self_us, e.cumulative_us, e.depth) for e in entries] == [
+        ("json.decoder", 100, 100, 1),
+        ("json", 250, 350, 0),
+    ]
+
+
+def test_app_main_import_is_cheap_and_side_effect_free():
+    """Testa se importar app.main não cria arquivos, não conecta ao banco e é rápido"""
+    report = measure("app.main")
+
+    assert report["created_files"] == []
+    # Banco síncrono e routers não registrados ficam fora da partida
+    for module in ("app.db.session", "app.routes.finance", "app.models", "matplotlib", "apscheduler"):
+        assert module not in report["modules"]
+    assert report["total_ms"] < IMPORT_BUDGET_MS, report["total_ms"]
+
+
+def test_db_session_import_does_not_connect():
+    """Testa se importar app.db.session com banco inacessível não falha nem conecta"""
+    report = measure("app.db.session", env={"DATABASE_URL": "postgresql://u:p@127.0.0.1:1/db"})
+    assert report["created_files"] == []
+
+
+@pytest.mark.asyncio
+async def test_ready_gate(monkeypatch):
+    """Testa se /ready responde 503 até o lifespan terminar a inicialização"""
+    import app.main as main
+
+    calls = []
+
+    async def fake_init_db():
+        calls.append("init_db")
+
+    async def noop():
+        pass
+
+    monkeypatch.setattr(main, "init_db", fake_init_db)
+    monkeypatch.setattr(main, "setup_logging", lambda **kwargs: None)
+    monkeypatch.setattr(main.whatsapp_service, "startup", noop)
+    monkeypatch.setattr(main.whatsapp_service, "shutdown", noop)
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://app") as client:
+        assert (await client.get("/ready")).status_code == 503
+
+        async with main.app.router.lifespan_context(main.app):
+            assert calls == ["init_db"]
+            response = await client.get("/ready")
+            assert response.status_code == 200
+            assert response.json() == {"status": "ready"}
+
+        assert (await client.get("/ready")).status_code == 503
+
+
+@pytest.mark.asyncio
+async def test_invalid_qr_format_fails_startup(monkeypatch):
+    """Testa se QR_FORMAT=svg interrompe a partida em vez de falhar no primeiro PIX"""
+    import app.main as main
+
+    async def fake_init_db():
+        pass
+
+    monkeypatch.setattr(main, "init_db", fake_init_db)
+    monkeypatch.setattr(main, "setup_logging", lambda **kwargs: None)
+    monkeypatch.setattr(main, "QR_FORMAT", "svg")
+    with pytest.raises(ValueError):
+        async with main.app.router.lifespan_context(main.app):
+            pass
+    assert main.app.state.ready is False
+
+
+LIFESPAN_SCRIPT = """
+import asyncio
+import app.main as main
+
+async def noop():
+    pass
+
+main.whatsapp_service.startup = noop
+main.whatsapp_service.shutdown = noop
+
+async def run():
+    async with main.app.router.lifespan_context(main.app):
+        pass
+
+asyncio.run(run())
+"""
+
+
+def test_lifespan_creates_tables(tmp_path):
+    """Testa se a partida (processo novo, metadata vazio) cria as tabelas no SQLite"""
+    database = tmp_path / "finbot.db"
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{database}",
+        "PYTHONPATH": os.pathsep.join(filter(None, [ROOT, os.environ.get("PYTHONPATH")])),
+        "WEBHOOK_MODE": "inline",
+    }
+    result = subprocess.run(
+        [sys.executable, "-c", LIFESPAN_SCRIPT], cwd=tmp_path, env=env, capture_output=True, text=True,
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+
+    with sqlite3.connect(database) as conn:
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert {"user", "account", "transaction", "category", "bill", "goal", "processedmessage"} <= tables
@@ -0,0 +1,99 @@
+from datetime import datetime
+
+import httpx
+import pytest
+import pytest_asyncio
+from fastapi import FastAPI
+from sqlmodel import select
+
+import app.database
+import app.services.auth
+from app.db.models import Account, Transaction, TransactionRollup, User
+from app.db.routing import ReadRouter
+from app.routes import internal, whatsapp
+from app.services.identity import IdentityResolver
+
+PHONE = "5511999990000@c.us"
+UNKNOWN = "5511988887777@c.us"
+
+
+@pytest_asyncio.fixture
+async def webhook(database, monkeypatch):
+    """Cliente do webhook com o esquema da API (app.db.models) em um SQLite novo"""
+    engine, factory = database
+    async with factory() as session:
+        user = User(email="ana@example.com", hashed_password="x", whatsapp="5511999990000")
+        session.add(user)
+        await session.flush()
+        account = Account(name="Carteira", owner_id=user.id)
+        session.add(account)
+        await session.flush()
+        session.add(Transaction(
+            amount=12.5, type="expense", description="Café", date=datetime(2024, 5, 10),
+            owner_id=user.id, account_id=account.id,
+        ))
+        await session.commit()
+
+    monkeypatch.setattr(app.database, "async_session", factory)
+    monkeypatch.setattr(app.database, "read_router", ReadRouter(factory))
+    monkeypatch.setattr(app.services.auth, "identity_resolver", IdentityResolver())
+
+    api = FastAPI()
+    api.include_router(whatsapp.router, prefix="/whatsapp")
+    transport = httpx.ASGITransport(app=api)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        client.factory = factory
+        yield client
+
+
+async def reply(client, text, phone=PHONE):
+    response = await client.post("/whatsapp/webhook", json={"message": {"text": text, "from": phone}})
+    assert response.status_code == 200
+    return response.json()["message"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("phone", [PHONE, UNKNOWN])
+async def test_commands_without_user_do_not_touch_identity(webhook, phone):
+    """Testa se "oi" e /ajuda respondem para qualquer número, cadastrado ou não"""
+    assert "FinBot" in await reply(webhook, "oi", phone)
+    assert "/extrato" in await reply(webhook, "/ajuda", phone)
+
+
+@pytest.mark.asyncio
+async def test_statement_uses_whatsapp_of_api_user(webhook):
+    """Testa se /extrato identifica o remetente por User.whatsapp e lê as transações dele"""
+    assert "10/05 R$ 12,50 - Café" in await reply(webhook, "/extrato")
+    assert "Cadastre este número" in await reply(webhook, "/extrato", UNKNOWN)
+
+
+@pytest.mark.asyncio
+async def test_expense_and_income_are_recorded(webhook):
+    """Testa se /despesa e /receita gravam a transação, o saldo e os totais do mês"""
+    assert "R$ 1.500,00" in await reply(webhook, "/receita 1.500 Salário #salário")
+    assert "R$ 50,00" in await reply(webhook, "/despesa 50 Almoço")
+    assert "Cadastre" in await reply(webhook, "/despesa 10 Café", UNKNOWN)
+
+    async with webhook.factory() as session:
+        rows = (await session.execute(
+            select(Transaction.type, Transaction.amount, Transaction.description).order_by(Transaction.id)
+        )).all()
+        account = (await session.execute(select(Account))).scalar_one()
+        rollups = (await session.execute(select(TransactionRollup))).scalars().all()
+    assert rows[1:] == [("income", 1500.0, "Salário"), ("expense", 50.0, "Almoço")]
+    assert account.balance == 1450.0
+    assert sum(r.count for r in rollups) == 2
+    assert "Almoço" in await reply(webhook, "/extrato")
+
+
+@pytest.mark.asyncio
+async def test_stats_require_internal_token(webhook, monkeypatch):
+    """Testa se /whatsapp/webhook/stats segue as rotas internas (fechada sem token)"""
+    monkeypatch.setattr(internal, "INTERNAL_API_TOKEN", "")
+    assert (await webhook.get("/whatsapp/webhook/stats")).status_code == 404
+
+    monkeypatch.setattr(internal, "INTERNAL_API_TOKEN", "segredo")
+    assert (await webhook.get("/whatsapp/webhook/stats")).status_code == 403
+    response = await webhook.get("/whatsapp/webhook/stats", headers={"X-Internal-Token": "segredo"})
+    assert response.status_code == 200
+    assert "dedup" in response.json()
@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+
+from app.services.webhook_queue import WebhookQueue, percentile
+
+
+@pytest.mark.asyncio
+async def test_messages_are_processed_by_workers():
+    """Testa se as mensagens enfileiradas são processadas pelos workers"""
+    handled = []
+
+    async def handler(message):
+        handled.append(message["text"])
+
+    queue = WebhookQueue(handler, maxsize=10, workers=2)
+    await queue.start()
+    for i in range(5):
+        assert queue.submit({"text": str(i)})
+    await queue.stop()
+
+    assert sorted(handled) == ["0", "1", "2", "3", "4"]
+    stats = queue.stats()
+    assert stats["enqueued"] == 5
+    assert stats["processed"] == 5
+    assert stats["depth"] == 0
+    assert not stats["running"]
+
+
+@pytest.mark.asyncio
+async def test_full_queue_drops_messages():
+    """Testa se a fila cheia recusa mensagens e conta os descartes"""
+    release = asyncio.Event()
+
+    async def handler(message):
+        await release.wait()
+
+    queue = WebhookQueue(handler, maxsize=2, workers=1)
+    await queue.start()
+    results = [queue.submit({"text": str(i)}) for i in range(5)]
+    await asyncio.sleep(0)
+    release.set()
+    await queue.stop()
+
+    assert results[:2] == [True, True]
+    assert False in results
+    assert queue.dropped == results.count(False)
+
+
+@pytest.mark.asyncio
+async def test_handler_errors_are_counted():
+    """Testa se erros no handler não derrubam o worker"""
+    async def handler(message):
+        if message["text"] == "erro":
+            raise RuntimeError("falhou")
+
+    queue = WebhookQueue(handler, maxsize=10, workers=1)
+    await queue.start()
+    queue.submit({"text": "erro"})
+    queue.submit({"text": "ok"})
+    await queue.stop()
+
+    assert queue.failed == 1
+    assert queue.processed == 1
+
+
+def test_submit_without_workers_is_rejected():
+    """Testa se a fila parada não aceita mensagens"""
+    async def handler(message):
+        pass
+
+    queue = WebhookQueue(handler)
+    assert not queue.submit({"text": "oi"})
+    assert queue.dropped == 1
+
+
+def test_percentile():
+    assert percentile([], 99) == 0.0
+    assert percentile([3, 1, 2], 50) == 2
+    assert percentile(list(range(101)), 99) == 99
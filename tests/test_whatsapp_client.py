@@ -0,0 +1,44 @@
+import json
+
+import httpx
+import pytest
+
+from app.services.whatsapp import WhatsAppService
+
+
+@pytest.mark.asyncio
+async def test_client_is_shared_until_shutdown():
+    """Testa se o mesmo cliente HTTP é reutilizado entre chamadas"""
+    service = WhatsAppService(api_url="http://bridge")
+    await service.startup()
+    client = service.client
+    assert service.client is client
+    assert client.base_url == "http://bridge"
+
+    await service.shutdown()
+    assert client.is_closed
+    assert service.client is not client
+    await service.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_send_message_uses_shared_client():
+    """Testa se send_message formata o número e usa o cliente compartilhado"""
+    sent = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        sent.append((request.url.path, json.loads(request.content)))
+        return httpx.Response(200, json={"success": True})
+
+    service = WhatsAppService(api_url="http://bridge")
+    service._client = httpx.AsyncClient(
+        base_url=service.api_url, transport=httpx.MockTransport(handler)
+    )
+
+    assert await service.send_message("+11 99999-0000", "oi")
+    assert await service.send_message("5511999990000", "tchau")
+    assert sent == [
+        ("/send-message", {"to": "5511999990000@c.us", "message": "oi"}),
+        ("/send-message", {"to": "5511999990000@c.us", "message": "tchau"}),
+    ]
+    await service.shutdown()